@@ -10,12 +10,13 @@ import logging
 import uuid
 from collections import deque
 import uuid
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional, List, Tuple
 
 from .strategy_manager import StrategyManager
-from .power_control import PowerControlManager, PowerControlDecision
+from .strategies import ForecastBundle
+from .power_control import PowerControlManager, PowerControlDecision, Reason
 from .feedin_limitation import FeedinLimitationManager
 from services.prices.awattar import get_day_ahead
 from services.grid_tariff import GridTariffService
@@ -23,7 +24,7 @@ from services.forecast.simple import pv_forecast, load_forecast
 from services.forecast.prophet_forecaster import ProphetForecaster
 from services.forecast.weather_forecaster import WeatherForecaster
 from services.database.history_db import HistoryDatabase
-from services.communication import MQTTClient, MQTTConfig, ModbusClient, ModbusConfig
+from services.communication import MQTTClient, MQTTConfig, ModbusClient, AsyncModbusClient, ModbusConfig
 from config.modbus_profiles import get_profile
 
 logger = logging.getLogger(__name__)
@@ -85,6 +86,15 @@ class PlantState:
     # Grid Connection
     grid_max_power_kw: Optional[float] = None
     grid_utilization_pct: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Flache Kopie aller Felder (schneller als dataclasses.asdict)"""
+        state_dict = {name: getattr(self, name) for name in _PLANT_STATE_FIELDS}
+        state_dict['active_alarms'] = list(self.active_alarms)
+        return state_dict
+
+
+_PLANT_STATE_FIELDS = tuple(f.name for f in fields(PlantState))
 
 
 @dataclass
@@ -113,15 +123,22 @@ class EmsCore:
     def __init__(self, cfg: Dict[str, Any]):
         self.cfg = cfg
         self.state = PlantState()
+        # Wird nach jeder Zustandsänderung erhöht (Cache-Invalidierung für Leser)
+        self.state_version = 0
+        
+        # Konfigurationsabschnitte einmalig auflösen
+        bess_cfg = cfg.get('bess') or {}
+        ems_cfg = cfg.get('ems') or {}
+        forecast_cfg = cfg.get('forecast') or {}
         
         # Threading & synchronization
         self._stop = threading.Event()
         self._thr = None
-        self._listeners = []
+        self._listeners = set()
         self._state_lock = threading.Lock()
         
         # Historical Database (Phase 2) - MUSS VOR StrategyManager initialisiert werden
-        db_path = cfg.get('database', {}).get('history_path', 'data/ems_history.db')
+        db_path = (cfg.get('database') or {}).get('history_path', 'data/ems_history.db')
         self.history_db = HistoryDatabase(db_path)
         logger.info("Historical database initialized")
         
@@ -138,17 +155,17 @@ class EmsCore:
         self.current_plan: Optional[OptimizationPlan] = None
         
         # Advanced Forecasting (Phase 2)
-        self.use_prophet = cfg.get('forecast', {}).get('use_prophet', False)
-        self.use_weather = cfg.get('forecast', {}).get('use_weather', False)
+        self.use_prophet = forecast_cfg.get('use_prophet', False)
+        self.use_weather = forecast_cfg.get('use_weather', False)
         
         if self.use_prophet:
-            self.prophet_forecaster = ProphetForecaster(cfg.get('forecast', {}))
+            self.prophet_forecaster = ProphetForecaster(forecast_cfg)
             logger.info("Prophet forecaster enabled")
         else:
             self.prophet_forecaster = None
         
         if self.use_weather:
-            self.weather_forecaster = WeatherForecaster(cfg.get('forecast', {}))
+            self.weather_forecaster = WeatherForecaster(forecast_cfg)
             logger.info("Weather-based PV forecasting enabled")
         else:
             self.weather_forecaster = None
@@ -163,27 +180,30 @@ class EmsCore:
         self.grid_tariff_service = GridTariffService(cfg.get('grid_tariffs', {}))
         
         # Grid Connection Limits
-        grid_cfg = cfg.get('grid_connection', {})
+        grid_cfg = cfg.get('grid_connection') or {}
         self.grid_max_power_kw: Optional[float] = grid_cfg.get('max_power_kw')
         
         # Optimierungs-Intervall
-        self.optimization_interval_minutes = cfg.get('ems', {}).get('optimization_interval_minutes', 15)
+        self.optimization_interval_minutes = ems_cfg.get('optimization_interval_minutes', 15)
         self.last_optimization = None
         
         # Constraints (aus Config oder Defaults)
         self.constraints = {
-            'power_charge_max_kw': cfg.get('bess', {}).get('power_charge_max_kw', 100.0),
-            'power_discharge_max_kw': cfg.get('bess', {}).get('power_discharge_max_kw', 100.0),
-            'energy_capacity_kwh': cfg.get('bess', {}).get('energy_capacity_kwh', 200.0),
-            'soc_min_percent': cfg.get('bess', {}).get('soc_min_percent', 10.0),
-            'soc_max_percent': cfg.get('bess', {}).get('soc_max_percent', 90.0),
-            'efficiency_charge': cfg.get('bess', {}).get('efficiency_charge', 0.95),
-            'efficiency_discharge': cfg.get('bess', {}).get('efficiency_discharge', 0.95),
+            'power_charge_max_kw': bess_cfg.get('power_charge_max_kw', 100.0),
+            'power_discharge_max_kw': bess_cfg.get('power_discharge_max_kw', 100.0),
+            'energy_capacity_kwh': bess_cfg.get('energy_capacity_kwh', 200.0),
+            'soc_min_percent': bess_cfg.get('soc_min_percent', 10.0),
+            'soc_max_percent': bess_cfg.get('soc_max_percent', 90.0),
+            'efficiency_charge': bess_cfg.get('efficiency_charge', 0.95),
+            'efficiency_discharge': bess_cfg.get('efficiency_discharge', 0.95),
             'timestep_hours': 1.0
         }
         
         # Demo Mode
-        self.demo_mode = cfg.get('prices', {}).get('demo_mode', True)
+        prices_cfg = cfg.get('prices') or {}
+        self.demo_mode = prices_cfg.get('demo_mode', True)
+        self.price_region = prices_cfg.get('region', 'AT')
+        self.forecast_demo_mode = forecast_cfg.get('demo_mode', True)
         
         # Telemetrie-Puffer
         self.telemetry_buffer = deque(maxlen=1800)  # ~1 Stunde bei 2s Intervall
@@ -199,8 +219,8 @@ class EmsCore:
         self._modbus_thread: Optional[threading.Thread] = None
         self._modbus_alarm_definitions: Dict[str, Dict[str, Any]] = {}
         self._modbus_time_synced = False
-        self._init_mqtt(cfg.get('mqtt', {}))
-        self._init_modbus(cfg.get('modbus', {}))
+        self._init_mqtt(cfg.get('mqtt') or {})
+        self._init_modbus(cfg.get('modbus') or {})
         
         logger.info("EMS Core initialized with intelligent optimization")
     
@@ -286,6 +306,7 @@ class EmsCore:
                 retries=modbus_cfg.get('retries', 3),
                 profile=profile_key,
                 poll_interval_s=modbus_cfg.get('poll_interval_s', 2.0),
+                use_async=modbus_cfg.get('use_async', False),
                 status_codes=status_codes,
                 registers=registers,
                 serial_port=modbus_cfg.get('serial_port', '/dev/ttyUSB0'),
@@ -293,7 +314,8 @@ class EmsCore:
                 parity=modbus_cfg.get('parity', 'N'),
             )
 
-            self.modbus_client = ModbusClient(modbus_config)
+            client_cls = AsyncModbusClient if modbus_config.use_async else ModbusClient
+            self.modbus_client = client_cls(modbus_config)
 
             if not self.modbus_client.config.enabled:
                 logger.warning("Modbus client could not be initialized; check configuration")
@@ -408,6 +430,7 @@ class EmsCore:
             self.state.dso_trip = signals.dso_trip
             self.state.safety_alarm = signals.safety_alarm
             self.state.dso_limit_pct = signals.dso_limit_pct
+            self.state_version += 1
 
         payload = dict(status)
         if alarms is not None:
@@ -466,6 +489,7 @@ class EmsCore:
                     self.state.temp_c = temperature
                 
                 self.state.timestamp = datetime.now(timezone.utc).isoformat()
+                self.state_version += 1
 
             self._record_telemetry('mqtt', payload)
         except Exception as e:
@@ -708,21 +732,21 @@ class EmsCore:
                 # Begrenze Einspeisung (positive Werte = Entladen = Einspeisung)
                 if control_decision.effective_power_kw > self.grid_max_power_kw:
                     control_decision.effective_power_kw = self.grid_max_power_kw
-                    if control_decision.reason == "plan":
-                        control_decision.reason = "grid_connection_limit"
+                    if control_decision.reason == Reason.PLAN:
+                        control_decision.reason = Reason.GRID_CONNECTION_LIMIT
                     control_decision.limit_kw = self.grid_max_power_kw
             
             # Begrenze auch Netzbezug (negative Werte = Laden = Bezug)
             if self.grid_max_power_kw and control_decision.effective_power_kw < 0:
                 if abs(control_decision.effective_power_kw) > self.grid_max_power_kw:
                     control_decision.effective_power_kw = -self.grid_max_power_kw
-                    if control_decision.reason == "plan":
-                        control_decision.reason = "grid_connection_limit"
+                    if control_decision.reason == Reason.PLAN:
+                        control_decision.reason = Reason.GRID_CONNECTION_LIMIT
                     control_decision.limit_kw = self.grid_max_power_kw
             self.state.setpoint_kw = control_decision.effective_power_kw
             self.state.remote_shutdown_requested = control_decision.shutdown
             self.state.active_power_limit_w = control_decision.active_power_limit_w
-            self.state.power_limit_reason = control_decision.reason
+            self.state.power_limit_reason = control_decision.reason_str
             if control_decision.dso_limit_pct is not None:
                 self.state.dso_limit_pct = control_decision.dso_limit_pct
             
@@ -766,6 +790,7 @@ class EmsCore:
             soc = self.state.soc
             setpoint_kw = self.state.setpoint_kw
             strategy = self.state.active_strategy
+            self.state_version += 1
         
         logger.debug(f"State: SoC={soc:.1f}%, "
                     f"Setpoint={setpoint_kw:.1f}kW, "
@@ -800,8 +825,8 @@ class EmsCore:
         logger.info("Running optimization cycle...")
         
         try:
-            # 1. Hole Prognosedaten
-            forecast_data = self._get_forecast_data()
+            # 1. Hole Prognosedaten (ein Bundle für Auswahl und Optimierung)
+            forecast_data = ForecastBundle(self._get_forecast_data())
             
             # 2. Aktueller Zustand
             current_state = {
@@ -815,6 +840,7 @@ class EmsCore:
             # 3. Wähle Strategie
             strategy_name = self.strategy_manager.select_strategy(current_state, forecast_data)
             self.state.active_strategy = strategy_name
+            self.state_version += 1
             
             # 4. Optimiere mit gewählter Strategie
             result = self.strategy_manager.optimize_with_strategy(
@@ -866,18 +892,23 @@ class EmsCore:
                 
                 # Ziehe Netzentgelte vom Gewinn ab
                 if grid_tariff_cost > 0:
-                    result.expected_profit = (result.expected_profit or 0.0) - grid_tariff_cost
-                    if result.metadata:
-                        result.metadata['grid_tariff_cost_eur'] = grid_tariff_cost
+                    metadata = result.metadata
+                    if metadata:
+                        metadata = {**metadata, 'grid_tariff_cost_eur': grid_tariff_cost}
+                    result = replace(
+                        result,
+                        expected_profit=(result.expected_profit or 0.0) - grid_tariff_cost,
+                        metadata=metadata
+                    )
                     logger.debug(f"Grid tariff cost: {grid_tariff_cost:.2f} EUR")
             
             # 5. Wende Einspeisebegrenzung an
             if result.schedule and self.feedin_limitation_manager.enabled:
                 pv_forecast = forecast_data.get('pv', [])
-                result.schedule = self.feedin_limitation_manager.apply_limit_to_schedule(
+                result = replace(result, schedule=self.feedin_limitation_manager.apply_limit_to_schedule(
                     result.schedule,
                     pv_forecast if pv_forecast else None
-                )
+                ))
             
             # 6. Speichere Fahrplan
             self.current_plan = OptimizationPlan(
@@ -890,6 +921,7 @@ class EmsCore:
             
             self.last_optimization = datetime.now(timezone.utc)
             self.state.optimization_status = 'success'
+            self.state_version += 1
             
             # Log Optimization to History
             try:
@@ -904,6 +936,7 @@ class EmsCore:
         except Exception as e:
             logger.error(f"Optimization failed: {e}", exc_info=True)
             self.state.optimization_status = 'failed'
+            self.state_version += 1
     
     def _get_forecast_data(self) -> Dict[str, Any]:
         """
@@ -916,7 +949,7 @@ class EmsCore:
         
         # Preise (immer von aWATTar oder Demo)
         prices = get_day_ahead(
-            region=self.cfg.get('prices', {}).get('region', 'AT'),
+            region=self.price_region,
             demo_mode=self.demo_mode
         )
         
@@ -936,12 +969,12 @@ class EmsCore:
             except Exception as e:
                 logger.warning(f"Weather-based PV forecast failed: {e}, using fallback")
                 pv = pv_forecast(site_id=site_id, hours=24, 
-                               demo_mode=self.cfg.get('forecast', {}).get('demo_mode', True))
+                               demo_mode=self.forecast_demo_mode)
         else:
             pv = pv_forecast(
                 site_id=site_id,
                 hours=24,
-                demo_mode=self.cfg.get('forecast', {}).get('demo_mode', True)
+                demo_mode=self.forecast_demo_mode
             )
         
         # Last-Prognose (Prophet wenn verfügbar)
@@ -957,12 +990,12 @@ class EmsCore:
             except Exception as e:
                 logger.warning(f"Prophet load forecast failed: {e}, using fallback")
                 load = load_forecast(site_id=site_id, hours=24,
-                                   demo_mode=self.cfg.get('forecast', {}).get('demo_mode', True))
+                                   demo_mode=self.forecast_demo_mode)
         else:
             load = load_forecast(
                 site_id=site_id,
                 hours=24,
-                demo_mode=self.cfg.get('forecast', {}).get('demo_mode', True)
+                demo_mode=self.forecast_demo_mode
             )
         
         return {
@@ -1010,7 +1043,7 @@ class EmsCore:
     
     def _broadcast(self):
         """Broadcast State zu SSE-Listenern"""
-        for q in list(self._listeners):
+        for q in tuple(self._listeners):
             try:
                 q.put_nowait(self.to_dict())
             except queue.Full:
@@ -1021,15 +1054,12 @@ class EmsCore:
     def sse_register(self):
         """Registriert SSE-Listener"""
         q = queue.Queue(maxsize=10)
-        self._listeners.append(q)
+        self._listeners.add(q)
         return q
     
     def sse_unregister(self, q):
         """Deregistriert SSE-Listener"""
-        try:
-            self._listeners.remove(q)
-        except ValueError:
-            pass
+        self._listeners.discard(q)
     
     def start(self):
         """Startet EMS Loop"""
@@ -1058,11 +1088,12 @@ class EmsCore:
         if self._modbus_thread and self._modbus_thread.is_alive():
             self._modbus_thread.join(timeout=5)
             self._modbus_thread = None
+        self.strategy_manager.close()
         logger.info("EMS Core stopped")
     
     def to_dict(self) -> Dict[str, Any]:
         """Konvertiert State zu Dictionary"""
-        state_dict = asdict(self.state)
+        state_dict = self.state.to_dict()
         
         # Füge Plan-Informationen hinzu
         if self.current_plan:
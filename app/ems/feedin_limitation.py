@@ -120,8 +120,6 @@ class FeedinLimitationManager:
         if not self.enabled or self.mode == "off":
             return schedule
         
-        result = []
-        
         # Erstelle PV-Lookup für schnellen Zugriff
         pv_lookup: Dict[datetime, float] = {}
         if pv_forecast and self.pv_forecast_integration:
@@ -130,25 +128,26 @@ class FeedinLimitationManager:
                 ts_rounded = ts.replace(second=0, microsecond=0)
                 pv_lookup[ts_rounded] = pv_kw
         
-        for ts, power_kw in schedule:
-            limit_pct = self.get_current_limit_pct(ts)
-            
-            # Wenn Einspeisung (negativ = Entladen = Einspeisung ins Netz)
-            if power_kw < 0:
-                # Berechne maximale Einspeiseleistung
-                if self.pv_forecast_integration and ts in pv_lookup:
-                    pv_kw = pv_lookup[ts]
-                    # Begrenze auf limit_pct der PV-Leistung
-                    max_feedin_kw = pv_kw * (limit_pct / 100.0)
-                    # power_kw ist negativ (Entladen), also muss es >= -max_feedin_kw sein
-                    power_kw = max(power_kw, -max_feedin_kw)
-                else:
-                    # Fallback: Begrenze auf limit_pct der aktuellen Entladeleistung
-                    power_kw = power_kw * (limit_pct / 100.0)
-            
-            result.append((ts, power_kw))
+        return [(ts, self._limited_power(ts, power_kw, pv_lookup)) for ts, power_kw in schedule]
+    
+    def _limited_power(self, ts: datetime, power_kw: float, pv_lookup: Dict[datetime, float]) -> float:
+        """Begrenzte Leistung eines Fahrplanschritts (nur Einspeisung wird begrenzt)"""
+        limit_pct = self.get_current_limit_pct(ts)
+        
+        # Wenn Einspeisung (negativ = Entladen = Einspeisung ins Netz)
+        if power_kw >= 0:
+            return power_kw
+        
+        # Berechne maximale Einspeiseleistung
+        if self.pv_forecast_integration and ts in pv_lookup:
+            pv_kw = pv_lookup[ts]
+            # Begrenze auf limit_pct der PV-Leistung
+            max_feedin_kw = pv_kw * (limit_pct / 100.0)
+            # power_kw ist negativ (Entladen), also muss es >= -max_feedin_kw sein
+            return max(power_kw, -max_feedin_kw)
         
-        return result
+        # Fallback: Begrenze auf limit_pct der aktuellen Entladeleistung
+        return power_kw * (limit_pct / 100.0)
     
     def get_limit_info(self, current_time: Optional[datetime] = None) -> Dict[str, Any]:
         """
@@ -0,0 +1,28 @@
+"""
+Phoenyra EMS - JIT Helpers
+Optionale Numba-Kompilierung für numerische Hot-Loops
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logger.info("Numba not available, numeric kernels run as plain Python")
+
+    def njit(*args, **kwargs):
+        """Ersatz für numba.njit ohne Kompilierung (gleiche Aufrufsignatur)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+__all__ = ['njit', 'NUMBA_AVAILABLE']
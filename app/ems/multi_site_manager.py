@@ -4,14 +4,21 @@ Verwaltet mehrere Standorte (Sites) mit jeweils eigenem EmsCore
 """
 
 import logging
-from typing import Dict, Any, List, Optional
-from dataclasses import asdict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
 from .controller import EmsCore, PlantState
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Konfigurationsabschnitte, die je Standort an den EmsCore weitergereicht werden
+_SITE_SECTIONS = (
+    'bess', 'modbus', 'mqtt', 'forecast', 'grid_connection', 'feedin_limitation',
+    'grid_tariffs', 'ems', 'strategies', 'power_control', 'prices',
+)
+
 
 class MultiSiteManager:
     """
@@ -24,6 +31,9 @@ class MultiSiteManager:
     - Eigene Historien-Datenbank
     """
     
+    __slots__ = ('sites', 'site_configs', 'default_site_id', '_default_site_ref', '_state_cache',
+                 '_lazy_start', '_init_lock', '_capacities')
+    
     def __init__(self, sites_config: Dict[str, Any]):
         """
         Initialisiert Multi-Site-Manager
@@ -35,48 +45,74 @@ class MultiSiteManager:
                         1: { 'name': 'Standort Wien', 'bess': {...}, 'modbus': {...}, ... },
                         2: { 'name': 'Standort Linz', 'bess': {...}, 'modbus': {...}, ... }
                     },
-                    'default_site_id': 1
+                    'default_site_id': 1,
+                    'lazy_start': False  # optional: weitere Sites erst bei erstem Zugriff starten
                 }
         """
+        self._default_site_ref: Optional[EmsCore] = None
         self.sites: Dict[int, EmsCore] = {}
         self.site_configs: Dict[int, Dict[str, Any]] = {}
+        # site_id -> (state_version, state_dict); vermeidet Neuaufbau bei unverändertem Zustand
+        self._state_cache: Dict[int, Tuple[int, Dict[str, Any]]] = {}
         self.default_site_id = sites_config.get('default_site_id', 1)
+        self._lazy_start = bool(sites_config.get('lazy_start', False))
+        self._init_lock = threading.Lock()
         
         # Initialisiere alle Sites
         sites_dict = sites_config.get('sites', {})
         if not sites_dict:
             raise ValueError("Keine Sites in Konfiguration gefunden. Bitte 'sites.sites' in ems.yaml konfigurieren.")
         
-        for site_id, site_cfg in sites_dict.items():
-            self._initialize_site(int(site_id), site_cfg)
+        self.site_configs = {int(site_id): site_cfg for site_id, site_cfg in sites_dict.items()}
+        # Kapazitäten sind nach dem Start unveränderlich -> einmalig für die Aggregation auflösen
+        self._capacities: Dict[int, float] = {
+            site_id: float(site_cfg.get('bess', {}).get('energy_capacity_kwh', 0.0))
+            for site_id, site_cfg in self.site_configs.items()
+        }
+        
+        # Im Lazy-Modus nur die Default-Site sofort starten, alle weiteren beim ersten get_site()
+        if self._lazy_start:
+            startup_ids = [sid for sid in self.site_configs if sid == self.default_site_id]
+        else:
+            startup_ids = list(self.site_configs)
+        
+        # Sites parallel aufbauen (Modbus/MQTT-Verbindungsaufbau überlappt),
+        # Registrierung erfolgt in Konfigurationsreihenfolge
+        if startup_ids:
+            with ThreadPoolExecutor(max_workers=min(32, len(startup_ids)), thread_name_prefix="ems-site-init") as executor:
+                futures = [
+                    (site_id, executor.submit(self._build_site, site_id, self.site_configs[site_id]))
+                    for site_id in startup_ids
+                ]
+            
+            try:
+                for site_id, future in futures:
+                    self._register_site(site_id, future.result())
+            except Exception:
+                # Bereits gestartete Sites nicht verwaist weiterlaufen lassen
+                for _, future in futures:
+                    if future.exception() is None:
+                        future.result().stop()
+                raise
+        
+        # Default-Site einmalig auflösen (Ziel der Attribut-Delegation)
+        self._default_site_ref = self.sites.get(self.default_site_id)
         
-        logger.info(f"MultiSiteManager initialized with {len(self.sites)} sites")
+        logger.info(f"MultiSiteManager initialized with {len(self.sites)}/{len(self.site_configs)} sites started")
     
-    def _initialize_site(self, site_id: int, site_config: Dict[str, Any]):
+    def _build_site(self, site_id: int, site_config: Dict[str, Any]) -> EmsCore:
         """
-        Initialisiert einen einzelnen Standort
+        Erstellt und startet den EmsCore eines Standorts (thread-sicher, ohne Registrierung)
         """
         try:
             # Erstelle vollständige Config für diesen Standort
             # Merge mit globalen Defaults falls vorhanden
-            full_config = {
-                'bess': site_config.get('bess', {}),
-                'modbus': site_config.get('modbus', {}),
-                'mqtt': site_config.get('mqtt', {}),
-                'forecast': site_config.get('forecast', {}),
-                'grid_connection': site_config.get('grid_connection', {}),
-                'feedin_limitation': site_config.get('feedin_limitation', {}),
-                'grid_tariffs': site_config.get('grid_tariffs', {}),
-                'ems': site_config.get('ems', {}),
-                'strategies': site_config.get('strategies', {}),
-                'power_control': site_config.get('power_control', {}),
-                'prices': site_config.get('prices', {}),
-                'database': {
-                    'history_path': site_config.get('database', {}).get(
-                        'history_path', 
-                        f"data/ems_history_site_{site_id}.db"
-                    )
-                }
+            full_config = {section: site_config.get(section, {}) for section in _SITE_SECTIONS}
+            full_config['database'] = {
+                'history_path': site_config.get('database', {}).get(
+                    'history_path',
+                    f"data/ems_history_site_{site_id}.db"
+                )
             }
             
             # Erstelle EmsCore-Instanz für diesen Standort
@@ -84,16 +120,18 @@ class MultiSiteManager:
             ems_core.state.site_id = site_id
             ems_core.start()
             
-            self.sites[site_id] = ems_core
-            self.site_configs[site_id] = site_config
-            
             site_name = site_config.get('name', f'Site {site_id}')
             logger.info(f"✅ Site {site_id} ({site_name}) initialized and started")
+            return ems_core
             
         except Exception as e:
             logger.error(f"❌ Failed to initialize site {site_id}: {e}", exc_info=True)
             raise
     
+    def _register_site(self, site_id: int, ems_core: EmsCore):
+        """Registriert einen gestarteten Standort im Manager"""
+        self.sites[site_id] = ems_core
+    
     def get_site(self, site_id: Optional[int] = None) -> Optional[EmsCore]:
         """
         Gibt EmsCore für einen Standort zurück
@@ -105,24 +143,48 @@ class MultiSiteManager:
             EmsCore-Instanz oder None
         """
         site_id = site_id or self.default_site_id
-        return self.sites.get(site_id)
+        ems = self.sites.get(site_id)
+        if ems is None and self._lazy_start and site_id in self.site_configs:
+            # Double-checked Locking: jede Site wird genau einmal gestartet
+            with self._init_lock:
+                ems = self.sites.get(site_id)
+                if ems is None:
+                    ems = self._build_site(site_id, self.site_configs[site_id])
+                    self._register_site(site_id, ems)
+        return ems
     
     def get_all_sites(self) -> Dict[int, EmsCore]:
         """Gibt alle Site-Instanzen zurück"""
         return self.sites
     
+    def _cached_state(self, site_id: int, ems: EmsCore) -> Dict[str, Any]:
+        """
+        Liefert den Zustand als Dictionary, neu berechnet nur bei geänderter state_version
+        
+        Das zurückgegebene Dictionary wird zwischen Aufrufern geteilt und darf nicht verändert werden.
+        """
+        version = ems.state_version
+        cached = self._state_cache.get(site_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        state_dict = ems.state.to_dict()
+        self._state_cache[site_id] = (version, state_dict)
+        return state_dict
+    
     def get_site_state(self, site_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """Gibt aktuellen Zustand eines Standorts zurück"""
+        """Gibt aktuellen Zustand eines Standorts zurück (startet ihn im Lazy-Modus bei Bedarf)"""
+        site_id = site_id or self.default_site_id
         ems = self.get_site(site_id)
         if ems:
-            return asdict(ems.state)
+            return self._cached_state(site_id, ems)
         return None
     
     def get_all_sites_state(self) -> Dict[int, Dict[str, Any]]:
         """Gibt Zustand aller Standorte zurück"""
         return {
-            site_id: asdict(ems.state)
-            for site_id, ems in self.sites.items()
+            site_id: self._cached_state(site_id, ems)
+            for site_id, ems in tuple(self.sites.items())
         }
     
     def get_aggregated_state(self) -> Dict[str, Any]:
@@ -141,52 +203,53 @@ class MultiSiteManager:
             }
         """
         all_states = self.get_all_sites_state()
+        n = len(all_states)
+        
+        # Werte aller Standorte in einem Durchlauf extrahieren, Summen laufen dann in NumPy
+        rows = [
+            (
+                state.get('p_bess', 0.0),
+                state.get('p_pv', 0.0),
+                state.get('p_load', 0.0),
+                state.get('p_grid', 0.0),
+                state.get('soc', 0.0),
+                state.get('price', 0.0),
+                self._capacities[site_id],
+            )
+            for site_id, state in all_states.items()
+        ]
+        values = np.array(rows, dtype=np.float64).reshape(n, 7)
+        p_bess, p_pv, p_load, p_grid, soc, price, capacity = values.T
+        
+        total_capacity = float(capacity.sum())
+        total_soc_weighted = float(soc @ capacity)
+        total_price_weighted = float(price @ np.abs(p_load))
+        total_p_load = float(p_load.sum())
         
         aggregated = {
-            'total_p_bess': 0.0,
-            'total_p_pv': 0.0,
-            'total_p_load': 0.0,
-            'total_p_grid': 0.0,
-            'total_energy_capacity': 0.0,
-            'total_soc_weighted': 0.0,
-            'total_capacity': 0.0,
+            'total_p_bess': float(p_bess.sum()),
+            'total_p_pv': float(p_pv.sum()),
+            'total_p_load': total_p_load,
+            'total_p_grid': float(p_grid.sum()),
+            'total_energy_capacity': total_capacity,
+            'total_soc_weighted': total_soc_weighted,
+            'total_capacity': total_capacity,
             'sites': all_states,
-            'site_count': len(all_states),
+            'site_count': n,
             'avg_price': 0.0,
-            'total_price_weighted': 0.0
+            'total_price_weighted': total_price_weighted
         }
         
-        for site_id, state in all_states.items():
-            # Leistungen summieren
-            aggregated['total_p_bess'] += state.get('p_bess', 0.0)
-            aggregated['total_p_pv'] += state.get('p_pv', 0.0)
-            aggregated['total_p_load'] += state.get('p_load', 0.0)
-            aggregated['total_p_grid'] += state.get('p_grid', 0.0)
-            
-            # Kapazität und gewichteter SoC
-            capacity = self.site_configs[site_id].get('bess', {}).get('energy_capacity_kwh', 0.0)
-            aggregated['total_energy_capacity'] += capacity
-            soc = state.get('soc', 0.0)
-            aggregated['total_soc_weighted'] += soc * capacity
-            aggregated['total_capacity'] += capacity
-            
-            # Gewichteter Preis (nach Last)
-            price = state.get('price', 0.0)
-            load = abs(state.get('p_load', 0.0))
-            aggregated['total_price_weighted'] += price * load
-        
         # Gewichteter Durchschnitts-SoC
-        if aggregated['total_capacity'] > 0:
-            aggregated['avg_soc'] = aggregated['total_soc_weighted'] / aggregated['total_capacity']
+        if total_capacity > 0:
+            aggregated['avg_soc'] = total_soc_weighted / total_capacity
         else:
             aggregated['avg_soc'] = 0.0
         
         # Gewichteter Durchschnittspreis
-        total_load = abs(aggregated['total_p_load'])
+        total_load = abs(total_p_load)
         if total_load > 0:
-            aggregated['avg_price'] = aggregated['total_price_weighted'] / total_load
-        else:
-            aggregated['avg_price'] = 0.0
+            aggregated['avg_price'] = total_price_weighted / total_load
         
         return aggregated
     
@@ -200,14 +263,17 @@ class MultiSiteManager:
                 'name': site_name,
                 'location': {...},
                 'config': {...},
-                'state': {...}
+                'started': bool (False = im Lazy-Modus noch nicht gestartet),
+                'state': {...} oder None
             }
         """
         if site_id not in self.site_configs:
             return None
         
         config = self.site_configs[site_id]
-        state = self.get_site_state(site_id)
+        ems = self.sites.get(site_id)
+        modbus = config.get('modbus', {})
+        mqtt = config.get('mqtt', {})
         
         return {
             'id': site_id,
@@ -216,27 +282,24 @@ class MultiSiteManager:
             'config': {
                 'bess': config.get('bess', {}),
                 'modbus': {
-                    'enabled': config.get('modbus', {}).get('enabled', False),
-                    'host': config.get('modbus', {}).get('host', 'N/A')
+                    'enabled': modbus.get('enabled', False),
+                    'host': modbus.get('host', 'N/A')
                 },
                 'mqtt': {
-                    'enabled': config.get('mqtt', {}).get('enabled', False),
-                    'broker': config.get('mqtt', {}).get('broker', 'N/A')
+                    'enabled': mqtt.get('enabled', False),
+                    'broker': mqtt.get('broker', 'N/A')
                 }
             },
-            'state': state
+            # Übersicht startet keine Sites: nicht gestartete melden dies explizit
+            'started': ems is not None,
+            'state': self._cached_state(site_id, ems) if ems is not None else None
         }
     
     def list_sites(self) -> List[Dict[str, Any]]:
         """
         Gibt Liste aller Standorte mit Basis-Informationen zurück
         """
-        sites_list = []
-        for site_id in self.sites.keys():
-            site_info = self.get_site_info(site_id)
-            if site_info:
-                sites_list.append(site_info)
-        return sites_list
+        return [self.get_site_info(site_id) for site_id in self.site_configs]
     
     def stop_all(self):
         """
@@ -256,8 +319,9 @@ class MultiSiteManager:
         
         Ermöglicht: multi_site_manager.state statt multi_site_manager.get_site().state
         """
-        default_site = self.get_site()
-        if default_site:
-            return getattr(default_site, name)
+        if name not in MultiSiteManager.__slots__:
+            default_site = self._default_site_ref
+            if default_site is not None:
+                return getattr(default_site, name)
         raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
@@ -1,23 +1,82 @@
 """
 Phoenyra EMS - Linear Programming Optimizer
-Optimiert Batterie-Fahrpläne mit linearer Programmierung (CVXPY)
+Optimiert Batterie-Fahrpläne mit linearer Programmierung (HiGHS via SciPy, CVXPY)
 """
 
 import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import logging
 
 try:
     import cvxpy as cp
     CVXPY_AVAILABLE = True
+    # Reines LP -> HiGHS bevorzugen (optional via highspy), sonst wählt CVXPY selbst
+    LP_SOLVER = cp.HIGHS if 'HIGHS' in cp.installed_solvers() else None
 except ImportError:
     CVXPY_AVAILABLE = False
+    LP_SOLVER = None
     logging.warning("CVXPY not available, falling back to simple optimization")
 
+try:
+    from scipy import sparse
+    from scipy.optimize import linprog
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    logging.warning("SciPy not available, arbitrage LP is solved via CVXPY only")
+
+from ..jit import njit
+
 logger = logging.getLogger(__name__)
 
+# Anzahl gemerkter LP-Strukturen (je Horizont/Constraint-Kombination)
+STRUCTURE_CACHE_SIZE = 8
+
+
+@njit(cache=True, nogil=True)
+def _soc_sweep(low_mask: np.ndarray,
+               high_mask: np.ndarray,
+               soc0: float,
+               p_charge_max: float,
+               p_discharge_max: float,
+               e_capacity: float,
+               soc_min: float,
+               soc_max: float,
+               dt: float,
+               eta_c: float,
+               eta_d: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sequentielle SoC-Fortschreibung der Arbitrage-Heuristik
+    
+    Returns:
+        (p_net, soc_trace) - Nettoleistung (kW, positiv = entladen) und SoC (%) je Schritt
+    """
+    n = low_mask.shape[0]
+    p_net = np.zeros(n)
+    soc_trace = np.empty(n)
+    soc = soc0
+    
+    for i in range(n):
+        if low_mask[i] and soc < soc_max:
+            # Niedrige Preise -> Laden
+            p = min(p_charge_max, (soc_max - soc) / 100.0 * e_capacity / dt)
+            p_net[i] = -p
+            soc += (p * eta_c * dt / e_capacity) * 100.0
+        elif high_mask[i] and soc > soc_min:
+            # Hohe Preise -> Entladen
+            p = min(p_discharge_max, (soc - soc_min) / 100.0 * e_capacity / dt)
+            p_net[i] = p
+            soc -= (p / eta_d * dt / e_capacity) * 100.0
+        
+        # Clamp SoC
+        soc = max(soc_min, min(soc_max, soc))
+        soc_trace[i] = soc
+    
+    return p_net, soc_trace
+
 
 class LinearProgrammingOptimizer:
     """
@@ -42,6 +101,12 @@ class LinearProgrammingOptimizer:
             'timestep_hours': 1.0
         }
         
+        # Zwischengespeicherte CVXPY-Probleme (Struktur-Key -> Problem + Variablen/Parameter)
+        self._arbitrage_problems: 'OrderedDict[Tuple, Tuple[Any, ...]]' = OrderedDict()
+        
+        # Zwischengespeicherte LP-Struktur für SciPy/HiGHS (Struktur-Key -> Matrizen + Bounds)
+        self._lp_structures: 'OrderedDict[Tuple, Tuple[Any, Any, np.ndarray]]' = OrderedDict()
+        
     def optimize_arbitrage(self,
                           prices: List[Tuple[datetime, float]],
                           current_soc: float,
@@ -61,33 +126,42 @@ class LinearProgrammingOptimizer:
         # Merge constraints
         constr = {**self.default_constraints, **(constraints or {})}
         
+        # Preisreihe einmalig in Zeitstempel und Preis-Array (EUR/MWh) zerlegen
+        if prices:
+            timestamps, price_list = zip(*prices)
+            price_values = np.asarray(price_list, dtype=np.float64)
+        else:
+            timestamps, price_values = (), np.empty(0)
+        
+        # Standardfall: festes LP direkt an HiGHS (ohne CVXPY-Kanonisierung)
+        if SCIPY_AVAILABLE:
+            try:
+                return self._scipy_arbitrage(timestamps, price_values, current_soc, constr)
+            except Exception as e:
+                logger.error(f"HiGHS optimization failed: {e}, trying CVXPY")
+        
         if not CVXPY_AVAILABLE:
-            return self._fallback_arbitrage(prices, current_soc, constr)
+            return self._fallback_arbitrage(timestamps, price_values, current_soc, constr)
         
         try:
-            return self._cvxpy_arbitrage(prices, current_soc, constr)
+            return self._cvxpy_arbitrage(timestamps, price_values, current_soc, constr)
         except Exception as e:
             logger.error(f"CVXPY optimization failed: {e}, using fallback")
-            return self._fallback_arbitrage(prices, current_soc, constr)
+            return self._fallback_arbitrage(timestamps, price_values, current_soc, constr)
     
     def _cvxpy_arbitrage(self,
-                        prices: List[Tuple[datetime, float]],
+                        timestamps: Tuple[datetime, ...],
+                        price_values: np.ndarray,
                         current_soc: float,
                         constr: Dict[str, Any]) -> Dict[str, Any]:
         """Optimierung mit CVXPY (optimal)"""
         
-        n_steps = len(prices)
+        n_steps = len(price_values)
         
         # Prüfe ob Preisdaten vorhanden
         if n_steps == 0:
             logger.warning("No price data available for CVXPY optimization")
-            return self._fallback_arbitrage(prices, current_soc, constr)
-        
-        timestamps = [p[0] for p in prices]
-        price_values = np.array([p[1] for p in prices])  # EUR/MWh
-        
-        # Konvertiere Preise zu EUR/kWh
-        prices_kwh = price_values / 1000.0
+            return self._fallback_arbitrage(timestamps, price_values, current_soc, constr)
         
         # Extrahiere Constraints
         P_charge_max = constr['power_charge_max_kw']
@@ -102,88 +176,333 @@ class LinearProgrammingOptimizer:
         # Initiale Energie (in kWh)
         E_init = (current_soc / 100.0) * E_capacity
         
-        # Variablen
-        P_charge = cp.Variable(n_steps, nonneg=True)    # Ladeleistung (kW)
-        P_discharge = cp.Variable(n_steps, nonneg=True)  # Entladeleistung (kW)
-        E = cp.Variable(n_steps + 1)                     # Energieinhalt (kWh)
+        # Problemstruktur hängt nur von Horizont und Constraints ab -> wiederverwenden,
+        # Preise und Anfangsenergie werden als Parameter gesetzt
+        problem_key = (n_steps, P_charge_max, P_discharge_max, E_capacity,
+                       soc_min, soc_max, eta_c, eta_d, dt)
+        problem, P_charge, P_discharge, E, price_dt_param, E_init_param = self._cached_structure(
+            self._arbitrage_problems, problem_key, self._build_arbitrage_problem
+        )
         
-        # Zielfunktion: Maximiere Gewinn
-        # Gewinn = Einnahmen (Verkauf) - Ausgaben (Kauf)
-        revenue = cp.sum(cp.multiply(P_discharge * dt, prices_kwh))
-        cost = cp.sum(cp.multiply(P_charge * dt, prices_kwh))
-        profit = revenue - cost
+        # Preisgewicht je Zeitschritt (EUR/MWh -> EUR/kWh * h) in einer Operation
+        price_dt = price_values * (dt / 1000.0)
+        price_dt_param.value = price_dt
+        E_init_param.value = E_init
         
-        objective = cp.Maximize(profit)
+        # Problem lösen (DPP-Pfad ohne erneute Kanonisierung, Warmstart falls vom Solver unterstützt)
+        problem.solve(solver=LP_SOLVER, warm_start=True, enforce_dpp=True, verbose=False)
         
-        # Constraints
-        constraints = []
+        if problem.status not in ["optimal", "optimal_inaccurate"]:
+            logger.warning(f"Optimization status: {problem.status}, using fallback")
+            return self._fallback_arbitrage(timestamps, price_values, current_soc, constr)
         
-        # Initiale Energie
-        constraints.append(E[0] == E_init)
+        # SoC über Zeit (Zustand nach jedem Zeitschritt, wie in der Fallback-Heuristik)
+        soc_trace = E.value[1:] * (100.0 / E_capacity)
         
-        # Energiebilanz für jeden Zeitschritt
-        for t in range(n_steps):
-            constraints.append(
-                E[t+1] == E[t] + (eta_c * P_charge[t] - P_discharge[t] / eta_d) * dt
+        return self._arbitrage_result(
+            timestamps, P_charge.value, P_discharge.value, soc_trace,
+            price_dt, dt, E_capacity, problem.status, 'cvxpy'
+        )
+    
+    def _scipy_arbitrage(self,
+                         timestamps: Tuple[datetime, ...],
+                         price_values: np.ndarray,
+                         current_soc: float,
+                         constr: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Optimierung als Matrix-LP direkt mit HiGHS (scipy.optimize.linprog)
+        
+        Variablen: x = [P_charge_0..P_charge_{n-1}, P_discharge_0..P_discharge_{n-1}]
+        """
+        
+        n_steps = len(price_values)
+        
+        # Prüfe ob Preisdaten vorhanden
+        if n_steps == 0:
+            logger.warning("No price data available for HiGHS optimization")
+            return self._fallback_arbitrage(timestamps, price_values, current_soc, constr)
+        
+        # Extrahiere Constraints
+        P_charge_max = constr['power_charge_max_kw']
+        P_discharge_max = constr['power_discharge_max_kw']
+        E_capacity = constr['energy_capacity_kwh']
+        E_min = constr['soc_min_percent'] / 100.0 * E_capacity
+        E_max = constr['soc_max_percent'] / 100.0 * E_capacity
+        eta_c = constr['efficiency_charge']
+        eta_d = constr['efficiency_discharge']
+        dt = constr['timestep_hours']
+        
+        # Initiale Energie (in kWh); außerhalb der SoC-Grenzen ist das LP unzulässig
+        E_init = (current_soc / 100.0) * E_capacity
+        if not E_min <= E_init <= E_max:
+            logger.warning("Initial SoC outside limits, using fallback")
+            return self._fallback_arbitrage(timestamps, price_values, current_soc, constr)
+        
+        # Energiebilanz-Matrix und Bounds hängen nur von Horizont und Constraints ab
+        A_energy, A_ub, bounds = self._get_lp_structure(
+            n_steps, eta_c, eta_d, dt, P_charge_max, P_discharge_max
+        )
+        
+        # Zielfunktion: minimiere Kosten - Erlöse
+        price_dt = price_values * (dt / 1000.0)
+        c = np.concatenate((price_dt, -price_dt))
+        
+        # E_init + A_energy @ x in [E_min, E_max]
+        b_ub = np.concatenate((
+            np.full(n_steps, E_max - E_init),
+            np.full(n_steps, E_init - E_min),
+        ))
+        
+        res = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method='highs')
+        
+        if res.status != 0:
+            logger.warning(f"Optimization status: {res.message}, using fallback")
+            return self._fallback_arbitrage(timestamps, price_values, current_soc, constr)
+        
+        x = res.x
+        energy = A_energy @ x
+        energy += E_init
+        soc_trace = energy * (100.0 / E_capacity)
+        
+        return self._arbitrage_result(
+            timestamps, x[:n_steps], x[n_steps:], soc_trace,
+            price_dt, dt, E_capacity, 'optimal', 'highs'
+        )
+    
+    def optimize_arbitrage_batch(self,
+                                 price_series: List[List[Tuple[datetime, float]]],
+                                 socs: List[float],
+                                 constraints: Union[Dict[str, Any], List[Optional[Dict[str, Any]]], None] = None
+                                 ) -> List[Dict[str, Any]]:
+        """
+        Optimiert mehrere Arbitrage-Fahrpläne (z.B. mehrere Standorte) in einem LP
+        
+        Die unabhängigen Einzel-LPs werden blockdiagonal zu einem HiGHS-Aufruf
+        zusammengefasst; Aufbau- und Solver-Overhead fallen nur einmal an.
+        Instanzen, die nicht ins Matrix-LP passen (keine Preise, SoC außerhalb
+        der Grenzen), und ein fehlgeschlagener Batch laufen über optimize_arbitrage.
+        
+        Args:
+            price_series: Je Instanz Liste von (timestamp, price_per_mwh) Tupeln
+            socs: Je Instanz aktueller SoC in Prozent
+            constraints: Gemeinsame Constraints oder Liste je Instanz
+            
+        Returns:
+            Liste von Ergebnis-Dictionaries (wie optimize_arbitrage)
+        """
+        n_instances = len(price_series)
+        if constraints is None or isinstance(constraints, dict):
+            constraints = [constraints] * n_instances
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * n_instances
+        blocks = []
+        
+        for i in range(n_instances):
+            prices = price_series[i]
+            constr = {**self.default_constraints, **(constraints[i] or {})}
+            E_capacity = constr['energy_capacity_kwh']
+            E_min = constr['soc_min_percent'] / 100.0 * E_capacity
+            E_max = constr['soc_max_percent'] / 100.0 * E_capacity
+            E_init = (socs[i] / 100.0) * E_capacity
+            
+            if not SCIPY_AVAILABLE or not prices or not E_min <= E_init <= E_max:
+                results[i] = self.optimize_arbitrage(prices, socs[i], constraints[i])
+                continue
+            
+            timestamps, price_list = zip(*prices)
+            n_steps = len(price_list)
+            dt = constr['timestep_hours']
+            price_dt = np.asarray(price_list, dtype=np.float64) * (dt / 1000.0)
+            A_energy, A_ub, bounds = self._get_lp_structure(
+                n_steps, constr['efficiency_charge'], constr['efficiency_discharge'], dt,
+                constr['power_charge_max_kw'], constr['power_discharge_max_kw']
             )
+            blocks.append((i, timestamps, constr, price_dt, A_energy, A_ub, E_init, E_min, E_max, bounds))
         
-        # Leistungs-Limits
-        constraints.append(P_charge <= P_charge_max)
-        constraints.append(P_discharge <= P_discharge_max)
+        if not blocks:
+            return results
         
-        # SoC-Limits
-        constraints.append(E >= soc_min * E_capacity)
-        constraints.append(E <= soc_max * E_capacity)
+        c = np.concatenate([np.concatenate((b[3], -b[3])) for b in blocks])
+        b_ub = np.concatenate([
+            np.concatenate((np.full(len(b[3]), b[8] - b[6]), np.full(len(b[3]), b[6] - b[7])))
+            for b in blocks
+        ])
+        bounds = np.vstack([b[9] for b in blocks])
+        A_ub = sparse.block_diag([b[5] for b in blocks], format='csr')
         
-        # Problem lösen (CVXPY wählt automatisch den besten Solver)
-        problem = cp.Problem(objective, constraints)
-        result = problem.solve(verbose=False)
+        try:
+            res = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method='highs')
+        except Exception as e:
+            logger.error(f"Batched HiGHS optimization failed: {e}")
+            res = None
+        
+        if res is None or res.status != 0:
+            if res is not None:
+                logger.warning(f"Batched optimization status: {res.message}, solving individually")
+            for b in blocks:
+                i = b[0]
+                results[i] = self.optimize_arbitrage(price_series[i], socs[i], constraints[i])
+            return results
+        
+        offset = 0
+        for i, timestamps, constr, price_dt, A_energy, _, E_init, _, _, _ in blocks:
+            n_steps = len(price_dt)
+            x = res.x[offset:offset + 2 * n_steps]
+            offset += 2 * n_steps
+            E_capacity = constr['energy_capacity_kwh']
+            energy = A_energy @ x
+            energy += E_init
+            results[i] = self._arbitrage_result(
+                timestamps, x[:n_steps], x[n_steps:], energy * (100.0 / E_capacity),
+                price_dt, constr['timestep_hours'], E_capacity, 'optimal', 'highs'
+            )
         
-        if problem.status not in ["optimal", "optimal_inaccurate"]:
-            logger.warning(f"Optimization status: {problem.status}, using fallback")
-            return self._fallback_arbitrage([(timestamps[i], price_values[i]) for i in range(n_steps)], 
-                                           current_soc, constr)
+        return results
+    
+    @staticmethod
+    def _cached_structure(cache: OrderedDict, key: Tuple, build) -> Tuple[Any, ...]:
+        """
+        LRU-Cache für vorab gebaute LP-Strukturen
+        
+        Pro Aufruf ändern sich nur Preise und Anfangs-SoC; Struktur (Horizont,
+        Constraints) wird nur bei einer neuen Kombination gebaut.
+        """
+        structure = cache.get(key)
+        if structure is None:
+            structure = build(*key)
+            cache[key] = structure
+            if len(cache) > STRUCTURE_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return structure
+    
+    def _get_lp_structure(self, n_steps: int, eta_c: float, eta_d: float, dt: float,
+                          P_charge_max: float, P_discharge_max: float) -> Tuple[Any, Any, np.ndarray]:
+        """Energiebilanz-Matrizen und Bounds aus dem Cache (neu gebaut bei neuer Struktur)"""
+        return self._cached_structure(
+            self._lp_structures,
+            (n_steps, eta_c, eta_d, dt, P_charge_max, P_discharge_max),
+            self._build_lp_structure
+        )
+    
+    @staticmethod
+    def _build_lp_structure(n_steps: int, eta_c: float, eta_d: float, dt: float,
+                            P_charge_max: float, P_discharge_max: float) -> Tuple[Any, Any, np.ndarray]:
+        """
+        Baut die kumulierte Energiebilanz als dünnbesetzte Matrix und die Variablen-Bounds
         
-        # Extrahiere Ergebnisse
-        p_charge = P_charge.value
-        p_discharge = P_discharge.value
-        energy = E.value
+        Returns:
+            (A_energy, A_ub, bounds) - A_energy @ x ist die Energieänderung bis Schritt t,
+            A_ub = [A_energy; -A_energy] für obere und untere SoC-Grenze,
+            bounds als (2n, 2)-Array [0, P_max] für Lade- und Entladeleistung
+        """
+        lower = sparse.tril(np.ones((n_steps, n_steps)), format='csr')
+        A_energy = sparse.hstack((lower * (eta_c * dt), lower * (-dt / eta_d)), format='csr')
+        A_ub = sparse.vstack((A_energy, -A_energy), format='csr')
+        bounds = np.zeros((2 * n_steps, 2))
+        bounds[:n_steps, 1] = P_charge_max
+        bounds[n_steps:, 1] = P_discharge_max
+        bounds.flags.writeable = False
+        return A_energy, A_ub, bounds
+    
+    @staticmethod
+    def _arbitrage_result(timestamps: Tuple[datetime, ...],
+                          p_charge: np.ndarray,
+                          p_discharge: np.ndarray,
+                          soc_trace: np.ndarray,
+                          price_dt: np.ndarray,
+                          dt: float,
+                          E_capacity: float,
+                          status: str,
+                          solver: str) -> Dict[str, Any]:
+        """Erstellt das Ergebnis-Dictionary aus Lade-/Entladeleistungen eines LP-Solvers"""
         
         # Berechne netto Leistung (positiv = entladen/verkaufen, negativ = laden/kaufen)
         p_net = p_discharge - p_charge
         
-        # SoC über Zeit
-        soc_schedule = (energy / E_capacity) * 100.0
-        
         # Erstelle Schedule
-        schedule = []
-        for i in range(n_steps):
-            schedule.append((timestamps[i], float(p_net[i])))
+        schedule = list(zip(timestamps, p_net.tolist()))
+        soc_schedule = list(zip(timestamps, soc_trace.tolist()))
         
         # Berechne Metriken
-        total_revenue = float(np.sum(p_discharge * dt * prices_kwh))
-        total_cost = float(np.sum(p_charge * dt * prices_kwh))
+        total_revenue = float(p_discharge @ price_dt)
+        total_cost = float(p_charge @ price_dt)
         total_profit = total_revenue - total_cost
         
         # Energie-Statistiken
-        energy_charged = float(np.sum(p_charge * dt))
-        energy_discharged = float(np.sum(p_discharge * dt))
+        energy_charged = float(p_charge.sum()) * dt
+        energy_discharged = float(p_discharge.sum()) * dt
         
         return {
             'schedule': schedule,
-            'soc_schedule': [(timestamps[i], float(soc_schedule[i])) for i in range(len(soc_schedule))],
+            'soc_schedule': soc_schedule,
             'expected_revenue': total_revenue,
             'expected_cost': total_cost,
             'expected_profit': total_profit,
             'energy_charged_kwh': energy_charged,
             'energy_discharged_kwh': energy_discharged,
             'cycles': energy_discharged / (E_capacity * 2),  # Vollzyklen
-            'optimization_status': problem.status,
-            'solver': 'cvxpy'
+            'optimization_status': status,
+            'solver': solver
         }
     
+    def _build_arbitrage_problem(self,
+                                 n_steps: int,
+                                 P_charge_max: float,
+                                 P_discharge_max: float,
+                                 E_capacity: float,
+                                 soc_min: float,
+                                 soc_max: float,
+                                 eta_c: float,
+                                 eta_d: float,
+                                 dt: float) -> Tuple[Any, ...]:
+        """
+        Baut das parametrisierte Arbitrage-LP (DPP-konform)
+        
+        Returns:
+            (problem, P_charge, P_discharge, E, price_dt_param, E_init_param)
+        """
+        
+        # Parameter (ändern sich je Optimierungslauf)
+        price_dt_param = cp.Parameter(n_steps)  # EUR/kWh * h je Zeitschritt
+        E_init_param = cp.Parameter()           # Anfangsenergie (kWh)
+        
+        # Variablen
+        P_charge = cp.Variable(n_steps, nonneg=True)    # Ladeleistung (kW)
+        P_discharge = cp.Variable(n_steps, nonneg=True)  # Entladeleistung (kW)
+        E = cp.Variable(n_steps + 1)                     # Energieinhalt (kWh)
+        
+        # Zielfunktion: Maximiere Gewinn
+        # Gewinn = Einnahmen (Verkauf) - Ausgaben (Kauf), als ein Skalarprodukt
+        profit = (P_discharge - P_charge) @ price_dt_param
+        
+        objective = cp.Maximize(profit)
+        
+        # Constraints
+        constraints = []
+        
+        # Initiale Energie
+        constraints.append(E[0] == E_init_param)
+        
+        # Energiebilanz als Vektor-Constraint (kumulierte Energieänderung)
+        delta = (eta_c * P_charge - P_discharge / eta_d) * dt
+        constraints.append(E[1:] == E_init_param + cp.cumsum(delta))
+        
+        # Leistungs-Limits
+        constraints.append(P_charge <= P_charge_max)
+        constraints.append(P_discharge <= P_discharge_max)
+        
+        # SoC-Limits
+        constraints.append(E >= soc_min * E_capacity)
+        constraints.append(E <= soc_max * E_capacity)
+        
+        problem = cp.Problem(objective, constraints)
+        return problem, P_charge, P_discharge, E, price_dt_param, E_init_param
+    
     def _fallback_arbitrage(self,
-                           prices: List[Tuple[datetime, float]],
+                           timestamps: Tuple[datetime, ...],
+                           price_values: np.ndarray,
                            current_soc: float,
                            constr: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -194,9 +513,6 @@ class LinearProgrammingOptimizer:
         
         logger.info("Using fallback heuristic optimization")
         
-        timestamps = [p[0] for p in prices]
-        price_values = [p[1] for p in prices]
-        
         # Prüfe ob Preisdaten vorhanden
         if len(price_values) == 0:
             logger.warning("No price data available for fallback optimization")
@@ -213,11 +529,15 @@ class LinearProgrammingOptimizer:
                 'solver': 'fallback'
             }
         
-        # Finde Preis-Quantile
-        prices_sorted = sorted(price_values)
-        n = len(prices_sorted)
-        low_threshold = prices_sorted[n // 4] if n >= 4 else prices_sorted[0]  # 25% Quantil
-        high_threshold = prices_sorted[3 * n // 4] if n >= 4 else prices_sorted[-1]  # 75% Quantil
+        # Finde Preis-Quantile (Ordnungsstatistiken per Partitionierung statt Vollsortierung)
+        n = len(price_values)
+        if n >= 4:
+            partitioned = np.partition(price_values, (n // 4, 3 * n // 4))
+            low_threshold = partitioned[n // 4]  # 25% Quantil
+            high_threshold = partitioned[3 * n // 4]  # 75% Quantil
+        else:
+            low_threshold = price_values.min()
+            high_threshold = price_values.max()
         
         P_charge_max = constr['power_charge_max_kw']
         P_discharge_max = constr['power_discharge_max_kw']
@@ -228,50 +548,29 @@ class LinearProgrammingOptimizer:
         eta_c = constr['efficiency_charge']
         eta_d = constr['efficiency_discharge']
         
-        schedule = []
-        soc_schedule = []
-        current_soc_val = current_soc
-        
-        total_revenue = 0.0
-        total_cost = 0.0
-        energy_charged = 0.0
-        energy_discharged = 0.0
-        
-        for ts, price in zip(timestamps, price_values):
-            p_net = 0.0
-            
-            # Entscheide basierend auf Preis und SoC
-            if price <= low_threshold and current_soc_val < soc_max:
-                # Niedrige Preise -> Laden
-                p_charge = min(P_charge_max, (soc_max - current_soc_val) / 100.0 * E_capacity / dt)
-                p_net = -p_charge
-                
-                # Update SoC
-                energy_added = p_charge * eta_c * dt
-                current_soc_val += (energy_added / E_capacity) * 100.0
-                
-                # Kosten
-                total_cost += (p_charge * dt) * (price / 1000.0)
-                energy_charged += p_charge * dt
-                
-            elif price >= high_threshold and current_soc_val > soc_min:
-                # Hohe Preise -> Entladen
-                p_discharge = min(P_discharge_max, (current_soc_val - soc_min) / 100.0 * E_capacity / dt)
-                p_net = p_discharge
-                
-                # Update SoC
-                energy_removed = p_discharge / eta_d * dt
-                current_soc_val -= (energy_removed / E_capacity) * 100.0
-                
-                # Erlöse
-                total_revenue += (p_discharge * dt) * (price / 1000.0)
-                energy_discharged += p_discharge * dt
-            
-            # Clamp SoC
-            current_soc_val = max(soc_min, min(soc_max, current_soc_val))
-            
-            schedule.append((ts, p_net))
-            soc_schedule.append((ts, current_soc_val))
+        # Preisklassen als boolesche Masken vorberechnen
+        low_mask = price_values <= low_threshold
+        high_mask = price_values >= high_threshold
+        
+        # SoC-Verlauf ist zustandsabhängig und bleibt daher eine sequentielle Schleife
+        p_net, soc_trace = _soc_sweep(
+            low_mask, high_mask, float(current_soc),
+            float(P_charge_max), float(P_discharge_max), float(E_capacity),
+            float(soc_min), float(soc_max), float(dt), float(eta_c), float(eta_d)
+        )
+        
+        # Kennzahlen als Reduktionen über die Leistungsvektoren
+        energy_in = np.maximum(-p_net, 0.0)
+        energy_in *= dt
+        energy_out = np.maximum(p_net, 0.0)
+        energy_out *= dt
+        total_cost = float(energy_in @ price_values) / 1000.0
+        total_revenue = float(energy_out @ price_values) / 1000.0
+        energy_charged = float(energy_in.sum())
+        energy_discharged = float(energy_out.sum())
+        
+        schedule = list(zip(timestamps, p_net.tolist()))
+        soc_schedule = list(zip(timestamps, soc_trace.tolist()))
         
         return {
             'schedule': schedule,
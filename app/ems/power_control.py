@@ -10,23 +10,202 @@ Schreiben von Modbus-Setpoints kann optional aktiviert werden.
 from __future__ import annotations
 
 import logging
+import math
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .jit import njit
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+class Reason(IntEnum):
+    """Begründung einer Leistungsentscheidung (Textform über REASON_NAMES)."""
+
+    PLAN = 0
+    DSO_TRIP = 1
+    SAFETY_ALARM = 2
+    DSO_LIMIT_PCT = 3
+    DISABLED = 4
+    GRID_CONNECTION_LIMIT = 5
+
+
+# Textform für API/Telemetrie, Index = Reason
+REASON_NAMES = (
+    "plan",
+    "dso_trip",
+    "safety_alarm",
+    "dso_limit_pct",
+    "power_control_disabled",
+    "grid_connection_limit",
+)
+_REASONS = tuple(Reason)
+
+# Marker für fehlende Statuswerte (None ist ein gültiger Registerwert)
+_MISSING = object()
+
+
+def _optional_number(cfg: Dict[str, Any], key: str, cast: Callable[[Any], Any]) -> Optional[Any]:
+    value = cfg.get(key)
+    if value is None:
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        logger.warning("PowerControl: %s für %s ungültig: %s", key, cfg.get("register"), value)
+        return None
+
+
+def _make_bool_extractor(cfg: Dict[str, Any]) -> Callable[[Any], bool]:
+    """Baut den Bool-Extraktor für ein Signal (mask > equals > truthy)"""
+    register = cfg.get("register")
+    mask_set = cfg.get("mask") is not None
+    equals_set = cfg.get("equals") is not None
+    mask = _optional_number(cfg, "mask", int)
+    equals = _optional_number(cfg, "equals", int)
+
+    def to_int(value: Any) -> Optional[int]:
+        # pymodbus liefert bereits int - Konvertierung nur für andere Typen
+        if type(value) is int:
+            return value
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            logger.debug("PowerControl: Bool-Register %s unlesbar (%s)", register, value)
+            return None
+
+    if mask_set:
+        if mask is None:
+            return lambda value: False
+
+        def extract(value: Any) -> bool:
+            int_val = to_int(value)
+            return int_val is not None and bool(int_val & mask)
+    elif equals_set:
+        if equals is None:
+            return lambda value: False
+
+        def extract(value: Any) -> bool:
+            int_val = to_int(value)
+            return int_val is not None and int_val == equals
+    else:
+        def extract(value: Any) -> bool:
+            int_val = to_int(value)
+            return int_val is not None and bool(int_val)
+
+    return extract
+
+
+def _make_float_extractor(cfg: Dict[str, Any]) -> Callable[[Any], Optional[float]]:
+    """Baut den Float-Extraktor (Skalierung und optionale Begrenzung)"""
+    register = cfg.get("register")
+    scale = _optional_number(cfg, "scale", float) or 1.0
+    min_pct = _optional_number(cfg, "min_pct", float)
+    max_pct = _optional_number(cfg, "max_pct", float)
+    lower = -math.inf if min_pct is None else min_pct
+    upper = math.inf if max_pct is None else max_pct
+
+    def extract(value: Any) -> Optional[float]:
+        if type(value) is float:
+            float_val = value
+        else:
+            try:
+                float_val = float(value)
+            except (TypeError, ValueError):
+                logger.debug("PowerControl: Float-Register %s unlesbar (%s)", register, value)
+                return None
+        return min(max(float_val * scale, lower), upper)
+
+    return extract
+
+
+def _make_command_builder(
+    write_config: Dict[str, Any],
+) -> Callable[[float, bool, Optional[float]], Dict[str, Any]]:
+    """
+    Spezialisiert die `writes`-Konfiguration einmalig in eine Kommando-Funktion.
+
+    Nur konfigurierte Register erzeugen einen Schritt; Skalierungen werden als
+    Faktoren vorberechnet. Das zurückgegebene Dict wird beim nächsten Aufruf
+    überschrieben.
+    """
+    steps: List[Tuple[str, Callable[[float, bool, Optional[float]], Any]]] = []
+
+    remote_cfg = write_config.get("remote_enable")
+    if remote_cfg and remote_cfg.get("register"):
+        on_value = remote_cfg.get("on", 1)
+        off_value = remote_cfg.get("off", 0)
+        steps.append(
+            (remote_cfg["register"], lambda kw, shutdown, pct: off_value if shutdown else on_value)
+        )
+
+    set_w_cfg = write_config.get("active_power_set_w")
+    if set_w_cfg and set_w_cfg.get("register"):
+        w_factor = 1000.0 / (_optional_number(set_w_cfg, "scale", float) or 1.0)
+        steps.append((set_w_cfg["register"], lambda kw, shutdown, pct: int(round(kw * w_factor))))
+
+    limit_pct_cfg = write_config.get("active_power_limit_pct")
+    if limit_pct_cfg and limit_pct_cfg.get("register"):
+        pct_factor = 1.0 / (_optional_number(limit_pct_cfg, "scale", float) or 1.0)
+        steps.append(
+            (
+                limit_pct_cfg["register"],
+                lambda kw, shutdown, pct: (
+                    int(round(float(pct) * pct_factor)) if pct is not None and not shutdown else 0
+                ),
+            )
+        )
+
+    # Wiederverwendeter Kommando-Puffer (wird bei jedem Aufruf neu befüllt)
+    commands: Dict[str, Any] = {}
+
+    def prepare_commands(
+        effective_kw: float, shutdown: bool, dso_limit_pct: Optional[float]
+    ) -> Dict[str, Any]:
+        commands.clear()
+        for register, step in steps:
+            commands[register] = step(effective_kw, shutdown, dso_limit_pct)
+        return commands
+
+    return prepare_commands
+
+
+@njit(cache=True, nogil=True)
+def _decide_core(requested_kw, dso_trip, safety_alarm, dso_limit_pct, max_kw):
+    """
+    Numerischer Kern von compute_decision (nur Skalare, Numba-kompilierbar).
+
+    `dso_limit_pct` bzw. `max_kw` sind NaN bzw. 0.0, wenn nicht vorhanden.
+    Returns: (effective_kw, limit_kw, shutdown, reason_code), limit_kw NaN = kein Limit
+    """
+    if dso_trip:
+        return 0.0, math.nan, True, Reason.DSO_TRIP
+    if safety_alarm:
+        return 0.0, math.nan, True, Reason.SAFETY_ALARM
+    if math.isnan(dso_limit_pct) or max_kw == 0.0:
+        return requested_kw, math.nan, False, Reason.PLAN
+
+    limit_kw = max(0.0, max_kw * (dso_limit_pct / 100.0))
+    if requested_kw >= 0.0:
+        effective_kw = min(requested_kw, limit_kw)
+    else:
+        effective_kw = -min(-requested_kw, limit_kw)
+    return effective_kw, limit_kw, False, Reason.DSO_LIMIT_PCT
+
+
+@dataclass(slots=True)
 class SignalState:
     """Abbild der relevanten Eingangssignale für die Leistungssteuerung."""
 
     dso_trip: bool = False
     safety_alarm: bool = False
     dso_limit_pct: Optional[float] = None
+    # Wird bei jedem ingest_status geleert und neu befüllt (nicht aufbewahren)
     raw_values: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class PowerControlDecision:
     """Ergebnis der Leistungssteuerung."""
 
@@ -37,7 +216,8 @@ class PowerControlDecision:
     safety_alarm: bool
     dso_limit_pct: Optional[float]
     limit_kw: Optional[float]
-    reason: str
+    reason: Reason
+    # Puffer des Managers, nur bis zur nächsten compute_decision gültig
     commands: Dict[str, Any] = field(default_factory=dict)
 
     @property
@@ -46,6 +226,10 @@ class PowerControlDecision:
             return None
         return self.limit_kw * 1000.0
 
+    @property
+    def reason_str(self) -> str:
+        return REASON_NAMES[self.reason]
+
 
 class PowerControlManager:
     """
@@ -86,6 +270,9 @@ class PowerControlManager:
         self.signals_config: Dict[str, Any] = config.get("signals", {}) or {}
         self.write_config: Dict[str, Any] = config.get("writes", {}) or {}
         self._signal_state = SignalState()
+        # (Zustandsattribut, Register, Extraktor, Wert bei fehlendem Register)
+        self._extractors = self._build_extractors(self.signals_config)
+        self._prepare_commands = _make_command_builder(self.write_config)
 
     # ------------------------------------------------------------------ #
     # Signal-Verarbeitung
@@ -95,37 +282,21 @@ class PowerControlManager:
         """
         Aktualisiert die internen Signalspeicher basierend auf Modbus-Statuswerten.
         """
+        state = self._signal_state
         if not status:
-            return self._signal_state
-
-        self._signal_state.raw_values = {}
-
-        # DSO Trip
-        dso_trip_cfg = self.signals_config.get("dso_trip")
-        if dso_trip_cfg:
-            self._signal_state.dso_trip = self._extract_bool(status, dso_trip_cfg)
-            register = dso_trip_cfg.get("register")
-            if register in status:
-                self._signal_state.raw_values[register] = status.get(register)
-
-        # Safety Alarm
-        safety_cfg = self.signals_config.get("safety_alarm")
-        if safety_cfg:
-            self._signal_state.safety_alarm = self._extract_bool(status, safety_cfg)
-            register = safety_cfg.get("register")
-            if register in status:
-                self._signal_state.raw_values[register] = status.get(register)
-
-        # DSO Limit in %
-        limit_cfg = self.signals_config.get("dso_limit_pct")
-        if limit_cfg:
-            limit_value = self._extract_float(status, limit_cfg)
-            self._signal_state.dso_limit_pct = limit_value
-            register = limit_cfg.get("register")
-            if register in status:
-                self._signal_state.raw_values[register] = status.get(register)
-
-        return self._signal_state
+            return state
+
+        raw_values = state.raw_values
+        raw_values.clear()
+        for attr, register, extract, missing in self._extractors:
+            value = status.get(register, _MISSING)
+            if value is _MISSING:
+                setattr(state, attr, missing)
+            else:
+                setattr(state, attr, extract(value))
+                raw_values[register] = value
+
+        return state
 
     # ------------------------------------------------------------------ #
     # Entscheidungslogik
@@ -140,8 +311,6 @@ class PowerControlManager:
         Berechnet den wirksamen Sollwert unter Berücksichtigung der Signalsituation.
         """
         state = self._signal_state
-        shutdown = False
-        reason = "plan"
 
         if not self.enabled:
             return PowerControlDecision(
@@ -152,43 +321,31 @@ class PowerControlManager:
                 safety_alarm=state.safety_alarm,
                 dso_limit_pct=state.dso_limit_pct,
                 limit_kw=None,
-                reason="power_control_disabled",
+                reason=Reason.DISABLED,
                 commands={},
             )
 
         # maximale Anlageleistung ermitteln
         max_kw = self._determine_max_power_kw(constraints, requested_power_kw)
 
-        effective_kw = requested_power_kw
-        limit_kw: Optional[float] = None
-
-        if state.dso_trip:
-            shutdown = True
-            reason = "dso_trip"
-            effective_kw = 0.0
-        elif state.safety_alarm:
-            shutdown = True
-            reason = "safety_alarm"
-            effective_kw = 0.0
-        else:
-            limits: Dict[str, float] = {}
-
-            if state.dso_limit_pct is not None and max_kw:
-                try:
-                    limit_kw = max_kw * (float(state.dso_limit_pct) / 100.0)
-                    limit_kw = max(0.0, limit_kw)
-                    limits["dso_limit_pct"] = limit_kw
-                except (TypeError, ValueError):
-                    logger.debug("Ungültiges DSO-Limit: %s", state.dso_limit_pct)
-                    limit_kw = None
-
-            if limits:
-                # kleinstes Limit anwenden
-                limit_name, limit_kw = sorted(limits.items(), key=lambda item: item[1])[0]
-                effective_kw = self._apply_limit(requested_power_kw, limit_kw)
-                reason = limit_name
+        dso_limit_pct = math.nan
+        if state.dso_limit_pct is not None:
+            try:
+                dso_limit_pct = float(state.dso_limit_pct)
+            except (TypeError, ValueError):
+                logger.debug("Ungültiges DSO-Limit: %s", state.dso_limit_pct)
+
+        effective_kw, limit_value, shutdown, reason_code = _decide_core(
+            float(requested_power_kw),
+            bool(state.dso_trip),
+            bool(state.safety_alarm),
+            dso_limit_pct,
+            float(max_kw or 0.0),
+        )
+        limit_kw: Optional[float] = None if math.isnan(limit_value) else limit_value
+        reason = _REASONS[reason_code]
 
-        commands = self._prepare_commands(effective_kw, shutdown, state)
+        commands = self._prepare_commands(effective_kw, shutdown, state.dso_limit_pct)
 
         return PowerControlDecision(
             requested_power_kw=requested_power_kw,
@@ -217,7 +374,34 @@ class PowerControlManager:
             logger.debug("PowerControl: Modbus-Client nicht verbunden, überspringe Write.")
             return
 
-        for register_name, value in decision.commands.items():
+        commands = decision.commands
+        if not commands:
+            return
+
+        write_batch = getattr(modbus_client, "write_registers", None)
+        if write_batch is not None:
+            # Zusammenhängende Register in einem FC16-Request
+            try:
+                results = write_batch(commands)
+            except Exception as exc:
+                logger.error("PowerControl: Fehler beim Batch-Write %s: %s", commands, exc)
+                return
+            for register_name, ok in results.items():
+                if not ok:
+                    logger.warning(
+                        "PowerControl: Schreiben von %s=%s fehlgeschlagen",
+                        register_name,
+                        commands[register_name],
+                    )
+                else:
+                    logger.debug(
+                        "PowerControl: Write %s=%s (auto_write aktiv)",
+                        register_name,
+                        commands[register_name],
+                    )
+            return
+
+        for register_name, value in commands.items():
             try:
                 ok = modbus_client.write_register(register_name, value)
                 if not ok:
@@ -240,60 +424,21 @@ class PowerControlManager:
     # Hilfsfunktionen
     # ------------------------------------------------------------------ #
 
-    def _extract_bool(self, status: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
-        register = cfg.get("register")
-        if register not in status:
-            return False
-
-        value = status.get(register)
-        try:
-            int_val = int(value)
-        except (TypeError, ValueError):
-            logger.debug("PowerControl: Bool-Register %s unlesbar (%s)", register, value)
-            return False
-
-        mask = cfg.get("mask")
-        if mask is not None:
-            try:
-                return bool(int_val & int(mask))
-            except (TypeError, ValueError):
-                logger.debug("PowerControl: Maske für %s ungültig: %s", register, mask)
-                return False
-
-        equals = cfg.get("equals")
-        if equals is not None:
-            try:
-                return int_val == int(equals)
-            except (TypeError, ValueError):
-                logger.debug("PowerControl: Vergleichswert für %s ungültig: %s", register, equals)
-                return False
-
-        return bool(int_val)
-
-    def _extract_float(self, status: Dict[str, Any], cfg: Dict[str, Any]) -> Optional[float]:
-        register = cfg.get("register")
-        if register not in status:
-            return None
-
-        value = status.get(register)
-        try:
-            float_val = float(value)
-        except (TypeError, ValueError):
-            logger.debug("PowerControl: Float-Register %s unlesbar (%s)", register, value)
-            return None
-
-        scale = cfg.get("scale", 1.0) or 1.0
-        float_val *= float(scale)
-
-        min_pct = cfg.get("min_pct")
-        if min_pct is not None:
-            float_val = max(float_val, float(min_pct))
-
-        max_pct = cfg.get("max_pct")
-        if max_pct is not None:
-            float_val = min(float_val, float(max_pct))
-
-        return float_val
+    @staticmethod
+    def _build_extractors(signals_config: Dict[str, Any]) -> List[Tuple[str, str, Callable[[Any], Any], Any]]:
+        """Spezialisiert die Signal-Konfiguration einmalig in Extraktor-Funktionen"""
+        extractors: List[Tuple[str, str, Callable[[Any], Any], Any]] = []
+        for name in ("dso_trip", "safety_alarm"):
+            cfg = signals_config.get(name)
+            if cfg and cfg.get("register") is not None:
+                extractors.append((name, cfg["register"], _make_bool_extractor(cfg), False))
+
+        limit_cfg = signals_config.get("dso_limit_pct")
+        if limit_cfg and limit_cfg.get("register") is not None:
+            extractors.append(
+                ("dso_limit_pct", limit_cfg["register"], _make_float_extractor(limit_cfg), None)
+            )
+        return extractors
 
     def _determine_max_power_kw(
         self, constraints: Dict[str, Any], requested_power_kw: float
@@ -309,43 +454,3 @@ class PowerControlManager:
         max_kw = max(discharge, charge, abs(requested_power_kw))
         return max_kw if max_kw > 0 else None
 
-    @staticmethod
-    def _apply_limit(value_kw: float, limit_kw: float) -> float:
-        limit_kw = abs(limit_kw)
-        if value_kw >= 0:
-            return min(value_kw, limit_kw)
-        return -min(abs(value_kw), limit_kw)
-
-    def _prepare_commands(
-        self,
-        effective_kw: float,
-        shutdown: bool,
-        state: SignalState,
-    ) -> Dict[str, Any]:
-        commands: Dict[str, Any] = {}
-
-        remote_cfg = self.write_config.get("remote_enable")
-        if remote_cfg and remote_cfg.get("register"):
-            register = remote_cfg["register"]
-            on_value = remote_cfg.get("on", 1)
-            off_value = remote_cfg.get("off", 0)
-            commands[register] = off_value if shutdown else on_value
-
-        set_w_cfg = self.write_config.get("active_power_set_w")
-        if set_w_cfg and set_w_cfg.get("register"):
-            register = set_w_cfg["register"]
-            scale = set_w_cfg.get("scale", 1.0) or 1.0
-            commands[register] = int(round((effective_kw * 1000.0) / scale))
-
-        limit_pct_cfg = self.write_config.get("active_power_limit_pct")
-        if limit_pct_cfg and limit_pct_cfg.get("register"):
-            register = limit_pct_cfg["register"]
-            scale = limit_pct_cfg.get("scale", 1.0) or 1.0
-            if state.dso_limit_pct is not None and not shutdown:
-                commands[register] = int(round(float(state.dso_limit_pct) / scale))
-            else:
-                commands[register] = 0
-
-        return commands
-
-
@@ -4,6 +4,7 @@ Intelligente Energiemanagement-Strategien
 """
 
 from .base_strategy import BaseStrategy, StrategyResult
+from .forecast_arrays import ForecastArrays, ForecastBundle, forecast_arrays
 from .arbitrage_strategy import ArbitrageStrategy
 from .peak_shaving_strategy import PeakShavingStrategy
 from .self_consumption_strategy import SelfConsumptionStrategy
@@ -12,6 +13,9 @@ from .load_balancing_strategy import LoadBalancingStrategy
 __all__ = [
     'BaseStrategy',
     'StrategyResult',
+    'ForecastArrays',
+    'ForecastBundle',
+    'forecast_arrays',
     'ArbitrageStrategy',
     'PeakShavingStrategy',
     'SelfConsumptionStrategy',
@@ -4,23 +4,131 @@ KI-basierte Strategie-Auswahl basierend auf ML-Modell
 """
 
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime, timezone
 import logging
-import pickle
+import time
+import warnings
+from collections import OrderedDict
 from pathlib import Path
 
+from ..jit import njit
+
 try:
     from sklearn.ensemble import RandomForestClassifier
     from sklearn.preprocessing import StandardScaler
     from sklearn.model_selection import train_test_split
+    import joblib
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
     logging.warning("scikit-learn not available. AI Strategy Selection will be disabled.")
 
+try:
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    logging.info("onnxruntime/skl2onnx not available, AI inference uses scikit-learn")
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Feature-Reihenfolge des ML-Modells (Spalten des Feature-Vektors)
+FEATURE_NAMES = (
+    'soc', 'soh', 'temp_c', 'price_trend', 'price_volatility',
+    'current_price', 'pv_6h_avg', 'load_6h_avg', 'price_6h_avg',
+    'hour', 'weekday', 'is_weekend', 'current_strategy_score',
+    'p_bess', 'p_pv', 'p_load', 'p_grid'
+)
+N_FEATURES = len(FEATURE_NAMES)
+
+# Herkunft je Feature-Spalte für die Batch-Extraktion:
+# (Record-Bereich, Key, Default, Normierungs-Divisor); None = Zeit-Feature
+_FEATURE_SOURCES = (
+    ('state', 'soc', 50.0, 100.0),
+    ('state', 'soh', 100.0, 100.0),
+    ('state', 'temp_c', 25.0, 50.0),
+    ('market', 'price_trend', 0.0, 1.0),
+    ('market', 'price_volatility', 0.0, 1.0),
+    ('market', 'current_price', 0.0, 100.0),
+    ('forecast', 'pv_6h_avg', 0.0, 100.0),
+    ('forecast', 'load_6h_avg', 0.0, 100.0),
+    ('forecast', 'price_6h_avg', 0.0, 100.0),
+    None,
+    None,
+    None,
+    ('state', 'current_strategy_score', 0.0, 1.0),
+    ('state', 'p_bess', 0.0, 100.0),
+    ('state', 'p_pv', 0.0, 100.0),
+    ('state', 'p_load', 0.0, 100.0),
+    ('state', 'p_grid', 0.0, 100.0),
+)
+
+
+
+@njit(cache=True, nogil=True)
+def _head_mean(values, horizon):
+    """Mittelwert der ersten `horizon` Werte (NaN werden übersprungen, leer = 0.0)"""
+    total = 0.0
+    count = 0
+    for i in range(min(horizon, values.shape[0])):
+        v = values[i]
+        if v == v:
+            total += v
+            count += 1
+    return total / count if count else 0.0
+
+
+@njit(cache=True, nogil=True)
+def build_feature_vector(pv, load, horizon, soc, soh, temp_c,
+                         price_trend, price_volatility, current_price, price_6h_avg,
+                         current_strategy_score, p_bess, p_pv, p_load, p_grid):
+    """
+    Feature-Vektor (N_FEATURES, float32) in einem kompilierten Durchlauf
+    
+    Gleiche Normierung wie extract_features; pv/load sind die Prognosereihen
+    als Arrays (6h-Mittel wird hier gebildet). Die Zeit-Features (hour, weekday,
+    is_weekend) bleiben 0 und werden von select_strategy eingesetzt.
+    """
+    out = np.zeros(N_FEATURES, dtype=np.float32)
+    out[0] = soc / 100.0
+    out[1] = soh / 100.0
+    out[2] = temp_c / 50.0
+    out[3] = price_trend
+    out[4] = price_volatility
+    out[5] = current_price / 100.0
+    out[6] = _head_mean(pv, horizon) / 100.0
+    out[7] = _head_mean(load, horizon) / 100.0
+    out[8] = price_6h_avg / 100.0
+    out[12] = current_strategy_score
+    out[13] = p_bess / 100.0
+    out[14] = p_pv / 100.0
+    out[15] = p_load / 100.0
+    out[16] = p_grid / 100.0
+    return out
+
+
+# LRU-Cache für Vorhersagen (exakter Feature-Vektor), max. Einträge
+PREDICT_CACHE_SIZE = 256
+
+# Ringpuffer der letzten Entscheidungen (Anzahl Einträge)
+HISTORY_CAPACITY = 4096
+
+# Baumanzahl wird schrittweise erhöht, bis der OOB-Score kaum noch steigt
+TREE_COUNT_STEPS = (10, 20, 40, 80)
+MIN_OOB_GAIN = 0.01
+
+# Ab dieser Batch-Größe wird die Baumauswertung parallelisiert (n_jobs=-1)
+BATCH_PARALLEL_MIN = 8
+
 
 class AIStrategySelector:
     """
@@ -32,25 +140,38 @@ class AIStrategySelector:
     - Systemzustand (SoC, BESS-Status)
     """
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, dominance_margin: float = 0.2):
+        # Wiederverwendeter Feature-Puffer (float32 entspricht der internen Baum-Präzision)
+        self._feat_buf = np.empty((1, N_FEATURES), dtype=np.float32)
+        # (gültig bis Epoch-Sekunde, hour, weekday, is_weekend)
+        self._time_cache = (0.0, 0.0, 0.0, 0.0)
+        self._predict_cache: 'OrderedDict[bytes, int]' = OrderedDict()
+        # Letzte Entscheidung: ((Feature-Hash, Strategie-Reihenfolge), Index, Strategie)
+        self._last_decision: Optional[tuple] = None
+        self._hist_feat = np.empty((HISTORY_CAPACITY, N_FEATURES), dtype=np.float32)
+        self._hist_idx = np.empty(HISTORY_CAPACITY, dtype=np.int16)
+        self._hist_strategy = np.empty(HISTORY_CAPACITY, dtype=object)
+        self._hist_ts = np.empty(HISTORY_CAPACITY, dtype=np.float64)
+        self._hist_pos = 0
+        # Reihenfolge der Strategie-Scores (aus dem ersten Aufruf übernommen)
+        self._score_names: tuple = ()
+        # Liegt der beste Score um diesen Anteil über dem zweitbesten, entfällt die ML-Vorhersage
+        self.dominance_margin = float(dominance_margin)
+        self._scaler_folded = False
+        self._onnx_model: Optional[bytes] = None
+        self._onnx_session = None
+        self._onnx_input: Optional[str] = None
+        self._onnx_label: Optional[str] = None
+        
         if not SKLEARN_AVAILABLE:
             self.model = None
             self.is_trained = False
             logger.warning("scikit-learn not available. AI Strategy Selection disabled.")
             return
         
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42,
-            n_jobs=-1
-        )
+        self.model = self._new_model()
         self.scaler = StandardScaler()
         self.is_trained = False
-        self.feature_history: List[np.ndarray] = []
-        self.decision_history: List[Dict[str, Any]] = []
         self.strategy_names: List[str] = []
         self.model_path = Path(model_path) if model_path else None
         
@@ -71,9 +192,11 @@ class AIStrategySelector:
         - Last-Prognose (nächste 6h)
         - Tageszeit, Wochentag
         - Aktuelle Strategie-Performance
-        """
-        now = datetime.now(timezone.utc)
         
+        Returns:
+            Feature-Matrix (1, N_FEATURES). Der Puffer wird beim nächsten Aufruf
+            überschrieben - wer die Werte behalten will, muss kopieren.
+        """
         # Systemzustand (normalisiert)
         soc = state.get('soc', 50.0) / 100.0
         soh = state.get('soh', 100.0) / 100.0
@@ -89,10 +212,8 @@ class AIStrategySelector:
         load_6h_avg = forecast.get('load_6h_avg', 0.0) / 100.0  # Normalisiert
         price_6h_avg = forecast.get('price_6h_avg', 0.0) / 100.0  # Normalisiert
         
-        # Zeit-Features
-        hour = now.hour / 24.0  # 0-1
-        weekday = now.weekday() / 7.0  # 0-1
-        is_weekend = 1.0 if now.weekday() >= 5 else 0.0
+        # Zeit-Features (pro Minute gecacht)
+        hour, weekday, is_weekend = self._time_features()
         
         # Aktuelle Strategie-Performance
         current_strategy_score = state.get('current_strategy_score', 0.0)
@@ -103,7 +224,8 @@ class AIStrategySelector:
         p_load = state.get('p_load', 0.0) / 100.0
         p_grid = state.get('p_grid', 0.0) / 100.0
         
-        features = np.array([
+        features = self._feat_buf
+        features[0] = (
             soc,
             soh,
             temp_c,
@@ -121,15 +243,97 @@ class AIStrategySelector:
             p_pv,
             p_load,
             p_grid
-        ])
+        )
         
-        return features.reshape(1, -1)
+        return features
+    
+    def extract_features_columns(self, columns: Dict[str, Any]) -> np.ndarray:
+        """
+        Extrahiert Features aus spaltenweisen Trainingsdaten (Dict von Arrays)
+        
+        Gleiche Normierung wie extract_features; die Spalten heißen wie
+        FEATURE_NAMES und enthalten Rohwerte. Fehlende Spalten erhalten den
+        Default-Wert, die Zeit-Features den aktuellen Zeitpunkt.
+        
+        Args:
+            columns: Dict Feature-Name -> Array/Liste, plus 'best_strategy'
+            
+        Returns:
+            Feature-Matrix (len(columns['best_strategy']), N_FEATURES), float32
+        """
+        n = len(columns['best_strategy'])
+        X = np.empty((n, N_FEATURES), dtype=np.float32)
+        
+        for col, source in enumerate(_FEATURE_SOURCES):
+            if source is None:
+                continue
+            _, key, default, divisor = source
+            values = columns.get(key)
+            if values is None:
+                X[:, col] = default / divisor
+            else:
+                X[:, col] = np.asarray(values, dtype=np.float64) / divisor
+        
+        X[:, 9:12] = self._time_features()
+        return X
+    
+    @staticmethod
+    def _new_model() -> 'RandomForestClassifier':
+        """Neues, untrainiertes Modell (warm_start für schrittweises Hinzufügen von Bäumen)"""
+        return RandomForestClassifier(
+            n_estimators=TREE_COUNT_STEPS[0],
+            max_depth=10,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            warm_start=True,
+            oob_score=True,
+            random_state=42,
+            n_jobs=-1
+        )
+    
+    def _fit_forest(self, X_train: np.ndarray, y_train: List[int]):
+        """
+        Trainiert den Random Forest mit so wenigen Bäumen wie nötig.
+        
+        Die Baumanzahl wird entlang TREE_COUNT_STEPS erhöht (warm_start, bestehende
+        Bäume bleiben erhalten) und gestoppt, sobald der OOB-Score um weniger als
+        MIN_OOB_GAIN steigt. Weniger Bäume = proportional schnellere Vorhersage.
+        """
+        self.model = self._new_model()
+        prev_oob = None
+        with warnings.catch_warnings():
+            # Bei wenigen Bäumen haben einzelne Samples noch keinen OOB-Score
+            warnings.simplefilter('ignore', UserWarning)
+            for n_trees in TREE_COUNT_STEPS:
+                self.model.set_params(n_estimators=n_trees)
+                self.model.fit(X_train, y_train)
+                oob = self.model.oob_score_
+                if prev_oob is not None and oob - prev_oob < MIN_OOB_GAIN:
+                    break
+                prev_oob = oob
+        logger.info(f"Random forest: {self.model.n_estimators} trees (OOB score {oob:.3f})")
+    
+    def _time_features(self) -> tuple:
+        """Zeit-Features (UTC), neu berechnet nur beim Minutenwechsel"""
+        t = time.time()
+        cache = self._time_cache
+        if t < cache[0]:
+            return cache[1:]
+        
+        now = datetime.fromtimestamp(t, timezone.utc)
+        weekday_num = now.weekday()
+        hour = now.hour / 24.0  # 0-1
+        weekday = weekday_num / 7.0  # 0-1
+        is_weekend = 1.0 if weekday_num >= 5 else 0.0
+        self._time_cache = (t - (t % 60.0) + 60.0, hour, weekday, is_weekend)
+        return hour, weekday, is_weekend
     
     def select_strategy(self,
                        state: Dict[str, Any],
                        forecast: Dict[str, Any],
                        market_data: Dict[str, Any],
-                       strategy_scores: Dict[str, float]) -> str:
+                       strategy_scores: Dict[str, float],
+                       feature_vector: Optional[np.ndarray] = None) -> str:
         """
         Wählt beste Strategie basierend auf ML-Modell
         
@@ -138,6 +342,8 @@ class AIStrategySelector:
             forecast: Prognosedaten
             market_data: Marktdaten (Preise, Trends)
             strategy_scores: Scores aller verfügbaren Strategien
+            feature_vector: Vorab berechnete Features (build_feature_vector);
+                ersetzt extract_features, die Zeit-Features werden ergänzt
             
         Returns:
             Name der ausgewählten Strategie
@@ -145,7 +351,7 @@ class AIStrategySelector:
         if not self.is_trained or not self.model:
             # Fallback: Beste Score-Strategie
             if strategy_scores:
-                best_strategy = max(strategy_scores, key=strategy_scores.get)
+                best_strategy = self._best_score_strategy(strategy_scores)
                 logger.debug(f"AI not trained, using best score strategy: {best_strategy}")
                 return best_strategy
             return 'arbitrage'  # Default
@@ -154,43 +360,293 @@ class AIStrategySelector:
             logger.warning("No strategy scores provided, using arbitrage")
             return 'arbitrage'
         
+        # Eindeutiger Favorit: ML-Auswertung lohnt sich nicht
+        dominant = self._dominant_strategy(strategy_scores)
+        if dominant is not None:
+            logger.debug(f"Dominant score strategy {dominant}, skipping AI prediction")
+            return dominant
+        
         # Extrahiere Features
-        features = self.extract_features(state, forecast, market_data)
+        if feature_vector is not None:
+            features = self._feat_buf
+            features[0] = feature_vector
+            features[0, 9:12] = self._time_features()
+        else:
+            features = self.extract_features(state, forecast, market_data)
+        
+        # Unveränderte Features (exakt) -> letzte Entscheidung ohne Skalierung/Vorhersage
+        strategy_names = self._strategy_order(strategy_scores)
+        row = features[0]
+        decision_key = (xxhash.xxh3_64_intdigest(row) if XXHASH_AVAILABLE else hash(row.tobytes()),
+                        strategy_names)
+        last = self._last_decision
+        if last is not None and last[0] == decision_key:
+            self._record_decision(row, last[1], last[2])
+            return last[2]
         
         # Skaliere Features
-        try:
-            features_scaled = self.scaler.transform(features)
-        except:
-            # Falls Scaler noch nicht trainiert, verwende unskalierte Features
-            features_scaled = features
+        features_scaled = self._scale_features(features)
         
         # Vorhersage
         try:
-            predicted_strategy_idx = self.model.predict(features_scaled)[0]
-            strategy_names = list(strategy_scores.keys())
+            predicted_strategy_idx = self._predict_cached(features_scaled)
             
             if predicted_strategy_idx < len(strategy_names):
                 predicted_strategy = strategy_names[predicted_strategy_idx]
                 
-                # Log Decision
-                self.decision_history.append({
-                    'timestamp': datetime.now(timezone.utc).isoformat(),
-                    'predicted_strategy': predicted_strategy,
-                    'strategy_scores': strategy_scores,
-                    'features': features[0].tolist()
-                })
+                self._record_decision(row, predicted_strategy_idx, predicted_strategy)
+                self._last_decision = (decision_key, predicted_strategy_idx, predicted_strategy)
                 
                 logger.debug(f"AI selected strategy: {predicted_strategy} (idx: {predicted_strategy_idx})")
                 return predicted_strategy
             else:
                 logger.warning(f"Predicted index {predicted_strategy_idx} out of range, using best score")
-                return max(strategy_scores, key=strategy_scores.get)
+                return self._best_score_strategy(strategy_scores)
         except Exception as e:
             logger.error(f"Error in AI strategy prediction: {e}", exc_info=True)
             # Fallback zu best score
-            return max(strategy_scores, key=strategy_scores.get)
+            return self._best_score_strategy(strategy_scores)
     
-    def train(self, historical_data: List[Dict[str, Any]]):
+    def select_strategy_batch(self,
+                              states: List[Dict[str, Any]],
+                              forecasts: List[Dict[str, Any]],
+                              markets: List[Dict[str, Any]],
+                              score_lists: List[Dict[str, float]]) -> List[str]:
+        """
+        Wählt Strategien für mehrere Anlagen mit einer einzigen Modell-Auswertung
+        
+        Für Flotten mit vielen BESS wird der feste Overhead der 100 Bäume auf
+        alle Anlagen verteilt (ein transform-/predict-Aufruf für den Batch).
+        
+        Args:
+            states, forecasts, markets, score_lists: Je Anlage ein Eintrag
+                (gleiche Bedeutung wie bei select_strategy)
+            
+        Returns:
+            Liste der ausgewählten Strategien (Reihenfolge wie Eingabe)
+        """
+        batch_size = len(states)
+        if not self.is_trained or not self.model:
+            return [
+                self._best_score_strategy(scores) if scores else 'arbitrage'
+                for scores in score_lists
+            ]
+        
+        features = np.empty((batch_size, N_FEATURES), dtype=np.float32)
+        for i in range(batch_size):
+            features[i] = self.extract_features(states[i], forecasts[i], markets[i])[0]
+        
+        try:
+            predicted = self._predict_batch(self._scale_features(features))
+        except Exception as e:
+            logger.error(f"Error in AI batch prediction: {e}", exc_info=True)
+            predicted = None
+        
+        selected: List[str] = []
+        for i, scores in enumerate(score_lists):
+            if not scores:
+                selected.append('arbitrage')
+                continue
+            names = tuple(scores)
+            idx = -1 if predicted is None else int(predicted[i])
+            if 0 <= idx < len(names):
+                self._record_decision(features[i], idx, names[idx])
+                selected.append(names[idx])
+            else:
+                selected.append(self._best_score_strategy(scores))
+        return selected
+    
+    def _scale_features(self, features: np.ndarray) -> np.ndarray:
+        """Skaliert Features (entfällt, wenn der Scaler in die Bäume gefaltet ist)"""
+        if self._scaler_folded:
+            return features
+        try:
+            return self.scaler.transform(features)
+        except:
+            # Falls Scaler noch nicht trainiert, verwende unskalierte Features
+            return features
+    
+    def _record_decision(self, features_row: np.ndarray, idx: int, strategy: str):
+        """Log Decision (Ringpuffer, keine Allokation pro Zyklus)"""
+        slot = self._hist_pos % HISTORY_CAPACITY
+        self._hist_feat[slot] = features_row
+        self._hist_idx[slot] = idx
+        self._hist_strategy[slot] = strategy
+        self._hist_ts[slot] = time.time()
+        self._hist_pos += 1
+    
+    def _strategy_order(self, strategy_scores: Dict[str, float]) -> tuple:
+        """Gecachte Strategie-Reihenfolge; wird nur bei geänderten Keys neu aufgebaut"""
+        names = self._score_names
+        if len(names) != len(strategy_scores) or not all(name in strategy_scores for name in names):
+            names = self._score_names = tuple(strategy_scores)
+        return names
+    
+    def _best_score_strategy(self, strategy_scores: Dict[str, float]) -> str:
+        """Strategie mit höchstem Score (argmax über die gecachte Reihenfolge)"""
+        names = self._strategy_order(strategy_scores)
+        values = np.fromiter((strategy_scores[name] for name in names), dtype=np.float64, count=len(names))
+        return names[int(values.argmax())]
+    
+    def _dominant_strategy(self, strategy_scores: Dict[str, float]) -> Optional[str]:
+        """Beste Strategie, falls sie den zweitbesten Score um dominance_margin übertrifft"""
+        names = self._strategy_order(strategy_scores)
+        if len(names) < 2:
+            return names[0]
+        
+        values = np.fromiter((strategy_scores[name] for name in names), dtype=np.float64, count=len(names))
+        best = int(values.argmax())
+        top = values[best]
+        values[best] = -np.inf
+        second = values.max()
+        if top - second > self.dominance_margin * abs(second):
+            return names[best]
+        return None
+    
+    def export_history(self):
+        """
+        Exportiert die letzten Entscheidungen (max. HISTORY_CAPACITY) als DataFrame
+        
+        Returns:
+            pandas.DataFrame mit timestamp, predicted_strategy, predicted_idx
+            und einer Spalte je Feature (chronologisch sortiert)
+        """
+        import pandas as pd
+        
+        count = min(self._hist_pos, HISTORY_CAPACITY)
+        order = (np.arange(self._hist_pos - count, self._hist_pos) % HISTORY_CAPACITY)
+        
+        history = pd.DataFrame(self._hist_feat[order], columns=FEATURE_NAMES)
+        history.insert(0, 'predicted_idx', self._hist_idx[order])
+        history.insert(0, 'predicted_strategy', self._hist_strategy[order])
+        history.insert(0, 'timestamp', pd.to_datetime(self._hist_ts[order], unit='s', utc=True))
+        return history
+    
+    def _predict_cached(self, features_scaled: np.ndarray) -> int:
+        """
+        Modell-Vorhersage mit LRU-Cache auf dem exakten Feature-Vektor.
+        
+        Der Schlüssel sind die Bytes des Vektors (keine Quantisierung), damit
+        der Cache nie die Vorhersage für eine andere Eingabe zurückgibt.
+        """
+        key = features_scaled[0].tobytes()
+        cache = self._predict_cache
+        idx = cache.get(key)
+        if idx is not None:
+            cache.move_to_end(key)
+            return idx
+        
+        idx = int(self._predict_batch(features_scaled)[0])
+        cache[key] = idx
+        if len(cache) > PREDICT_CACHE_SIZE:
+            cache.popitem(last=False)
+        return idx
+    
+    def _fold_scaler(self):
+        """
+        Faltet StandardScaler in die Split-Schwellwerte aller Bäume.
+        
+        Ein Baum vergleicht (x - mean) / scale <= t, was äquivalent zu
+        x <= t * scale + mean ist. Danach arbeitet das Modell direkt auf
+        unskalierten Features und scaler.transform entfällt bei der Inferenz.
+        """
+        mean = getattr(self.scaler, 'mean_', None)
+        scale = getattr(self.scaler, 'scale_', None)
+        if mean is None or scale is None:
+            return
+        
+        for estimator in self.model.estimators_:
+            tree = estimator.tree_
+            feature = tree.feature
+            threshold = tree.threshold  # View auf die Knotendaten
+            split = feature >= 0
+            f = feature[split]
+            threshold[split] = threshold[split] * scale[f] + mean[f]
+        
+        self._scaler_folded = True
+    
+    def _predict_batch(self, features_scaled: np.ndarray) -> np.ndarray:
+        """Modell-Vorhersage für alle Zeilen (ONNX Runtime falls verfügbar)"""
+        if self._onnx_session is not None:
+            return self._onnx_session.run(
+                [self._onnx_label], {self._onnx_input: features_scaled.astype(np.float32, copy=False)}
+            )[0]
+        
+        if len(features_scaled) < BATCH_PARALLEL_MIN:
+            return self.model.predict(features_scaled)
+        
+        # Thread-Pool lohnt sich nur für größere Batches
+        self.model.set_params(n_jobs=-1)
+        try:
+            return self.model.predict(features_scaled)
+        finally:
+            self.model.set_params(n_jobs=1)
+    
+    def _compile_predictor(self, onnx_model: Optional[bytes] = None):
+        """
+        Erstellt kompilierten ONNX-Runtime-Prädiktor für das trainierte Modell.
+        
+        Ohne onnxruntime/skl2onnx (oder bei Konvertierungsfehlern) bleibt
+        die Vorhersage bei scikit-learn.
+        """
+        self._onnx_model = None
+        self._onnx_session = None
+        self._onnx_input = None
+        self._onnx_label = None
+        
+        if not ONNX_AVAILABLE or self.model is None:
+            return
+        
+        try:
+            if onnx_model is None:
+                onnx_model = convert_sklearn(
+                    self.model,
+                    initial_types=[('features', FloatTensorType([None, N_FEATURES]))],
+                    options={id(self.model): {'zipmap': False}}
+                ).SerializeToString()
+            
+            session = ort.InferenceSession(onnx_model, providers=['CPUExecutionProvider'])
+            self._onnx_input = session.get_inputs()[0].name
+            self._onnx_label = session.get_outputs()[0].name
+            self._onnx_session = session
+            self._onnx_model = onnx_model
+            logger.info("AI Strategy Selector: ONNX Runtime predictor active")
+        except Exception as e:
+            logger.warning(f"ONNX conversion failed, using scikit-learn predict: {e}")
+    
+    @staticmethod
+    def _records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Training-Records (Liste von Dicts) in Spalten umwandeln; ungültige Werte werden NaN"""
+        def as_float(value) -> float:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return np.nan
+        
+        n = len(records)
+        columns: Dict[str, Any] = {'best_strategy': [record.get('best_strategy') for record in records]}
+        for source in _FEATURE_SOURCES:
+            if source is None:
+                continue
+            section, key, default, _ = source
+            columns[key] = np.fromiter(
+                (as_float((record.get(section) or {}).get(key, default)) for record in records),
+                dtype=np.float64,
+                count=n
+            )
+        return columns
+    
+    def _columns_training_set(self, columns: Dict[str, Any]) -> tuple:
+        """Feature-Matrix und Labels aus spaltenweisen Trainingsdaten"""
+        labels = list(columns.get('best_strategy', []))
+        X = self.extract_features_columns({**columns, 'best_strategy': labels})
+        
+        # Zeilen ohne Strategie oder mit ungültigen Werten überspringen
+        valid = np.fromiter((bool(label) for label in labels), dtype=bool, count=len(labels))
+        valid &= ~np.isnan(X).any(axis=1)
+        return X[valid], [label for label, ok in zip(labels, valid) if ok]
+    
+    def train(self, historical_data: Union[List[Dict[str, Any]], Dict[str, Any]]):
         """
         Trainiert Modell mit historischen Daten:
         - Features: Systemzustand, Marktdaten, Prognosen
@@ -203,6 +659,7 @@ class AIStrategySelector:
                 - 'market': Marktdaten
                 - 'best_strategy': Name der besten Strategie
                 - 'actual_profit': Tatsächlicher Gewinn (optional)
+                oder spaltenweise ein Dict von Arrays (siehe extract_features_columns)
         """
         if not SKLEARN_AVAILABLE:
             logger.error("Cannot train: scikit-learn not available")
@@ -212,29 +669,11 @@ class AIStrategySelector:
             logger.warning("No historical data provided for training")
             return
         
-        X = []
-        y = []
-        strategy_names_set = set()
-        
-        for record in historical_data:
-            try:
-                features = self.extract_features(
-                    record.get('state', {}),
-                    record.get('forecast', {}),
-                    record.get('market', {})
-                )
-                X.append(features[0])
-                
-                best_strategy = record.get('best_strategy')
-                if best_strategy:
-                    strategy_names_set.add(best_strategy)
-                    y.append(best_strategy)
-                else:
-                    # Skip records without best strategy
-                    continue
-            except Exception as e:
-                logger.error(f"Error processing training record: {e}")
-                continue
+        # Ein Extraktionspfad: Records werden hier in Spalten umgewandelt
+        if not isinstance(historical_data, dict):
+            historical_data = self._records_to_columns(historical_data)
+        X, y = self._columns_training_set(historical_data)
+        strategy_names_set = set(y)
         
         if len(X) < 100:  # Mindestens 100 Datenpunkte
             logger.warning(f"Insufficient training data: {len(X)} samples (need at least 100)")
@@ -269,12 +708,20 @@ class AIStrategySelector:
         
         # Trainiere Modell
         try:
-            self.model.fit(X_train, y_train)
+            self._scaler_folded = False
+            self._fit_forest(X_train, y_train)
             
             # Evaluierung
             train_score = self.model.score(X_train, y_train)
             test_score = self.model.score(X_test, y_test)
             
+            self._fold_scaler()
+            # Einzelvorhersagen ohne Thread-Pool-Overhead
+            self.model.set_params(n_jobs=1)
+            self._predict_cache.clear()
+            self._last_decision = None
+            self._compile_predictor()
+            
             self.is_trained = True
             
             logger.info(f"AI Strategy Selector trained on {len(X)} samples")
@@ -300,11 +747,13 @@ class AIStrategySelector:
                 'model': self.model,
                 'scaler': self.scaler,
                 'strategy_names': self.strategy_names,
+                'scaler_folded': self._scaler_folded,
+                'onnx_model': self._onnx_model,
                 'trained_at': datetime.now(timezone.utc).isoformat()
             }
             
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
+            # Unkomprimiert, damit NumPy-Arrays beim Laden per mmap eingeblendet werden können
+            joblib.dump(model_data, self.model_path, compress=0, protocol=4)
             
             logger.info(f"AI model saved to {self.model_path}")
         except Exception as e:
@@ -316,12 +765,21 @@ class AIStrategySelector:
             return
         
         try:
-            with open(self.model_path, 'rb') as f:
-                model_data = pickle.load(f)
+            # joblib liest auch ältere, mit pickle gespeicherte Modelle
+            model_data = joblib.load(self.model_path, mmap_mode='r')
             
             self.model = model_data.get('model')
             self.scaler = model_data.get('scaler')
             self.strategy_names = model_data.get('strategy_names', [])
+            self._scaler_folded = bool(model_data.get('scaler_folded', False))
+            if not self._scaler_folded:
+                # Ältere Modelle: Scaler nachträglich falten, ONNX neu konvertieren
+                self._fold_scaler()
+                model_data['onnx_model'] = None
+            self.model.set_params(n_jobs=1)
+            self._predict_cache.clear()
+            self._last_decision = None
+            self._compile_predictor(model_data.get('onnx_model'))
             self.is_trained = True
             
             logger.info(f"AI model loaded from {self.model_path}")
@@ -334,13 +792,6 @@ class AIStrategySelector:
         if not self.is_trained or not self.model:
             return {}
         
-        feature_names = [
-            'soc', 'soh', 'temp_c', 'price_trend', 'price_volatility',
-            'current_price', 'pv_6h_avg', 'load_6h_avg', 'price_6h_avg',
-            'hour', 'weekday', 'is_weekend', 'current_strategy_score',
-            'p_bess', 'p_pv', 'p_load', 'p_grid'
-        ]
-        
         importances = self.model.feature_importances_
-        return dict(zip(feature_names, importances))
+        return dict(zip(FEATURE_NAMES, importances))
 
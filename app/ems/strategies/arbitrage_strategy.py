@@ -8,11 +8,16 @@ from datetime import datetime
 import numpy as np
 
 from .base_strategy import BaseStrategy, StrategyResult
+from .forecast_arrays import ForecastArrays, forecast_arrays
 from ems.optimizers.lp_optimizer import LinearProgrammingOptimizer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Konfidenz nach (Solver, Status) bzw. Solver (exakte LP-Solver)
+_BASE_CONFIDENCE = {('cvxpy', 'optimal'): 1.0, ('highs', 'optimal'): 1.0}
+_SOLVER_CONFIDENCE = {'cvxpy': 0.85, 'highs': 0.85}
+
 
 class ArbitrageStrategy(BaseStrategy):
     """
@@ -45,18 +50,16 @@ class ArbitrageStrategy(BaseStrategy):
         if not self.validate_forecast_data(forecast_data):
             return 0.0
         
-        prices = forecast_data.get('prices', [])
+        prices = forecast_arrays(forecast_data, 'prices')
         
         if len(prices) < 4:  # Mindestens 4 Stunden für sinnvolle Arbitrage
             return 0.1
         
-        # Extrahiere Preiswerte
-        price_values = [p[1] for p in prices]
+        # Preiswerte (ein Puffer für alle Reduktionen)
+        price_values = prices.values
         
         # Berechne Preisvolatilität
-        price_min = min(price_values)
-        price_max = max(price_values)
-        price_spread = price_max - price_min
+        price_spread = float(np.ptp(price_values))
         
         # Normalisiere Spread (0-100 EUR/MWh -> 0-1)
         spread_score = min(price_spread / 100.0, 1.0)
@@ -66,13 +69,13 @@ class ArbitrageStrategy(BaseStrategy):
             spread_score *= 0.5
         
         # Berücksichtige auch Standardabweichung (Volatilität)
-        price_std = np.std(price_values)
+        price_std = price_values.std()
         volatility_score = min(price_std / 30.0, 1.0)
         
         # Kombinierter Score
         score = (spread_score * 0.7 + volatility_score * 0.3)
         
-        self.logger.info(f"Arbitrage evaluation: spread={price_spread:.1f} EUR/MWh, score={score:.3f}")
+        self.logger.info("Arbitrage evaluation: spread=%.1f EUR/MWh, score=%.3f", price_spread, score)
         
         return score
     
@@ -97,7 +100,44 @@ class ArbitrageStrategy(BaseStrategy):
             constraints=constraints
         )
         
-        # Konvertiere zu StrategyResult
+        return self._to_strategy_result(opt_result, prices)
+    
+    def batch_optimize(self,
+                       states: List[Dict[str, Any]],
+                       forecasts: List[Dict[str, Any]],
+                       constraints: Optional[Dict[str, Any]] = None) -> List[StrategyResult]:
+        """
+        Berechnet Arbitrage-Fahrpläne für mehrere Anlagen/Perioden gemeinsam
+        
+        Alle gültigen Instanzen werden in einem blockdiagonalen LP gelöst
+        (siehe LinearProgrammingOptimizer.optimize_arbitrage_batch).
+        
+        Returns:
+            Liste von StrategyResult (Reihenfolge wie Eingabe)
+        """
+        results: List[Optional[StrategyResult]] = [None] * len(states)
+        batch_idx = []
+        
+        for i, forecast_data in enumerate(forecasts):
+            if self.validate_forecast_data(forecast_data):
+                batch_idx.append(i)
+            else:
+                results[i] = self._create_empty_result()
+        
+        price_series = [forecasts[i].get('prices', []) for i in batch_idx]
+        opt_results = self.optimizer.optimize_arbitrage_batch(
+            price_series,
+            [states[i].get('soc', 50.0) for i in batch_idx],
+            constraints
+        )
+        
+        for i, prices, opt_result in zip(batch_idx, price_series, opt_results):
+            results[i] = self._to_strategy_result(opt_result, prices)
+        
+        return results
+    
+    def _to_strategy_result(self, opt_result: Dict[str, Any], prices: List[tuple]) -> StrategyResult:
+        """Konvertiert Optimierungsergebnis zu StrategyResult"""
         result = StrategyResult(
             schedule=opt_result['schedule'],
             expected_revenue=opt_result['expected_revenue'],
@@ -116,8 +156,8 @@ class ArbitrageStrategy(BaseStrategy):
             }
         )
         
-        self.logger.info(f"Arbitrage optimization: profit={result.expected_profit:.2f} EUR, "
-                        f"cycles={result.metadata['cycles']:.3f}")
+        self.logger.info("Arbitrage optimization: profit=%.2f EUR, cycles=%.3f",
+                         result.expected_profit, result.metadata['cycles'])
         
         return result
     
@@ -126,24 +166,21 @@ class ArbitrageStrategy(BaseStrategy):
         Berechnet Konfidenz-Score basierend auf Optimierungsergebnis
         """
         
-        # Basis-Konfidenz
-        if opt_result['solver'] == 'cvxpy' and opt_result['optimization_status'] == 'optimal':
-            base_confidence = 1.0
-        elif opt_result['solver'] == 'cvxpy':
-            base_confidence = 0.85
-        else:
-            base_confidence = 0.7  # Heuristik
+        # Basis-Konfidenz: exakter Solver optimal 1.0, sonst 0.85, Heuristik 0.7
+        solver = opt_result['solver']
+        base_confidence = _BASE_CONFIDENCE.get(
+            (solver, opt_result['optimization_status']),
+            _SOLVER_CONFIDENCE.get(solver, 0.7)
+        )
         
         # Reduziere Konfidenz wenn Gewinn gering
-        if opt_result['expected_profit'] < self.min_profit_threshold:
-            base_confidence *= 0.6
-        
-        return base_confidence
+        return base_confidence * (0.6 if opt_result['expected_profit'] < self.min_profit_threshold else 1.0)
     
     def _calculate_price_spread(self, prices: List[tuple]) -> float:
         """Berechnet Preisspanne"""
-        price_values = [p[1] for p in prices]
-        return max(price_values) - min(price_values)
+        if not isinstance(prices, ForecastArrays):
+            prices = ForecastArrays.from_pairs(prices)
+        return float(np.ptp(prices.values))
     
     def _create_empty_result(self) -> StrategyResult:
         """Erstellt leeres Ergebnis bei Fehler"""
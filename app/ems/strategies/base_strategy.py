@@ -3,18 +3,34 @@ Phoenyra EMS - Base Strategy
 Abstrakte Basisklasse für alle EMS-Strategien
 """
 
+import asyncio
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import date, datetime, time
 import logging
 
+from .forecast_arrays import forecast_arrays
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Anzahl gemerkter evaluate()-Ergebnisse pro Strategie
+EVALUATE_CACHE_SIZE = 128
+
+# Zeittypen mit isoformat() (datetime ist Unterklasse von date)
+_ISO_TYPES = (date, time)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class StrategyResult:
-    """Ergebnis einer Strategie-Berechnung"""
+    """Ergebnis einer Strategie-Berechnung (unveränderlich, Anpassungen per dataclasses.replace)"""
     
     # Geplante Setpoints (Liste von (timestamp, power_kw))
     schedule: List[tuple[datetime, float]] = field(default_factory=list)
@@ -39,9 +55,9 @@ class StrategyResult:
         for key, value in self.metadata.items():
             if key == 'soc_schedule' and isinstance(value, list):
                 # SoC Schedule: Liste von (datetime, float) Tupeln
-                serialized_metadata[key] = [(ts.isoformat() if hasattr(ts, 'isoformat') else ts, val) 
+                serialized_metadata[key] = [(ts.isoformat() if isinstance(ts, _ISO_TYPES) else ts, val)
                                            for ts, val in value]
-            elif hasattr(value, 'isoformat'):
+            elif isinstance(value, _ISO_TYPES):
                 # Einzelnes datetime-Objekt
                 serialized_metadata[key] = value.isoformat()
             else:
@@ -72,6 +88,10 @@ class BaseStrategy(ABC):
         self.config = config or {}
         self.logger = logging.getLogger(f"{__name__}.{name}")
         
+        # evaluate()-Cache: Fingerprint der Prognose -> Score (LRU)
+        self._evaluate_cache: OrderedDict = OrderedDict()
+        self._config_version = 0
+        
     @abstractmethod
     def evaluate(self, 
                  current_state: Dict[str, Any],
@@ -106,17 +126,79 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def evaluate_cached(self,
+                        current_state: Dict[str, Any],
+                        forecast_data: Dict[str, Any]) -> float:
+        """
+        evaluate() mit LRU-Cache auf dem Fingerprint der benötigten Prognosereihen.
+        
+        Im MPC-Takt wird evaluate() meist mit unveränderter Prognose aufgerufen;
+        ein Treffer ersetzt die Neuberechnung durch einen Dict-Lookup.
+        """
+        key = self._forecast_fingerprint(forecast_data)
+        if key is None:
+            return self.evaluate(current_state, forecast_data)
+        
+        cache = self._evaluate_cache
+        score = cache.get(key)
+        if score is not None:
+            cache.move_to_end(key)
+            return score
+        
+        score = self.evaluate(current_state, forecast_data)
+        cache[key] = score
+        if len(cache) > EVALUATE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return score
+    
+    def invalidate_cache(self):
+        """Verwirft gemerkte Ergebnisse (nach Änderung von self.config aufrufen)"""
+        self._config_version += 1
+        self._evaluate_cache.clear()
+    
+    def _forecast_fingerprint(self, forecast_data: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Fingerprint der Werte aller benötigten Prognosereihen (ohne Zeitstempel).
+        
+        Returns:
+            Hashbares Tupel oder None, wenn die Reihen nicht hashbar sind
+        """
+        digests = [self._config_version]
+        for key in self.get_required_forecast_keys():
+            if not forecast_data.get(key):
+                digests.append(None)
+                continue
+            try:
+                data = forecast_arrays(forecast_data, key).values.tobytes()
+            except (TypeError, ValueError, IndexError):
+                return None
+            digests.append(xxhash.xxh64_intdigest(data) if XXHASH_AVAILABLE else hash(data))
+        return tuple(digests)
+    
+    async def evaluate_async(self,
+                             current_state: Dict[str, Any],
+                             forecast_data: Dict[str, Any]) -> float:
+        """evaluate() in einem Worker-Thread (für nebenläufige Auswertung mit asyncio.gather)"""
+        return await asyncio.to_thread(self.evaluate_cached, current_state, forecast_data)
+    
+    async def optimize_async(self,
+                             current_state: Dict[str, Any],
+                             forecast_data: Dict[str, Any],
+                             constraints: Optional[Dict[str, Any]] = None) -> StrategyResult:
+        """optimize() in einem Worker-Thread (Solver/NumPy geben den GIL frei)"""
+        return await asyncio.to_thread(self.optimize, current_state, forecast_data, constraints)
+    
     def validate_forecast_data(self, forecast_data: Dict[str, Any]) -> bool:
         """Validiert ob alle benötigten Prognosedaten vorhanden sind"""
         required_keys = self.get_required_forecast_keys()
         
         for key in required_keys:
             if key not in forecast_data:
-                self.logger.warning(f"Missing forecast data: {key}")
+                self.logger.warning("Missing forecast data: %s", key)
                 return False
             
             if not forecast_data[key]:
-                self.logger.warning(f"Empty forecast data: {key}")
+                self.logger.warning("Empty forecast data: %s", key)
                 return False
                 
         return True
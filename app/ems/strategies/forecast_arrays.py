@@ -0,0 +1,203 @@
+"""
+Phoenyra EMS - Forecast Arrays
+Spaltenweise Sicht (SoA) auf Prognosereihen für die Strategien
+"""
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Leistungsreihen (kW, Genauigkeit ~0.1 kW) als float32: halbe Bandbreite in den
+# Kerneln, Akkumulatoren bleiben float64. Preise bleiben float64.
+FORECAST_DTYPES = {'pv': np.float32, 'load': np.float32}
+
+
+@dataclass(slots=True)
+class ForecastArrays:
+    """
+    Prognosereihe als getrennte Spalten statt Liste von (timestamp, value)-Tupeln
+    
+    Die Werte liegen in einem zusammenhängenden float64-Puffer und können
+    direkt an NumPy/Numba übergeben werden; die Zeitstempel bleiben Python-
+    Objekte, da sie nur für den Fahrplan gebraucht werden.
+    """
+    
+    timestamps: List[Any] = field(default_factory=list)
+    values: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    
+    @classmethod
+    def from_pairs(cls, pairs, dtype=np.float64) -> 'ForecastArrays':
+        """Erstellt die Spalten aus einer Liste von (timestamp, value)-Tupeln"""
+        n = len(pairs)
+        return cls(
+            timestamps=[p[0] for p in pairs],
+            values=np.fromiter((p[1] for p in pairs), dtype=dtype, count=n)
+        )
+    
+    def __len__(self) -> int:
+        return self.values.shape[0]
+    
+    def unix_seconds(self) -> np.ndarray:
+        """Zeitstempel als Unix-Sekunden (float64)"""
+        return np.fromiter((t.timestamp() for t in self.timestamps), dtype=np.float64,
+                           count=len(self.timestamps))
+
+
+class ForecastBundle(dict):
+    """
+    Prognose-Dict eines Optimierungszyklus mit gemerkten Array-Sichten
+    
+    Verhält sich wie das bisherige forecast_data-Dict; Umwandlungen in
+    ForecastArrays und abgeleitete Reihen (net_load) werden einmal berechnet
+    und von allen Strategien geteilt. Die gemerkten Arrays sind schreibgeschützt.
+    `memo` nimmt weitere pro Zyklus gemerkte Ergebnisse auf (z.B. Strategie-Scores).
+    Schreibzugriffe auf das Dict verwerfen die gemerkten Werte.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._arrays: Dict[str, ForecastArrays] = {}
+        self.memo: Dict[str, Any] = {}
+    
+    @classmethod
+    def wrap(cls, forecast_data: Dict[str, Any]) -> 'ForecastBundle':
+        """Gibt forecast_data als ForecastBundle zurück (ohne Kopie, falls bereits eines)"""
+        if isinstance(forecast_data, cls):
+            return forecast_data
+        return cls(forecast_data)
+    
+    def arrays(self, key: str) -> ForecastArrays:
+        """Prognosereihe `key` als (gemerkte) ForecastArrays"""
+        arrays = self._arrays.get(key)
+        if arrays is None:
+            series = self.get(key) or []
+            if isinstance(series, ForecastArrays):
+                # Fremde Arrays nicht sperren/verändern: eigene Kopie merken
+                arrays = ForecastArrays(list(series.timestamps), series.values.copy())
+            else:
+                arrays = _to_arrays(series, key)
+            arrays.values.flags.writeable = False
+            self._arrays[key] = arrays
+        return arrays
+    
+    @cached_property
+    def net_load(self) -> np.ndarray:
+        """Netto-Last (Load - PV), PV nur bei synchroner Länge"""
+        net = _net_load(self.arrays('load'), self.arrays('pv'))
+        net.flags.writeable = False
+        return net
+    
+    def _invalidate(self):
+        self._arrays.clear()
+        self.memo.clear()
+        self.__dict__.pop('net_load', None)
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._invalidate()
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._invalidate()
+    
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._invalidate()
+    
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._invalidate()
+        return value
+    
+    def popitem(self):
+        item = super().popitem()
+        self._invalidate()
+        return item
+    
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+    
+    def clear(self):
+        super().clear()
+        self._invalidate()
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
+def _to_arrays(series, key: str) -> ForecastArrays:
+    if isinstance(series, ForecastArrays):
+        return series
+    return ForecastArrays.from_pairs(series, FORECAST_DTYPES.get(key, np.float64))
+
+
+def _net_load(load: ForecastArrays, pv: ForecastArrays) -> np.ndarray:
+    # Wie bisher: PV nur bei gleicher Länge wie die Last, sonst PV = 0
+    if len(pv) == len(load):
+        return load.values - pv.values
+    return load.values.copy()
+
+
+def _resampled_net_load(load: ForecastArrays, pv: ForecastArrays) -> np.ndarray:
+    if len(pv) == len(load) and pv.timestamps == load.timestamps:
+        return load.values - pv.values
+    if len(pv) == 0:
+        return load.values.copy()
+    
+    # Abweichende Auflösung (z.B. 15-min PV zu stündlicher Last): linear
+    # interpolieren, außerhalb des PV-Horizonts PV = 0
+    try:
+        pv_resampled = np.interp(load.unix_seconds(), pv.unix_seconds(), pv.values,
+                                 left=0.0, right=0.0)
+    except (AttributeError, TypeError):
+        # Zeitstempel ohne timestamp() (oder naive/aware gemischt): Regel von net_load
+        return _net_load(load, pv)
+    return load.values - pv_resampled
+
+
+def forecast_arrays(forecast_data: Dict[str, Any], key: str) -> ForecastArrays:
+    """
+    Liefert die Prognosereihe `key` als ForecastArrays
+    
+    Das bisherige Format (Liste von Tupeln) wird hier einmalig umgewandelt;
+    bereits umgewandelte Reihen werden unverändert zurückgegeben.
+    """
+    if isinstance(forecast_data, ForecastBundle):
+        return forecast_data.arrays(key)
+    return _to_arrays(forecast_data.get(key) or [], key)
+
+
+def net_load(forecast_data: Dict[str, Any]) -> np.ndarray:
+    """Netto-Last (Load - PV); bei ForecastBundle gemerkt und schreibgeschützt"""
+    if isinstance(forecast_data, ForecastBundle):
+        return forecast_data.net_load
+    return _net_load(forecast_arrays(forecast_data, 'load'), forecast_arrays(forecast_data, 'pv'))
+
+
+def resampled_net_load(forecast_data: Dict[str, Any]) -> np.ndarray:
+    """
+    Netto-Last mit PV linear auf die Last-Zeitstempel interpoliert (PV = 0 außerhalb)
+    
+    Im Gegensatz zu net_load() wird eine PV-Prognose mit anderer Auflösung
+    nicht verworfen. Bei ForecastBundle gemerkt und schreibgeschützt.
+    """
+    memo = forecast_data.memo if isinstance(forecast_data, ForecastBundle) else None
+    if memo is not None:
+        net = memo.get('resampled_net_load')
+        if net is not None:
+            return net
+    
+    net = _resampled_net_load(forecast_arrays(forecast_data, 'load'), forecast_arrays(forecast_data, 'pv'))
+    if memo is not None:
+        net.flags.writeable = False
+        memo['resampled_net_load'] = net
+    return net
+
+
+__all__ = ['ForecastArrays', 'ForecastBundle', 'forecast_arrays', 'net_load', 'resampled_net_load']
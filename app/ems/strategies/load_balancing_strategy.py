@@ -3,16 +3,78 @@ Phoenyra EMS - Load Balancing Strategy
 Glättet Lastschwankungen und optimiert Netzbelastung
 """
 
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import numpy as np
 
 from .base_strategy import BaseStrategy, StrategyResult
+from .forecast_arrays import forecast_arrays, net_load as forecast_net_load, resampled_net_load
+from .load_stats import forecast_load_stats
+from ..jit import njit
 import logging
 
+try:
+    from scipy.ndimage import uniform_filter1d
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True, nogil=True)
+def _load_balancing_sweep(net_load, bess_power_raw, soc0, p_charge_max, p_discharge_max,
+                          soc_min, soc_max, e_capacity):
+    """
+    Sequentieller SoC-Durchlauf des Load Balancing (vereinfacht, 1h Zeitschritt).
+    
+    Returns:
+        (p_bess, soc_trace, balanced_load, energy_charged, energy_discharged)
+    """
+    n = net_load.shape[0]
+    p_bess = np.empty(n)
+    soc_trace = np.empty(n)
+    balanced_load = np.empty(n)
+    soc = soc0
+    energy_charged = 0.0
+    energy_discharged = 0.0
+    
+    for i in range(n):
+        # Limitiere auf max Power
+        p = min(max(bess_power_raw[i], -p_charge_max), p_discharge_max)
+        
+        # Prüfe SoC-Grenzen (Leistung in kW entspricht Energie bei 1h Annahme)
+        if p < 0.0:  # Laden
+            if soc >= soc_max:
+                p = 0.0
+            else:
+                p = max(p, -(soc_max - soc) / 100.0 * e_capacity)
+        elif p > 0.0:  # Entladen
+            if soc <= soc_min:
+                p = 0.0
+            else:
+                p = min(p, (soc - soc_min) / 100.0 * e_capacity)
+        
+        # Update SoC
+        if p < 0.0:
+            energy_charged -= p
+            soc -= (p / e_capacity) * 100.0
+        elif p > 0.0:
+            energy_discharged += p
+            soc -= (p / e_capacity) * 100.0
+        
+        # Clamp SoC
+        soc = min(max(soc, soc_min), soc_max)
+        
+        p_bess[i] = p
+        soc_trace[i] = soc
+        # Resultierende Netzlast nach Balancing
+        balanced_load[i] = net_load[i] - p
+    
+    return p_bess, soc_trace, balanced_load, energy_charged, energy_discharged
+
+
 class LoadBalancingStrategy(BaseStrategy):
     """
     Load Balancing Strategie: Glättet Lastschwankungen
@@ -24,12 +86,24 @@ class LoadBalancingStrategy(BaseStrategy):
     - Optimiert Netzstabilität
     """
     
+    # Standard-Constraints (unveränderlich, je Aufruf nicht neu angelegt)
+    _DEFAULT_CONSTRAINTS = MappingProxyType({
+        'power_discharge_max_kw': 100.0,
+        'power_charge_max_kw': 100.0,
+        'soc_min_percent': 10.0,
+        'soc_max_percent': 90.0,
+        'energy_capacity_kwh': 200.0
+    })
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         super().__init__(name="Load Balancing", config=config)
         
         # Strategie-Parameter
         self.smoothing_window = config.get('smoothing_window', 3) if config else 3
         self.target_load_factor = config.get('target_load_factor', 0.8) if config else 0.8
+        # PV mit abweichender Auflösung auf die Last interpolieren statt verwerfen
+        # (strategies.load_balancing.pv_resample, Standard: aus)
+        self.pv_resample = bool((config or {}).get('load_balancing', {}).get('pv_resample', False))
         
     def evaluate(self, 
                  current_state: Dict[str, Any],
@@ -46,20 +120,13 @@ class LoadBalancingStrategy(BaseStrategy):
         if not self.validate_forecast_data(forecast_data):
             return 0.0
         
-        load_forecast = forecast_data.get('load', [])
+        load_forecast = forecast_arrays(forecast_data, 'load')
         
         if len(load_forecast) < 3:
             return 0.0
         
-        # Extrahiere Lastwerte
-        load_values = np.array([l[1] for l in load_forecast])
-        
-        if len(load_values) < 3:
-            return 0.0
-        
-        # Berechne Volatilität (Standardabweichung)
-        load_std = np.std(load_values)
-        load_mean = np.mean(load_values)
+        # Volatilität und Gradienten (Änderungsraten) in einem Durchlauf, mit Peak Shaving geteilt
+        load_mean, load_std, _, _, avg_gradient, max_gradient = forecast_load_stats(forecast_data)
         
         if load_mean == 0:
             return 0.0
@@ -67,11 +134,6 @@ class LoadBalancingStrategy(BaseStrategy):
         # Variationskoeffizient
         cv = load_std / load_mean
         
-        # Berechne Gradienten (Änderungsraten)
-        gradients = np.abs(np.diff(load_values))
-        avg_gradient = np.mean(gradients)
-        max_gradient = np.max(gradients)
-        
         # Normalisiere Gradienten
         gradient_score = min(avg_gradient / load_mean, 1.0)
         max_gradient_score = min(max_gradient / load_mean, 1.0)
@@ -87,8 +149,8 @@ class LoadBalancingStrategy(BaseStrategy):
             max_gradient_score * 0.3
         )
         
-        self.logger.info(f"Load Balancing evaluation: cv={cv:.2f}, "
-                        f"avg_grad={avg_gradient:.1f}, score={score:.3f}")
+        self.logger.info("Load Balancing evaluation: cv=%.2f, avg_grad=%.1f, score=%.3f",
+                         cv, avg_gradient, score)
         
         return min(score, 1.0)
     
@@ -108,31 +170,25 @@ class LoadBalancingStrategy(BaseStrategy):
         if not self.validate_forecast_data(forecast_data):
             return self._create_empty_result()
         
-        load_forecast = forecast_data.get('load', [])
-        pv_forecast = forecast_data.get('pv', [])
+        load_forecast = forecast_arrays(forecast_data, 'load')
         current_soc = current_state.get('soc', 50.0)
         
-        # Standard Constraints
-        default_constraints = {
-            'power_discharge_max_kw': 100.0,
-            'power_charge_max_kw': 100.0,
-            'soc_min_percent': 10.0,
-            'soc_max_percent': 90.0,
-            'energy_capacity_kwh': 200.0
-        }
-        constr = {**default_constraints, **(constraints or {})}
+        # Standard Constraints (Klassenkonstante, Merge nur bei Overrides)
+        constr = self._DEFAULT_CONSTRAINTS if not constraints else {**self._DEFAULT_CONSTRAINTS, **constraints}
+        p_charge_max = float(constr['power_charge_max_kw'])
+        p_discharge_max = float(constr['power_discharge_max_kw'])
+        soc_min = float(constr['soc_min_percent'])
+        soc_max = float(constr['soc_max_percent'])
+        capacity = float(constr['energy_capacity_kwh'])
         
         # Extrahiere Werte
-        timestamps = [l[0] for l in load_forecast]
-        load_values = np.array([l[1] for l in load_forecast])
+        timestamps = load_forecast.timestamps
         
-        # PV synchronisieren
-        pv_values = np.zeros(len(load_values))
-        if pv_forecast and len(pv_forecast) == len(load_forecast):
-            pv_values = np.array([p[1] for p in pv_forecast])
-        
-        # Netto-Last (Load - PV)
-        net_load = load_values - pv_values
+        # Netto-Last (Load - PV), bei ForecastBundle zwischen Strategien geteilt
+        if self.pv_resample:
+            net_load = resampled_net_load(forecast_data)
+        else:
+            net_load = forecast_net_load(forecast_data)
         
         # Berechne geglättete Ziellast (gleitender Durchschnitt)
         target_load = self._moving_average(net_load, window=self.smoothing_window)
@@ -142,66 +198,23 @@ class LoadBalancingStrategy(BaseStrategy):
         # Negativ = Laden (Last ist niedriger als Ziel)
         bess_power_raw = net_load - target_load
         
-        # Erstelle Fahrplan mit Constraints
-        schedule = []
-        soc_schedule = []
-        soc_current = current_soc
-        
-        energy_charged = 0.0
-        energy_discharged = 0.0
         load_variance_before = np.var(net_load)
         
-        balanced_load = []
-        
-        for i, (ts, p_raw) in enumerate(zip(timestamps, bess_power_raw)):
-            # Limitiere auf max Power
-            p_bess = np.clip(p_raw, 
-                            -constr['power_charge_max_kw'], 
-                            constr['power_discharge_max_kw'])
-            
-            # Prüfe SoC-Grenzen
-            if p_bess < 0:  # Laden
-                # Prüfe ob noch Platz zum Laden
-                if soc_current >= constr['soc_max_percent']:
-                    p_bess = 0
-                else:
-                    # Limitiere um nicht über Max-SoC zu kommen
-                    available_capacity = (constr['soc_max_percent'] - soc_current) / 100.0 * constr['energy_capacity_kwh']
-                    max_charge_power = available_capacity  # kW (1h Annahme)
-                    p_bess = max(p_bess, -max_charge_power)
-            
-            elif p_bess > 0:  # Entladen
-                # Prüfe ob noch genug Energie
-                if soc_current <= constr['soc_min_percent']:
-                    p_bess = 0
-                else:
-                    # Limitiere um nicht unter Min-SoC zu kommen
-                    available_energy = (soc_current - constr['soc_min_percent']) / 100.0 * constr['energy_capacity_kwh']
-                    max_discharge_power = available_energy  # kW (1h Annahme)
-                    p_bess = min(p_bess, max_discharge_power)
-            
-            # Update SoC (vereinfacht, 1h Zeitschritt)
-            if p_bess < 0:  # Laden
-                energy_charged += abs(p_bess)
-                soc_current += (abs(p_bess) / constr['energy_capacity_kwh']) * 100.0
-            elif p_bess > 0:  # Entladen
-                energy_discharged += p_bess
-                soc_current -= (p_bess / constr['energy_capacity_kwh']) * 100.0
-            
-            # Clamp SoC
-            soc_current = np.clip(soc_current, 
-                                 constr['soc_min_percent'], 
-                                 constr['soc_max_percent'])
-            
-            # Resultierende Netzlast nach Balancing
-            balanced = net_load[i] - p_bess
-            balanced_load.append(balanced)
-            
-            schedule.append((ts, float(p_bess)))
-            soc_schedule.append((ts, float(soc_current)))
+        # Erstelle Fahrplan mit Constraints
+        p_bess, soc_trace, balanced_load, energy_charged, energy_discharged = _load_balancing_sweep(
+            net_load,
+            bess_power_raw,
+            float(current_soc),
+            p_charge_max,
+            p_discharge_max,
+            soc_min,
+            soc_max,
+            capacity
+        )
+        schedule = list(zip(timestamps, p_bess.tolist()))
+        soc_schedule = list(zip(timestamps, soc_trace.tolist()))
         
         # Berechne Verbesserung
-        balanced_load = np.array(balanced_load)
         load_variance_after = np.var(balanced_load)
         
         variance_reduction = ((load_variance_before - load_variance_after) / 
@@ -221,7 +234,7 @@ class LoadBalancingStrategy(BaseStrategy):
                 'soc_schedule': soc_schedule,
                 'energy_charged_kwh': float(energy_charged),
                 'energy_discharged_kwh': float(energy_discharged),
-                'cycles': float(energy_discharged / (constr['energy_capacity_kwh'] * 2)),
+                'cycles': float(energy_discharged / (capacity * 2)),
                 'load_variance_before': float(load_variance_before),
                 'load_variance_after': float(load_variance_after),
                 'variance_reduction_percent': float(variance_reduction),
@@ -230,8 +243,8 @@ class LoadBalancingStrategy(BaseStrategy):
             }
         )
         
-        self.logger.info(f"Load Balancing: variance reduction={variance_reduction:.1f}%, "
-                        f"savings={estimated_savings:.2f} EUR")
+        self.logger.info("Load Balancing: variance reduction=%.1f%%, savings=%.2f EUR",
+                         variance_reduction, estimated_savings)
         
         return result
     
@@ -241,15 +254,12 @@ class LoadBalancingStrategy(BaseStrategy):
         if len(data) < window:
             return data
         
-        # Padding am Anfang und Ende
-        padded = np.pad(data, (window//2, window//2), mode='edge')
-        
-        # Gleitender Durchschnitt
-        cumsum = np.cumsum(np.insert(padded, 0, 0))
-        result = (cumsum[window:] - cumsum[:-window]) / window
+        # Fenster [i - window//2, i + window - 1 - window//2], Randwerte fortgesetzt
+        if SCIPY_AVAILABLE:
+            return uniform_filter1d(data.astype(np.float64, copy=False), size=window, mode='nearest')
         
-        # Trimme auf Original-Länge
-        return result[:len(data)]
+        padded = np.pad(data, (window // 2, window - 1 - window // 2), mode='edge')
+        return np.convolve(padded, np.full(window, 1.0 / window), mode='valid')
     
     def _create_empty_result(self) -> StrategyResult:
         return StrategyResult(
@@ -0,0 +1,71 @@
+"""
+Phoenyra EMS - Load Statistics
+Kennzahlen einer Lastreihe in einem Durchlauf (für evaluate() der Strategien)
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+
+from .forecast_arrays import ForecastBundle, forecast_arrays
+from ..jit import njit
+
+
+@njit(cache=True, nogil=True)
+def load_stats(values):
+    """
+    Berechnet Lastkennzahlen in einem einzigen Durchlauf (Welford für die Varianz)
+    
+    Args:
+        values: 1D float64-Array mit mindestens einem Wert
+        
+    Returns:
+        (mean, std, min, max, avg_gradient, max_gradient) - std als Populations-
+        Standardabweichung (wie np.std), Gradienten = |values[i] - values[i-1]|
+    """
+    n = values.shape[0]
+    mean = 0.0
+    m2 = 0.0
+    v_min = values[0]
+    v_max = values[0]
+    grad_sum = 0.0
+    grad_max = 0.0
+    
+    for i in range(n):
+        v = values[i]
+        delta = v - mean
+        mean += delta / (i + 1)
+        m2 += delta * (v - mean)
+        if v < v_min:
+            v_min = v
+        if v > v_max:
+            v_max = v
+        if i > 0:
+            grad = abs(v - values[i - 1])
+            grad_sum += grad
+            if grad > grad_max:
+                grad_max = grad
+    
+    avg_grad = grad_sum / (n - 1) if n > 1 else 0.0
+    return mean, np.sqrt(m2 / n), v_min, v_max, avg_grad, grad_max
+
+
+def forecast_load_stats(forecast_data: Dict[str, Any]) -> tuple:
+    """
+    load_stats() der Lastprognose; bei ForecastBundle einmal pro Zyklus berechnet
+    
+    Peak Shaving und Load Balancing bewerten dieselben Kennzahlen und teilen
+    sich so einen Durchlauf über die Lastreihe. Die Reihe muss mindestens
+    einen Wert enthalten.
+    """
+    memo = forecast_data.memo if isinstance(forecast_data, ForecastBundle) else None
+    if memo is not None:
+        stats = memo.get('load_stats')
+        if stats is not None:
+            return stats
+    
+    # Last liegt als float32 vor (FORECAST_DTYPES); der Kernel rechnet und erwartet float64
+    stats = load_stats(np.asarray(forecast_arrays(forecast_data, 'load').values, dtype=np.float64))
+    if memo is not None:
+        memo['load_stats'] = stats
+    return stats
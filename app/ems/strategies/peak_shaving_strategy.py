@@ -3,16 +3,43 @@ Phoenyra EMS - Peak Shaving Strategy
 Reduziert Lastspitzen durch gezielten Batterieentladung
 """
 
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import numpy as np
 
 from .base_strategy import BaseStrategy, StrategyResult
+from .forecast_arrays import forecast_arrays
+from .load_stats import forecast_load_stats
+from ..jit import njit
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True, nogil=True)
+def _peak_shaving_sweep(p_discharge, p_charge, discharge_mask, charge_mask,
+                        soc0, soc_min, soc_max):
+    """
+    Sequentieller SoC-Durchlauf (Entladen nur über soc_min, Laden nur unter soc_max).
+    
+    Leistungen und Masken sind vorab vektorisiert berechnet; nur die
+    SoC-Abhängigkeit von Schritt zu Schritt bleibt als Schleife.
+    """
+    n = p_discharge.shape[0]
+    p_net = np.zeros(n)
+    soc = soc0
+    for i in range(n):
+        if discharge_mask[i] and soc > soc_min:
+            p_net[i] = p_discharge[i]
+            soc -= 2.0  # Vereinfachte SoC-Änderung
+        elif charge_mask[i] and soc < soc_max:
+            p_net[i] = p_charge
+            soc += 2.0
+        soc = max(soc_min, min(soc_max, soc))
+    return p_net
+
+
 class PeakShavingStrategy(BaseStrategy):
     """
     Peak Shaving Strategie: Reduziert Lastspitzen
@@ -23,6 +50,14 @@ class PeakShavingStrategy(BaseStrategy):
     - Lädt in Nebenzeiten
     """
     
+    # Standard-Constraints (unveränderlich, je Aufruf nicht neu angelegt)
+    _DEFAULT_CONSTRAINTS = MappingProxyType({
+        'power_discharge_max_kw': 100.0,
+        'power_charge_max_kw': 100.0,
+        'soc_min_percent': 10.0,
+        'soc_max_percent': 90.0
+    })
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         super().__init__(name="Peak Shaving", config=config)
         
@@ -44,18 +79,13 @@ class PeakShavingStrategy(BaseStrategy):
         if not self.validate_forecast_data(forecast_data):
             return 0.0
         
-        load_forecast = forecast_data.get('load', [])
+        load_forecast = forecast_arrays(forecast_data, 'load')
         
         if len(load_forecast) < 2:
             return 0.0
         
-        # Extrahiere Lastwerte
-        load_values = [l[1] for l in load_forecast]
-        
-        # Berechne Variabilität
-        load_mean = np.mean(load_values)
-        load_max = max(load_values)
-        load_std = np.std(load_values)
+        # Berechne Variabilität (ein Durchlauf, mit Load Balancing geteilt)
+        load_mean, load_std, _, load_max, _, _ = forecast_load_stats(forecast_data)
         
         if load_mean == 0:
             return 0.0
@@ -69,7 +99,7 @@ class PeakShavingStrategy(BaseStrategy):
         # Score: Hoch wenn große Peaks und hohe Volatilität
         score = min(peak_ratio * 2, 1.0) * 0.6 + min(cv * 3, 1.0) * 0.4
         
-        self.logger.info(f"Peak Shaving evaluation: peak_ratio={peak_ratio:.2f}, cv={cv:.2f}, score={score:.3f}")
+        self.logger.info("Peak Shaving evaluation: peak_ratio=%.2f, cv=%.2f, score=%.3f", peak_ratio, cv, score)
         
         return min(score, 1.0)
     
@@ -89,53 +119,44 @@ class PeakShavingStrategy(BaseStrategy):
         if not self.validate_forecast_data(forecast_data):
             return self._create_empty_result()
         
-        load_forecast = forecast_data.get('load', [])
-        prices = forecast_data.get('prices', [])
+        load_forecast = forecast_arrays(forecast_data, 'load')
         current_soc = current_state.get('soc', 50.0)
         
-        # Standard Constraints
-        default_constraints = {
-            'power_discharge_max_kw': 100.0,
-            'power_charge_max_kw': 100.0,
-            'soc_min_percent': 10.0,
-            'soc_max_percent': 90.0
-        }
-        constr = {**default_constraints, **(constraints or {})}
-        
-        # Extrahiere Werte
-        timestamps = [l[0] for l in load_forecast]
-        load_values = np.array([l[1] for l in load_forecast])
-        
-        # Bestimme Peak-Schwelle
-        peak_threshold = np.percentile(load_values, self.peak_threshold_percentile)
-        
-        # Erstelle Fahrplan
-        schedule = []
-        soc_current = current_soc
-        
-        for i, (ts, load) in enumerate(zip(timestamps, load_values)):
-            p_net = 0.0
-            
-            if load > peak_threshold and soc_current > constr['soc_min_percent']:
-                # Peak: Entladen
-                p_net = min(constr['power_discharge_max_kw'], 
-                           (load - peak_threshold))
-                soc_current -= 2.0  # Vereinfachte SoC-Änderung
-                
-            elif load < peak_threshold * 0.7 and soc_current < constr['soc_max_percent']:
-                # Schwachlast: Laden
-                p_net = -min(constr['power_charge_max_kw'], 
-                            peak_threshold * 0.5)
-                soc_current += 2.0
-            
-            # Clamp SoC
-            soc_current = max(constr['soc_min_percent'], 
-                            min(constr['soc_max_percent'], soc_current))
-            
-            schedule.append((ts, p_net))
+        # Standard Constraints (Klassenkonstante, Merge nur bei Overrides)
+        constr = self._DEFAULT_CONSTRAINTS if not constraints else {**self._DEFAULT_CONSTRAINTS, **constraints}
+        p_discharge_max = float(constr['power_discharge_max_kw'])
+        p_charge_max = float(constr['power_charge_max_kw'])
+        soc_min = float(constr['soc_min_percent'])
+        soc_max = float(constr['soc_max_percent'])
+        
+        timestamps = load_forecast.timestamps
+        load_values = load_forecast.values
+        
+        # Bestimme Peak-Schwelle (einmal sortiert, lineare Interpolation wie np.percentile)
+        sorted_load = np.sort(load_values)
+        pos = self.peak_threshold_percentile / 100.0 * (len(sorted_load) - 1)
+        lo = int(pos)
+        hi = min(lo + 1, len(sorted_load) - 1)
+        peak_threshold = float(sorted_load[lo] + (sorted_load[hi] - sorted_load[lo]) * (pos - lo))
+        
+        # Peak: Entladen, Schwachlast: Laden (vektorisiert)
+        discharge_mask = load_values > peak_threshold
+        charge_mask = load_values < peak_threshold * 0.7
+        p_discharge = np.minimum(p_discharge_max, load_values - peak_threshold)
+        p_charge = -min(p_charge_max, peak_threshold * 0.5)
+        
+        # Erstelle Fahrplan (SoC-Begrenzung sequentiell)
+        p_net = _peak_shaving_sweep(
+            p_discharge, p_charge, discharge_mask, charge_mask,
+            float(current_soc),
+            soc_min,
+            soc_max
+        )
+        schedule = list(zip(timestamps, p_net.tolist()))
         
         # Schätze Einsparungen (vereinfacht)
-        peak_reduction = max(load_values) - peak_threshold
+        max_load = float(sorted_load[-1])
+        peak_reduction = max_load - peak_threshold
         estimated_savings = peak_reduction * 0.15 * len(load_forecast) / 24  # EUR/Tag
         
         result = StrategyResult(
@@ -147,14 +168,14 @@ class PeakShavingStrategy(BaseStrategy):
             confidence_score=0.7,
             metadata={
                 'peak_threshold_kw': float(peak_threshold),
-                'max_load_kw': float(max(load_values)),
+                'max_load_kw': max_load,
                 'estimated_peak_reduction_kw': float(peak_reduction),
                 'estimated_savings_eur': float(estimated_savings)
             }
         )
         
-        self.logger.info(f"Peak Shaving: threshold={peak_threshold:.1f}kW, "
-                        f"reduction={peak_reduction:.1f}kW")
+        self.logger.info("Peak Shaving: threshold=%.1fkW, reduction=%.1fkW",
+                         peak_threshold, peak_reduction)
         
         return result
     
@@ -3,16 +3,70 @@ Phoenyra EMS - Self Consumption Strategy
 Maximiert Eigenverbrauch von PV-Strom
 """
 
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import numpy as np
 
 from .base_strategy import BaseStrategy, StrategyResult
+from .forecast_arrays import forecast_arrays
+from ..jit import njit
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@njit(cache=True, nogil=True)
+def _self_consumption_sweep(pv, load, soc0, p_charge_max, p_discharge_max, soc_min, soc_max):
+    """
+    Sequentieller Eigenverbrauchs-Durchlauf (vereinfachte SoC-Fortschreibung)
+    
+    Returns:
+        (p_bess, grid_import, grid_export, battery_charge, battery_discharge, total_pv, total_load)
+    """
+    n = min(pv.shape[0], load.shape[0])
+    p_bess = np.zeros(n)
+    soc = soc0
+    total_pv = 0.0
+    total_load = 0.0
+    grid_import = 0.0
+    grid_export = 0.0
+    battery_charge = 0.0
+    battery_discharge = 0.0
+    
+    for i in range(n):
+        # Netto-Leistung (PV - Last); Summen im selben Durchlauf
+        total_pv += pv[i]
+        total_load += load[i]
+        net = pv[i] - load[i]
+        
+        # Verzweigungsfrei: Lade-/Entlade-Maske aus Vorzeichen und SoC-Spielraum
+        # (Überschuss -> Laden, Defizit -> Entladen, SoC vereinfacht +-1 je Schritt)
+        # Skalare min/max als Vergleichsausdrücke (schnell auch ohne Numba, LLVM: select)
+        charge = (net > 0.0) * (soc < soc_max) * 1.0
+        discharge = (net < 0.0) * (soc > soc_min) * 1.0
+        surplus = net if net > 0.0 else 0.0
+        deficit = -net if net < 0.0 else 0.0
+        p_charge = (surplus if surplus < p_charge_max else p_charge_max) * charge
+        p_discharge = (deficit if deficit < p_discharge_max else p_discharge_max) * discharge
+        p = p_discharge - p_charge  # Positiv = Entladen, negativ = Laden
+        
+        battery_charge += p_charge
+        battery_discharge += p_discharge
+        soc += charge - discharge
+        soc = soc_max if soc > soc_max else soc
+        soc = soc_min if soc < soc_min else soc
+        
+        # Verbleibender Netzbezug/-einspeisung nach Batterie
+        remaining = net + p
+        grid_export += remaining if remaining > 0.0 else 0.0
+        grid_import += -remaining if remaining < 0.0 else 0.0
+        
+        p_bess[i] = p
+    
+    return p_bess, grid_import, grid_export, battery_charge, battery_discharge, total_pv, total_load
+
+
 class SelfConsumptionStrategy(BaseStrategy):
     """
     Eigenverbrauchs-Strategie: Maximiert PV-Eigenverbrauch
@@ -22,6 +76,16 @@ class SelfConsumptionStrategy(BaseStrategy):
     - Minimiert Netzbezug und Netzeinspeisung
     """
     
+    # Standard-Constraints (unveränderlich, je Aufruf nicht neu angelegt)
+    _DEFAULT_CONSTRAINTS = MappingProxyType({
+        'power_discharge_max_kw': 100.0,
+        'power_charge_max_kw': 100.0,
+        'soc_min_percent': 10.0,
+        'soc_max_percent': 90.0,
+        'efficiency_charge': 0.95,
+        'efficiency_discharge': 0.95
+    })
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         super().__init__(name="Self Consumption", config=config)
         
@@ -43,30 +107,27 @@ class SelfConsumptionStrategy(BaseStrategy):
         if not self.validate_forecast_data(forecast_data):
             return 0.0
         
-        pv_forecast = forecast_data.get('pv', [])
-        load_forecast = forecast_data.get('load', [])
+        pv_forecast = forecast_arrays(forecast_data, 'pv')
+        load_forecast = forecast_arrays(forecast_data, 'load')
         
         if len(pv_forecast) < 2 or len(load_forecast) < 2:
             return 0.0
         
-        # Extrahiere Werte
-        pv_values = [p[1] for p in pv_forecast]
-        load_values = [l[1] for l in load_forecast]
+        pv_values = pv_forecast.values
         
-        # Durchschnittliche PV-Erzeugung
-        avg_pv = np.mean(pv_values)
-        max_pv = max(pv_values)
-        
-        if max_pv < 1.0:  # Keine nennenswerte PV-Erzeugung
+        # Günstigste Prüfung zuerst (nachts kein weiterer Durchlauf)
+        if float(pv_values.max()) < 1.0:  # Keine nennenswerte PV-Erzeugung
             return 0.0
         
-        # Berechne Überschuss/Defizit
-        n = min(len(pv_values), len(load_values))
-        surplus = [max(0, pv_values[i] - load_values[i]) for i in range(n)]
-        deficit = [max(0, load_values[i] - pv_values[i]) for i in range(n)]
+        # Durchschnittliche PV-Erzeugung
+        avg_pv = float(pv_values.mean())
+        load_values = load_forecast.values
         
-        avg_surplus = np.mean(surplus)
-        avg_deficit = np.mean(deficit)
+        # Berechne Überschuss/Defizit (vektorisiert)
+        n = min(len(pv_values), len(load_values))
+        diff = pv_values[:n] - load_values[:n]
+        avg_surplus = float(np.maximum(diff, 0.0).mean())
+        avg_deficit = float(np.maximum(-diff, 0.0).mean())
         
         # Score basierend auf PV-Erzeugung und Balance
         pv_score = min(avg_pv / 10.0, 1.0)  # Normalisiert auf ~10kW
@@ -74,7 +135,7 @@ class SelfConsumptionStrategy(BaseStrategy):
         
         score = pv_score * 0.6 + balance_score * 0.4
         
-        self.logger.info(f"Self-Consumption evaluation: avg_pv={avg_pv:.1f}kW, score={score:.3f}")
+        self.logger.info("Self-Consumption evaluation: avg_pv=%.1fkW, score=%.3f", avg_pv, score)
         
         return score
     
@@ -93,78 +154,33 @@ class SelfConsumptionStrategy(BaseStrategy):
         if not self.validate_forecast_data(forecast_data):
             return self._create_empty_result()
         
-        pv_forecast = forecast_data.get('pv', [])
-        load_forecast = forecast_data.get('load', [])
+        pv_forecast = forecast_arrays(forecast_data, 'pv')
         current_soc = current_state.get('soc', 50.0)
         
-        # Standard Constraints
-        default_constraints = {
-            'power_discharge_max_kw': 100.0,
-            'power_charge_max_kw': 100.0,
-            'soc_min_percent': 10.0,
-            'soc_max_percent': 90.0,
-            'efficiency_charge': 0.95,
-            'efficiency_discharge': 0.95
-        }
-        constr = {**default_constraints, **(constraints or {})}
-        
-        # Synchronisiere Zeitstempel
-        n = min(len(pv_forecast), len(load_forecast))
-        
-        schedule = []
-        soc_current = current_soc
-        
-        grid_import = 0.0
-        grid_export = 0.0
-        battery_charge = 0.0
-        battery_discharge = 0.0
-        
-        for i in range(n):
-            ts_pv, pv = pv_forecast[i]
-            ts_load, load = load_forecast[i]
-            
-            # Verwende PV-Zeitstempel (sollten identisch sein)
-            ts = ts_pv
-            
-            # Netto-Leistung (PV - Last)
-            net = pv - load
-            
-            p_bess = 0.0
-            
-            if net > 0 and soc_current < constr['soc_max_percent']:
-                # Überschuss: Lade Batterie
-                p_charge = min(net, constr['power_charge_max_kw'])
-                p_bess = -p_charge  # Negativ = Laden
-                
-                battery_charge += p_charge
-                soc_current += 1.0  # Vereinfacht
-                
-            elif net < 0 and soc_current > constr['soc_min_percent']:
-                # Defizit: Entlade Batterie
-                p_discharge = min(abs(net), constr['power_discharge_max_kw'])
-                p_bess = p_discharge  # Positiv = Entladen
-                
-                battery_discharge += p_discharge
-                soc_current -= 1.0  # Vereinfacht
-            
-            # Clamp SoC
-            soc_current = max(constr['soc_min_percent'], 
-                            min(constr['soc_max_percent'], soc_current))
-            
-            # Berechne verbleibenden Netzbezug/-einspeisung
-            remaining = net + p_bess  # Nach Batterie
-            if remaining > 0:
-                grid_export += remaining
-            else:
-                grid_import += abs(remaining)
-            
-            schedule.append((ts, p_bess))
+        # Standard Constraints (Klassenkonstante, Merge nur bei Overrides)
+        constr = self._DEFAULT_CONSTRAINTS if not constraints else {**self._DEFAULT_CONSTRAINTS, **constraints}
+        p_charge_max = float(constr['power_charge_max_kw'])
+        p_discharge_max = float(constr['power_discharge_max_kw'])
+        soc_min = float(constr['soc_min_percent'])
+        soc_max = float(constr['soc_max_percent'])
+        
+        # Fahrplan über den gemeinsamen Horizont (min. Länge von PV und Last)
+        (p_bess, grid_import, grid_export, battery_charge, battery_discharge,
+         total_pv, total_load) = _self_consumption_sweep(
+            pv_forecast.values,
+            forecast_arrays(forecast_data, 'load').values,
+            float(current_soc),
+            p_charge_max,
+            p_discharge_max,
+            soc_min,
+            soc_max
+        )
+        
+        # Verwende PV-Zeitstempel (sollten identisch sein)
+        schedule = list(zip(pv_forecast.timestamps, p_bess.tolist()))
         
         # Berechne Einsparungen
         # Ohne Batterie: Netzbezug und Einspeisung direkt
-        total_pv = sum(p[1] for p in pv_forecast[:n])
-        total_load = sum(l[1] for l in load_forecast[:n])
-        
         without_battery_import = max(0, total_load - total_pv)
         without_battery_export = max(0, total_pv - total_load)
         
@@ -195,8 +211,8 @@ class SelfConsumptionStrategy(BaseStrategy):
             }
         )
         
-        self.logger.info(f"Self-Consumption: savings={savings:.2f} EUR, "
-                        f"self_consumption={result.metadata['self_consumption_rate']:.1f}%")
+        self.logger.info("Self-Consumption: savings=%.2f EUR, self_consumption=%.1f%%",
+                         savings, result.metadata['self_consumption_rate'])
         
         return result
     
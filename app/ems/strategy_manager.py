@@ -5,18 +5,144 @@ Verwaltet und koordiniert alle EMS-Strategien
 
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 
+import numpy as np
+
+from .jit import NUMBA_AVAILABLE
+from .strategy_selection import select_strategy_index
 from .strategies import (
     BaseStrategy,
     ArbitrageStrategy,
     PeakShavingStrategy,
     SelfConsumptionStrategy,
-    LoadBalancingStrategy
+    LoadBalancingStrategy,
+    ForecastBundle,
+    StrategyResult
 )
 
+try:
+    from joblib import Memory
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    JOBLIB_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Max. gemerkte Zeitstempel-Parses (Trainingshistorie: 30 Tage Zustände + Optimierungen)
+ISO_PARSE_CACHE_SIZE = 65536
+
+# Felder der Historien, aus denen _build_training_columns liest (Inhalt des Cache-Schlüssels)
+_TRAINING_OPT_FIELDS = ('timestamp', 'strategy_name', 'confidence')
+_TRAINING_STATE_FIELDS = ('timestamp', 'soc', 'p_bess', 'p_pv', 'p_load', 'p_grid', 'price')
+
+# Max. gespeicherte Trainingsdatensätze im Platten-Cache (ältere werden verworfen)
+TRAINING_CACHE_ITEMS = 4
+
+# Anzahl Prognosewerte (Stunden) für die 6h-Mittelwerte der AI-Features
+FEATURE_HORIZON = 6
+
+
+@lru_cache(maxsize=ISO_PARSE_CACHE_SIZE)
+def _parse_iso(ts: str) -> datetime:
+    """ISO-Zeitstempel (auch mit 'Z') parsen; wiederholtes Training parst dieselben Strings"""
+    return datetime.fromisoformat(ts.replace('Z', '+00:00'))
+
+
+def _coerce_forecast_array(data_list: List[Any]) -> np.ndarray:
+    """
+    Wandelt eine Prognoseliste einmal in ein float32-Array um
+    
+    Dict-Einträge liefern 'value' (bzw. 'power'), Zahlen werden direkt
+    übernommen; andere Einträge werden zu NaN und bei der Mittelung ignoriert.
+    """
+    return np.fromiter(
+        (item.get('value', item.get('power', 0.0)) if isinstance(item, dict)
+         else item if isinstance(item, (int, float)) else np.nan
+         for item in data_list),
+        dtype=np.float32, count=len(data_list)
+    )
+
+
+def _epoch_seconds(timestamps: List[str]) -> np.ndarray:
+    """ISO-Zeitstempel (auch mit 'Z') als Unix-Sekunden"""
+    return np.fromiter(
+        (_parse_iso(ts).timestamp() for ts in timestamps),
+        dtype=np.float64, count=len(timestamps)
+    )
+
+
+def _history_digest(records: List[Dict[str, Any]], fields: tuple) -> str:
+    """Stabiler Hash (prozessübergreifend) über die genutzten Felder aller Zeilen"""
+    digest = hashlib.blake2b(digest_size=16)
+    for record in records:
+        digest.update(repr(tuple(record.get(name) for name in fields)).encode())
+    return digest.hexdigest()
+
+
+def _build_training_columns(history_key: tuple,
+                            optimization_history: List[Dict[str, Any]],
+                            state_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Ordnet jeder Optimierung den nächsten State zu und baut die Trainingsspalten
+    
+    Deterministisch in den Historien; history_key (Inhalts-Hash der genutzten
+    Felder beider Historien) identifiziert sie für den Platten-Cache, die Listen
+    selbst werden von joblib nicht erneut gehasht.
+    
+    Returns:
+        Spalten für AIStrategySelector.train (ggf. weniger als 100 Zeilen)
+    """
+    # Zeitstempel einmal parsen, States sortieren und den nächsten State
+    # je Optimierung per Binärsuche bestimmen (statt O(N·M) Vergleiche)
+    state_ts = _epoch_seconds([state['timestamp'] for state in state_history])
+    state_order = np.argsort(state_ts, kind='stable')
+    state_ts = state_ts[state_order]
+    opt_ts = _epoch_seconds([opt['timestamp'] for opt in optimization_history])
+
+    if state_ts.size:
+        right = np.minimum(np.searchsorted(state_ts, opt_ts), state_ts.size - 1)
+        left = np.maximum(right - 1, 0)
+        left_diff = np.abs(opt_ts - state_ts[left])
+        right_diff = np.abs(opt_ts - state_ts[right])
+        nearest = np.where(right_diff < left_diff, right, left)
+        nearest_diff = np.minimum(left_diff, right_diff)
+    else:
+        nearest_diff = np.full(opt_ts.size, np.inf)
+    
+    # Paare (Optimierung, nähester State), max. 1h Unterschied
+    pairs = [
+        (opt, state_history[state_order[nearest[i]]])
+        for i, opt in enumerate(optimization_history)
+        if nearest_diff[i] < 3600
+    ]
+    opts = [opt for opt, state in pairs if state]
+    states = [state for _, state in pairs if state]
+    
+    # Training-Daten spaltenweise (Rohwerte je Feature, siehe AIStrategySelector.extract_features_columns);
+    # soh, temp_c, price_trend und price_volatility bleiben auf den Defaults
+    p_pv = np.array([state.get('p_pv', 0.0) for state in states], dtype=np.float64)
+    p_load = np.array([state.get('p_load', 0.0) for state in states], dtype=np.float64)
+    price = np.array([state.get('price', 0.0) for state in states], dtype=np.float64)
+    return {
+        'soc': np.array([state.get('soc', 50.0) for state in states], dtype=np.float64),
+        'p_bess': np.array([state.get('p_bess', 0.0) for state in states], dtype=np.float64),
+        'p_pv': p_pv,
+        'p_load': p_load,
+        'p_grid': np.array([state.get('p_grid', 0.0) for state in states], dtype=np.float64),
+        'current_strategy_score': np.array([opt.get('confidence', 0.0) for opt in opts], dtype=np.float64),
+        'pv_6h_avg': p_pv,
+        'load_6h_avg': p_load,
+        'price_6h_avg': price,
+        'current_price': price,
+        'best_strategy': [opt.get('strategy_name', 'arbitrage') for opt in opts],
+    }
+
 
 class StrategyManager:
     """
@@ -34,6 +160,14 @@ class StrategyManager:
             'load_balancing': LoadBalancingStrategy(config)
         }
         
+        # Von den Strategien benötigte Prognosereihen (einmal pro Zyklus als Arrays)
+        self._forecast_keys = sorted({key for strategy in self.strategies.values()
+                                      for key in strategy.get_required_forecast_keys()})
+        
+        # Worker für parallele Auswertung/Optimierung (Numba-Kernel geben den GIL frei),
+        # lazy erzeugt und in close() wieder beendet
+        self._pool: Optional[ThreadPoolExecutor] = None
+        
         # Strategie-Auswahl-Modus
         self.selection_mode = config.get('selection_mode', 'auto')  # 'auto' oder 'manual'
         self.manual_strategy = config.get('manual_strategy', 'arbitrage')
@@ -49,13 +183,26 @@ class StrategyManager:
         self.market_data_service = market_data_service
         
         ai_config = config.get('ai_selection', {})
+        self._training_memory = None
         if ai_config.get('enabled', False):
             try:
                 from .strategies.ai_strategy_selector import AIStrategySelector
                 model_path = ai_config.get('model_path', 'data/ai_strategy_model.pkl')
-                self.ai_selector = AIStrategySelector(model_path=model_path)
+                self.ai_selector = AIStrategySelector(
+                    model_path=model_path,
+                    dominance_margin=ai_config.get('dominance_margin', 0.2)
+                )
                 logger.info("AI Strategy Selector initialized")
                 
+                if JOBLIB_AVAILABLE:
+                    # Standard: neben dem Modell (gleiche Basis wie model_path)
+                    cache_dir = ai_config.get('training_cache_dir') or Path(model_path).parent / 'cache_train'
+                    self._training_memory = Memory(location=str(cache_dir), verbose=0)
+                
+                if NUMBA_AVAILABLE:
+                    # Kernel vorab kompilieren/laden, damit der erste Zyklus nicht wartet
+                    self._ai_feature_vector({}, ForecastBundle(), {}, 0.0)
+                
                 # Trainiere mit historischen Daten falls verfügbar
                 if self.history_db:
                     self._train_ai_selector()
@@ -80,10 +227,12 @@ class StrategyManager:
         """
         
         if self.selection_mode == 'manual':
-            logger.info(f"Manual strategy selection: {self.manual_strategy}")
+            logger.info("Manual strategy selection: %s", self.manual_strategy)
             self.current_strategy_name = self.manual_strategy
             return self.manual_strategy
         
+        forecast_data = self._materialize_arrays(forecast_data)
+        
         # Evaluiere alle Strategien
         scores = self.evaluate_all_strategies(current_state, forecast_data)
         
@@ -102,22 +251,17 @@ class StrategyManager:
                     # Ergänze Forecast-Daten für Market Data
                     market_data['price_6h_avg'] = self.market_data_service.get_price_forecast_6h_avg(forecast_data)
                 
-                # Ergänze Forecast-Daten
-                forecast_enhanced = forecast_data.copy()
-                forecast_enhanced['pv_6h_avg'] = self._calculate_6h_avg(forecast_data.get('pv', []))
-                forecast_enhanced['load_6h_avg'] = self._calculate_6h_avg(forecast_data.get('load', []))
-                forecast_enhanced['price_6h_avg'] = market_data.get('price_6h_avg', 0.0)
-                
-                # State erweitern
-                state_enhanced = current_state.copy()
-                state_enhanced['current_strategy_score'] = scores.get(self.current_strategy_name, 0.0) if self.current_strategy_name else 0.0
+                current_strategy_score = scores.get(self.current_strategy_name, 0.0) if self.current_strategy_name else 0.0
                 
-                # AI-Auswahl
+                # Ein Feature-Pfad für beide Fälle: build_feature_vector läuft mit
+                # Numba kompiliert, ohne Numba als normale Python-Funktion (jit-Shim)
                 ai_selected = self.ai_selector.select_strategy(
-                    state_enhanced,
-                    forecast_enhanced,
+                    current_state,
+                    forecast_data,
                     market_data,
-                    scores
+                    scores,
+                    feature_vector=self._ai_feature_vector(
+                        current_state, forecast_data, market_data, current_strategy_score)
                 )
                 
                 # Prüfe ob Strategiewechsel sinnvoll ist
@@ -127,37 +271,52 @@ class StrategyManager:
                     
                     # Nur wechseln wenn signifikante Verbesserung
                     if ai_score - current_score < self.switch_threshold:
-                        logger.info(f"AI suggested {ai_selected}, but keeping {self.current_strategy_name} "
-                                   f"(score diff {ai_score - current_score:.3f} < threshold)")
+                        logger.info("AI suggested %s, but keeping %s (score diff %.3f < threshold)",
+                                    ai_selected, self.current_strategy_name, ai_score - current_score)
                         return self.current_strategy_name
                 
-                logger.info(f"AI selected strategy: {ai_selected} (scores: {scores})")
+                logger.info("AI selected strategy: %s (scores: %s)", ai_selected, scores)
                 self.current_strategy_name = ai_selected
                 return ai_selected
             except Exception as e:
                 logger.error(f"Error in AI strategy selection: {e}", exc_info=True)
                 # Fallback zu Score-basierter Auswahl
         
-        # Fallback: Score-basierte Auswahl
-        sorted_strategies = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        best_strategy, best_score = sorted_strategies[0]
+        # Fallback: Score-basierte Auswahl (inkl. Prüfung ob Strategiewechsel sinnvoll ist)
+        names = tuple(scores)
+        values = tuple(scores.values())
+        current_idx = names.index(self.current_strategy_name) if self.current_strategy_name in scores else -1
+        selected_idx, best_idx = select_strategy_index(values, current_idx, self.switch_threshold)
+        best_strategy, best_score = names[best_idx], values[best_idx]
         
-        # Prüfe ob Strategiewechsel sinnvoll ist
-        if self.current_strategy_name and self.current_strategy_name != best_strategy:
-            current_score = scores.get(self.current_strategy_name, 0.0)
-            
-            # Nur wechseln wenn signifikante Verbesserung
-            if best_score - current_score < self.switch_threshold:
-                logger.info(f"Keeping current strategy {self.current_strategy_name} "
-                           f"(score diff {best_score - current_score:.3f} < threshold)")
-                return self.current_strategy_name
+        if selected_idx != best_idx:
+            logger.info("Keeping current strategy %s (score diff %.3f < threshold)",
+                        self.current_strategy_name, best_score - values[selected_idx])
+            return self.current_strategy_name
         
-        logger.info(f"Selected strategy: {best_strategy} (score: {best_score:.3f})")
-        logger.debug(f"All scores: {scores}")
+        logger.info("Selected strategy: %s (score: %.3f)", best_strategy, best_score)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("All scores: %s", scores)
         
         self.current_strategy_name = best_strategy
         return best_strategy
     
+    def _materialize_arrays(self, forecast_data: Dict[str, Any]) -> ForecastBundle:
+        """
+        Wandelt die benötigten Prognosereihen einmal in Arrays um
+        
+        Alle Strategien (auch parallel im Thread-Pool) lesen danach dieselben
+        ForecastArrays aus dem Bundle, statt die Tupel-Listen je Aufruf zu entpacken.
+        """
+        bundle = ForecastBundle.wrap(forecast_data)
+        for key in self._forecast_keys:
+            if bundle.get(key):
+                try:
+                    bundle.arrays(key)
+                except (TypeError, ValueError, IndexError) as e:
+                    logger.warning(f"Forecast series '{key}' could not be converted: {e}")
+        return bundle
+    
     def evaluate_all_strategies(self,
                                 current_state: Dict[str, Any],
                                 forecast_data: Dict[str, Any]) -> Dict[str, float]:
@@ -168,17 +327,61 @@ class StrategyManager:
             Dictionary {strategy_name: score}
         """
         
+        forecast_data = self._materialize_arrays(forecast_data)
+        
+        # Scores hängen nur von der Prognose ab -> einmal pro Bundle berechnen
+        cached = forecast_data.memo.get('strategy_scores')
+        if cached is not None:
+            return dict(cached)
+        
+        futures = {
+            name: self._executor().submit(strategy.evaluate_cached, current_state, forecast_data)
+            for name, strategy in self.strategies.items()
+        }
         scores = {}
         
-        for name, strategy in self.strategies.items():
+        for name, future in futures.items():
             try:
-                score = strategy.evaluate(current_state, forecast_data)
+                score = future.result()
                 scores[name] = score
-                logger.debug(f"Strategy {name}: score={score:.3f}")
+                logger.debug("Strategy %s: score=%.3f", name, score)
             except Exception as e:
                 logger.error(f"Error evaluating strategy {name}: {e}")
                 scores[name] = 0.0
         
+        forecast_data.memo['strategy_scores'] = dict(scores)
+        return scores
+    
+    async def evaluate_all_strategies_async(self,
+                                            current_state: Dict[str, Any],
+                                            forecast_data: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Wie evaluate_all_strategies, alle Strategien nebenläufig (asyncio.gather)
+        
+        Returns:
+            Dictionary {strategy_name: score}
+        """
+        forecast_data = self._materialize_arrays(forecast_data)
+        cached = forecast_data.memo.get('strategy_scores')
+        if cached is not None:
+            return dict(cached)
+        
+        names = list(self.strategies.keys())
+        outcomes = await asyncio.gather(
+            *(self.strategies[name].evaluate_async(current_state, forecast_data) for name in names),
+            return_exceptions=True
+        )
+        
+        scores = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error evaluating strategy {name}: {outcome}")
+                scores[name] = 0.0
+            else:
+                scores[name] = outcome
+                logger.debug("Strategy %s: score=%.3f", name, outcome)
+        
+        forecast_data.memo['strategy_scores'] = dict(scores)
         return scores
     
     def optimize_with_strategy(self,
@@ -207,20 +410,25 @@ class StrategyManager:
             strategy = self.strategies['arbitrage']
             strategy_name = 'arbitrage'
         
-        logger.info(f"Optimizing with strategy: {strategy_name}")
+        logger.info("Optimizing with strategy: %s", strategy_name)
+        
+        forecast_data = self._materialize_arrays(forecast_data)
         
         try:
             result = strategy.optimize(current_state, forecast_data, constraints)
             return result
         except Exception as e:
             logger.error(f"Error optimizing with strategy {strategy_name}: {e}", exc_info=True)
-            # Return empty result
-            from .strategies.base_strategy import StrategyResult
-            return StrategyResult(
-                schedule=[],
-                strategy_name=strategy_name,
-                confidence_score=0.0
-            )
+            return self._empty_result(strategy_name)
+    
+    @staticmethod
+    def _empty_result(strategy_name: str) -> StrategyResult:
+        """Leeres Ergebnis für eine fehlgeschlagene Optimierung"""
+        return StrategyResult(
+            schedule=[],
+            strategy_name=strategy_name,
+            confidence_score=0.0
+        )
     
     def optimize_all_strategies(self,
                                current_state: Dict[str, Any],
@@ -233,14 +441,52 @@ class StrategyManager:
             Dictionary {strategy_name: StrategyResult}
         """
         
+        forecast_data = self._materialize_arrays(forecast_data)
+        
+        # Fehler laufen bis future.result() durch und werden dort gesammelt behandelt
+        futures = {
+            name: self._executor().submit(strategy.optimize, current_state, forecast_data, constraints)
+            for name, strategy in self.strategies.items()
+        }
         results = {}
         
-        for name in self.strategies.keys():
+        for name, future in futures.items():
             try:
-                result = self.optimize_with_strategy(name, current_state, forecast_data, constraints)
-                results[name] = result
+                results[name] = future.result()
             except Exception as e:
-                logger.error(f"Error optimizing with {name}: {e}")
+                logger.error(f"Error optimizing with strategy {name}: {e}", exc_info=True)
+                results[name] = self._empty_result(name)
+        
+        return results
+    
+    async def optimize_all_strategies_async(self,
+                                            current_state: Dict[str, Any],
+                                            forecast_data: Dict[str, Any],
+                                            constraints: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Wie optimize_all_strategies, alle Strategien nebenläufig (asyncio.gather)
+        
+        Returns:
+            Dictionary {strategy_name: StrategyResult}
+        """
+        forecast_data = self._materialize_arrays(forecast_data)
+        names = list(self.strategies.keys())
+        # Fehler kommen über return_exceptions zurück und werden wie im Sync-Pfad behandelt
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.to_thread(strategy.optimize, current_state, forecast_data, constraints)
+                for strategy in self.strategies.values()
+            ),
+            return_exceptions=True
+        )
+        
+        results = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error optimizing with strategy {name}: {outcome}", exc_info=outcome)
+                results[name] = self._empty_result(name)
+            else:
+                results[name] = outcome
         
         return results
     
@@ -275,24 +521,59 @@ class StrategyManager:
         self.selection_mode = 'auto'
         logger.info("Auto strategy selection enabled")
     
-    def _calculate_6h_avg(self, data_list: List[Any]) -> float:
+    def _executor(self) -> ThreadPoolExecutor:
+        """Gibt den Worker-Pool zurück (nach close() wird er neu angelegt)"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=len(self.strategies),
+                                            thread_name_prefix='strategy')
+        return self._pool
+    
+    def close(self):
+        """Beendet den Worker-Pool (Aufruf aus EmsCore.stop())"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+    
+    def _feature_series(self, forecast_data: ForecastBundle, key: str) -> np.ndarray:
+        """Prognosereihe `key` als float32-Array für die AI-Features (pro Zyklus gemerkt)"""
+        memo_key = ('feature_series', key)
+        arr = forecast_data.memo.get(memo_key)
+        if arr is None:
+            arr = _coerce_forecast_array(forecast_data.get(key) or [])
+            forecast_data.memo[memo_key] = arr
+        return arr
+    
+    def _ai_feature_vector(self,
+                           current_state: Dict[str, Any],
+                           forecast_data: ForecastBundle,
+                           market_data: Dict[str, Any],
+                           current_strategy_score: float) -> np.ndarray:
+        """Feature-Vektor für den AI-Selector (build_feature_vector, mit oder ohne Numba)"""
+        from .strategies.ai_strategy_selector import build_feature_vector
+        return build_feature_vector(
+            self._feature_series(forecast_data, 'pv'),
+            self._feature_series(forecast_data, 'load'),
+            FEATURE_HORIZON,
+            float(current_state.get('soc', 50.0)),
+            float(current_state.get('soh', 100.0)),
+            float(current_state.get('temp_c', 25.0)),
+            float(market_data.get('price_trend', 0.0)),
+            float(market_data.get('price_volatility', 0.0)),
+            float(market_data.get('current_price', 0.0)),
+            float(market_data.get('price_6h_avg', 0.0)),
+            float(current_strategy_score),
+            float(current_state.get('p_bess', 0.0)),
+            float(current_state.get('p_pv', 0.0)),
+            float(current_state.get('p_load', 0.0)),
+            float(current_state.get('p_grid', 0.0))
+        )
+    
+    def _calculate_6h_avg(self, data_list: Any) -> float:
         """Berechnet Durchschnitt der nächsten 6 Stunden"""
-        if not data_list:
-            return 0.0
-        
-        next_6h = data_list[:6] if len(data_list) >= 6 else data_list
-        
-        values = []
-        for item in next_6h:
-            if isinstance(item, dict):
-                values.append(item.get('value', item.get('power', 0.0)))
-            elif isinstance(item, (int, float)):
-                values.append(float(item))
-        
-        if not values:
-            return 0.0
-        
-        return sum(values) / len(values)
+        arr = data_list if isinstance(data_list, np.ndarray) else _coerce_forecast_array(data_list)
+        next_6h = arr[:FEATURE_HORIZON]
+        next_6h = next_6h[~np.isnan(next_6h)]
+        return float(next_6h.mean(dtype=np.float64)) if next_6h.size else 0.0
     
     def _train_ai_selector(self):
         """Trainiert AI-Selector mit historischen Daten"""
@@ -310,59 +591,28 @@ class StrategyManager:
             # Hole State History für Kontext
             state_history = self.history_db.get_state_history(hours=24 * 30)
             
-            # Erstelle Training-Daten
-            training_data = []
+            # Aufbereitung (Parsen, Zuordnung, Spalten) auf Platte gecacht, solange
+            # sich der Inhalt der Historie nicht geändert hat
+            history_key = (
+                _history_digest(optimization_history, _TRAINING_OPT_FIELDS),
+                _history_digest(state_history, _TRAINING_STATE_FIELDS),
+            )
+            build_columns = _build_training_columns
+            if self._training_memory is not None:
+                build_columns = self._training_memory.cache(
+                    _build_training_columns, ignore=['optimization_history', 'state_history']
+                )
+            training_columns = build_columns(history_key, optimization_history, state_history)
+            if self._training_memory is not None:
+                self._training_memory.reduce_size(items_limit=TRAINING_CACHE_ITEMS)
+            n_records = len(training_columns['best_strategy'])
             
-            for opt in optimization_history:
-                # Finde passenden State
-                opt_timestamp = datetime.fromisoformat(opt['timestamp'].replace('Z', '+00:00'))
-                
-                # Finde nähesten State
-                closest_state = None
-                min_diff = float('inf')
-                for state in state_history:
-                    state_timestamp = datetime.fromisoformat(state['timestamp'].replace('Z', '+00:00'))
-                    diff = abs((opt_timestamp - state_timestamp).total_seconds())
-                    if diff < min_diff and diff < 3600:  # Max 1h Unterschied
-                        min_diff = diff
-                        closest_state = state
-                
-                if not closest_state:
-                    continue
-                
-                # Erstelle Training-Record
-                training_record = {
-                    'state': {
-                        'soc': closest_state.get('soc', 50.0),
-                        'soh': 100.0,  # Annahme, falls nicht verfügbar
-                        'temp_c': 25.0,  # Annahme
-                        'p_bess': closest_state.get('p_bess', 0.0),
-                        'p_pv': closest_state.get('p_pv', 0.0),
-                        'p_load': closest_state.get('p_load', 0.0),
-                        'p_grid': closest_state.get('p_grid', 0.0),
-                        'current_strategy_score': opt.get('confidence', 0.0)
-                    },
-                    'forecast': {
-                        'pv_6h_avg': closest_state.get('p_pv', 0.0),
-                        'load_6h_avg': closest_state.get('p_load', 0.0),
-                        'price_6h_avg': closest_state.get('price', 0.0)
-                    },
-                    'market': {
-                        'current_price': closest_state.get('price', 0.0),
-                        'price_trend': 0.0,  # Wird später berechnet
-                        'price_volatility': 0.0
-                    },
-                    'best_strategy': opt.get('strategy_name', 'arbitrage'),
-                    'actual_profit': opt.get('expected_profit', 0.0)
-                }
-                
-                training_data.append(training_record)
+            if n_records < 100:
+                logger.warning(f"Insufficient training data: {n_records} records")
+                return
             
-            if len(training_data) >= 100:
-                logger.info(f"Training AI Strategy Selector with {len(training_data)} records")
-                self.ai_selector.train(training_data)
-            else:
-                logger.warning(f"Insufficient training data: {len(training_data)} records")
+            logger.info(f"Training AI Strategy Selector with {n_records} records")
+            self.ai_selector.train(training_columns)
         except Exception as e:
             logger.error(f"Error training AI selector: {e}", exc_info=True)
 
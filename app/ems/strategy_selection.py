@@ -0,0 +1,40 @@
+"""
+Phoenyra EMS - Strategy Selection
+Score-basierte Strategiewahl als reine Zahlenfunktion
+
+Die Funktion arbeitet nur auf Floats/Ints (keine Dicts, kein Logging) und
+hat keine Abhängigkeiten außer der Standardbibliothek. Sie läuft damit
+unverändert unter CPython, wird unter PyPy vom Tracing-JIT spezialisiert und
+ist in dieser Form auch mit Codon kompilierbar. Namen, Logging und Zustand
+bleiben im StrategyManager.
+"""
+
+from typing import Sequence, Tuple
+
+
+def select_strategy_index(scores: Sequence[float],
+                          current_idx: int,
+                          switch_threshold: float) -> Tuple[int, int]:
+    """
+    Wählt die Strategie mit dem höchsten Score (mit Wechsel-Hysterese)
+
+    Args:
+        scores: Scores aller Strategien (mindestens einer)
+        current_idx: Index der aktiven Strategie, -1 wenn keine aktiv ist
+        switch_threshold: Mindest-Scoredifferenz für einen Strategiewechsel
+
+    Returns:
+        (gewählter Index, Index des besten Scores) - beide gleich, außer die
+        aktive Strategie wird wegen zu geringer Verbesserung beibehalten
+    """
+    best_idx = 0
+    best_score = scores[0]
+    for i in range(1, len(scores)):
+        if scores[i] > best_score:
+            best_idx = i
+            best_score = scores[i]
+
+    # Nur wechseln wenn signifikante Verbesserung
+    if 0 <= current_idx != best_idx and best_score - scores[current_idx] < switch_threshold:
+        return current_idx, best_idx
+    return best_idx, best_idx
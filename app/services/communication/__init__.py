@@ -2,7 +2,7 @@
 # ======================
 
 from .mqtt_client import MQTTClient, MQTTConfig
-from .modbus_client import ModbusClient, ModbusConfig
+from .modbus_client import ModbusClient, AsyncModbusClient, ModbusConfig
 
-__all__ = ['MQTTClient', 'MQTTConfig', 'ModbusClient', 'ModbusConfig']
+__all__ = ['MQTTClient', 'MQTTConfig', 'ModbusClient', 'AsyncModbusClient', 'ModbusConfig']
 
@@ -5,21 +5,49 @@ Modbus Client Service for Phoenyra EMS
 Provides Modbus TCP/RTU communication for industrial devices and BESS systems.
 """
 
+import asyncio
+import contextlib
 import logging
+import struct
 import threading
 import time
-from typing import Dict, Any, Optional, List, Union
+from typing import Callable, Dict, Any, Optional, List, Tuple, Union
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Maximale Registeranzahl je Lese-Request (Modbus-Spezifikation FC3/FC4)
+MAX_READ_BLOCK = 125
+
+# Lesefunktionen je Function Code: (Client-Methode, Bezeichnung im Log)
+READ_FUNCTIONS = {
+    4: ("read_input_registers", "read_input"),
+    3: ("read_holding_registers", "read_holding"),
+    2: ("read_discrete_inputs", "read_discrete"),
+}
+
+# 32-Bit-Werte aus zwei Registern (Big Endian, High-Word zuerst): Wörter packen, Typ entpacken
+_WORD_PAIR = struct.Struct(">HH")
+_DWORD_TYPES = {
+    "uint32": struct.Struct(">I"),
+    "int32": struct.Struct(">i"),
+    "float32": struct.Struct(">f"),
+}
+
+# Vorbereiteter Lese-Request für read_bess_status:
+# (function_code, Startadresse, count, Request-Definition,
+#  ((Registername, Definition, Offset im Block, Wortanzahl, Decoder), ...))
+ReadBlock = Tuple[int, int, int, Dict[str, Any], Tuple[Tuple[str, Dict[str, Any], int, int, Callable], ...]]
+
 class ModbusConnectionType(Enum):
     TCP = "tcp"
     RTU = "rtu"
 
-@dataclass
+@dataclass(slots=True)
 class ModbusConfig:
     """Modbus Configuration"""
     enabled: bool = False
@@ -31,6 +59,7 @@ class ModbusConfig:
     retries: int = 3
     profile: Optional[str] = None
     poll_interval_s: float = 2.0
+    use_async: bool = False  # AsyncModbusClient (pymodbus asyncio) statt synchronem Client
     status_codes: Dict[str, str] = field(default_factory=dict)
     
     # RTU specific
@@ -60,6 +89,11 @@ class ModbusClient:
         self._lock = threading.Lock()
         self._last_error = None
         self._last_read_raw: Dict[str, Any] = {}
+        # Schreibziele je Registername: (normalisierte Adresse, scale, offset)
+        self._write_targets: Dict[str, Optional[Tuple[int, float, float]]] = {}
+        # Gruppierte Lese-Requests für read_bess_status (gecacht, None = neu aufbauen)
+        self._read_blocks: Optional[Tuple[ReadBlock, ...]] = None
+        self._register_order: Tuple[str, ...] = ()
         
         # Initialize Modbus client if enabled
         if self.config.enabled:
@@ -107,10 +141,160 @@ class ModbusClient:
         # Fallback auf 1-basige Adresse
         return max(address - 1, 0)
 
-    def _read_raw(self, definition: Dict[str, Any]) -> Optional[List[int]]:
-        if not self.connected:
-            return None
+    @staticmethod
+    def _to_register_value(value: Union[int, float], scale: float, offset: float) -> int:
+        if scale != 0:
+            return int(round((float(value) - offset) / scale))
+        return int(round(float(value)))
+
+    def _write_target(self, register_name: str) -> Optional[Tuple[int, float, float]]:
+        """Löst einen schreibbaren 1-Wort-Register auf (gecacht), sonst None"""
+        if register_name in self._write_targets:
+            return self._write_targets[register_name]
+
+        target = None
+        definition = self._clone_definition(register_name)
+        if (
+            definition
+            and definition.get("address") is not None
+            and int(definition.get("function", 3)) == 3
+            and int(definition.get("count", 1)) == 1
+        ):
+            target = (
+                self._normalize_address(
+                    int(definition["address"]), 3, bool(definition.get("zero_based", False))
+                ),
+                float(definition.get("scale", 1.0)),
+                float(definition.get("offset", 0.0)),
+            )
+        self._write_targets[register_name] = target
+        return target
+
+    def _write_result(self, norm_address: int, values: List[int], result: Any) -> bool:
+        if result.isError():
+            self._last_error = f"Write error: {result}"
+            logger.error(f"Modbus write error at address {norm_address}: {result}")
+            return False
+
+        logger.debug("Modbus write successful: address=%s, values=%s", norm_address, values)
+        return True
+
+    def _write_words(self, norm_address: int, values: List[int]) -> bool:
+        """Schreibt Holding-Register ab norm_address (FC6 für ein Wort, sonst FC16)"""
+        try:
+            with self._lock:
+                if len(values) == 1:
+                    result = self.client.write_register(
+                        address=norm_address,
+                        value=values[0],
+                        slave=self.config.slave_id
+                    )
+                else:
+                    result = self.client.write_registers(
+                        address=norm_address,
+                        values=values,
+                        slave=self.config.slave_id
+                    )
+
+                return self._write_result(norm_address, values, result)
+
+        except Exception as e:
+            self._last_error = str(e)
+            logger.error(f"Modbus write exception at address {norm_address}: {e}")
+            return False
+
+    def _register_table(self) -> Tuple[List[str], List[Dict[str, Any]], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Registerkonfiguration als Spalten (SoA) für Adressrechnungen über alle Register
+
+        Returns:
+            (Namen, Definitionen, Function Codes, normalisierte Adressen, Wortanzahl);
+            Register ohne Adresse fehlen
+        """
+        names: List[str] = []
+        definitions: List[Dict[str, Any]] = []
+        function_codes: List[int] = []
+        addresses: List[int] = []
+        counts: List[int] = []
+
+        for name in self.config.registers.keys():
+            definition = self._clone_definition(name)
+            if not definition or definition.get("address") is None:
+                continue
+            function_code = int(definition.get("function", 3))
+            names.append(name)
+            definitions.append(definition)
+            function_codes.append(function_code)
+            addresses.append(self._normalize_address(
+                int(definition["address"]), function_code, bool(definition.get("zero_based", False))
+            ))
+            counts.append(int(definition.get("count", 1)))
+
+        return (
+            names,
+            definitions,
+            np.array(function_codes, dtype=np.int16),
+            np.array(addresses, dtype=np.int32),
+            np.array(counts, dtype=np.int32),
+        )
+
+    def _build_read_blocks(self) -> Tuple[ReadBlock, ...]:
+        """
+        Gruppiert die konfigurierten Register zu zusammenhängenden Lese-Requests.
+
+        Register mit gleichem Function Code (3/4), deren Adressen lückenlos
+        aneinander anschließen, werden zu einem Block zusammengefasst.
+        Discrete Inputs bleiben Einzel-Requests.
+
+        Request-Definition und Decoder je Register werden hier einmal erzeugt,
+        damit das Polling keine Definitionen mehr auswerten muss.
+
+        Returns:
+            Tupel von ReadBlock (siehe dort)
+        """
+        names, definitions, function_codes, addresses, counts = self._register_table()
+        blocks: List[Tuple[int, int, int, List[Tuple[str, Dict[str, Any], int]]]] = []
+        if not names:
+            return ()
+
+        # Nach Function Code und Adresse sortieren; Anschluss an den Vorgänger vektorisiert prüfen
+        order = np.lexsort((addresses, function_codes))
+        fc_sorted = function_codes[order]
+        addr_sorted = addresses[order]
+        count_sorted = counts[order]
+        joins = np.zeros(len(order), dtype=bool)
+        joins[1:] = (
+            (fc_sorted[1:] == fc_sorted[:-1])
+            & (addr_sorted[1:] == addr_sorted[:-1] + count_sorted[:-1])
+            & ((fc_sorted[1:] == 3) | (fc_sorted[1:] == 4))
+        )
 
+        for i, idx in enumerate(order.tolist()):
+            count = int(count_sorted[i])
+            if joins[i] and blocks[-1][2] + count <= MAX_READ_BLOCK:
+                function_code, start, total, members = blocks[-1]
+                members.append((names[idx], definitions[idx], total))
+                blocks[-1] = (function_code, start, total + count, members)
+            else:
+                blocks.append((int(fc_sorted[i]), int(addr_sorted[i]), count,
+                               [(names[idx], definitions[idx], 0)]))
+
+        return tuple(
+            (
+                function_code,
+                start,
+                total,
+                {"address": start, "function": function_code, "count": total, "zero_based": True},
+                tuple(
+                    (name, definition, offset, int(definition.get("count", 1)), self._make_decoder(definition))
+                    for name, definition, offset in members
+                ),
+            )
+            for function_code, start, total, members in blocks
+        )
+
+    def _read_request(self, definition: Dict[str, Any]) -> Optional[Tuple[int, int, int]]:
+        """(function_code, count, normalisierte Adresse) für einen Lese-Request, sonst None"""
         address = definition.get("address")
         if address is None:
             return None
@@ -118,45 +302,39 @@ class ModbusClient:
         function_code = int(definition.get("function", 3))
         count = int(definition.get("count", 1))
         zero_based = bool(definition.get("zero_based", False))
-        normalized_address = self._normalize_address(address, function_code, zero_based)
+        return function_code, count, self._normalize_address(address, function_code, zero_based)
+
+    @staticmethod
+    def _read_result(function_code: int, count: int, address: Any, result: Any) -> Optional[List[int]]:
+        if result.isError():
+            logger.error("Modbus %s error at %s: %s", READ_FUNCTIONS[function_code][1], address, result)
+            return None
+        if function_code == 2:
+            return result.bits[:count]
+        return result.registers
+
+    def _read_raw(self, definition: Dict[str, Any]) -> Optional[List[int]]:
+        if not self.connected:
+            return None
+
+        request = self._read_request(definition)
+        if request is None:
+            return None
+        function_code, count, normalized_address = request
+        address = definition.get("address")
 
         try:
             with self._lock:
-                if function_code == 4:
-                    result = self.client.read_input_registers(
-                        address=normalized_address,
-                        count=count,
-                        slave=self.config.slave_id
-                    )
-                    if result.isError():
-                        logger.error("Modbus read_input error at %s: %s", address, result)
-                        return None
-                    return result.registers
-
-                if function_code == 3:
-                    result = self.client.read_holding_registers(
-                        address=normalized_address,
-                        count=count,
-                        slave=self.config.slave_id
-                    )
-                    if result.isError():
-                        logger.error("Modbus read_holding error at %s: %s", address, result)
-                        return None
-                    return result.registers
-
-                if function_code == 2:
-                    result = self.client.read_discrete_inputs(
-                        address=normalized_address,
-                        count=count,
-                        slave=self.config.slave_id
-                    )
-                    if result.isError():
-                        logger.error("Modbus read_discrete error at %s: %s", address, result)
-                        return None
-                    return result.bits[:count]
+                if function_code not in READ_FUNCTIONS:
+                    logger.error("Unsupported Modbus function code %s", function_code)
+                    return None
 
-                logger.error("Unsupported Modbus function code %s", function_code)
-                return None
+                result = getattr(self.client, READ_FUNCTIONS[function_code][0])(
+                    address=normalized_address,
+                    count=count,
+                    slave=self.config.slave_id
+                )
+                return self._read_result(function_code, count, address, result)
 
         except Exception as exc:
             logger.error("Modbus read exception at %s: %s", address, exc)
@@ -172,28 +350,50 @@ class ModbusClient:
             raw -= 1 << (16 * len(words))
         return raw
 
-    def _decode_value(self, definition: Dict[str, Any], raw: List[int]) -> Optional[Union[int, float]]:
-        if raw is None:
-            return None
-
+    def _make_decoder(self, definition: Dict[str, Any]) -> Callable[[List[int]], Optional[Union[int, float]]]:
+        """Decoder (Wörter -> skalierter Wert) mit den Parametern der Definition fest eingebunden"""
         data_type = definition.get("data_type", "uint16").lower()
         signed = bool(definition.get("signed", False)) or data_type.startswith("int")
         count = int(definition.get("count", 1))
+        scale = float(definition.get("scale", 1.0))
+        offset = float(definition.get("offset", 0.0))
 
-        if not raw:
-            return None
+        if data_type in _DWORD_TYPES and count == 2:
+            # Ein pack/unpack in C statt Bit-Arithmetik in Python; float32 als IEEE 754
+            dword = _DWORD_TYPES["int32" if signed and data_type == "uint32" else data_type]
+            pack_words = _WORD_PAIR.pack
+            unpack_dword = dword.unpack
+            combine_words = self._combine_words
+
+            def decode(raw: List[int]) -> Optional[Union[int, float]]:
+                if not raw:
+                    return None
+                if len(raw) < 2:
+                    return combine_words(raw[:count], signed=signed) * scale + offset
+                value = unpack_dword(pack_words(raw[0] & 0xFFFF, raw[1] & 0xFFFF))[0]
+                return value * scale + offset
+        elif data_type in {"uint32", "int32", "float32"} or count > 1:
+            combine_words = self._combine_words
 
-        if data_type in {"uint32", "int32", "float32"} or count > 1:
-            value = self._combine_words(raw[:count], signed=signed)
+            def decode(raw: List[int]) -> Optional[Union[int, float]]:
+                if not raw:
+                    return None
+                return combine_words(raw[:count], signed=signed) * scale + offset
         else:
-            value = raw[0]
-            if signed and value >= 0x8000:
-                value -= 0x10000
+            def decode(raw: List[int]) -> Optional[Union[int, float]]:
+                if not raw:
+                    return None
+                value = raw[0]
+                if signed and value >= 0x8000:
+                    value -= 0x10000
+                return value * scale + offset
 
-        scale = float(definition.get("scale", 1.0))
-        offset = float(definition.get("offset", 0.0))
+        return decode
 
-        return value * scale + offset
+    def _decode_value(self, definition: Dict[str, Any], raw: List[int]) -> Optional[Union[int, float]]:
+        if raw is None:
+            return None
+        return self._make_decoder(definition)(raw)
 
     
     def _init_client(self):
@@ -305,6 +505,26 @@ class ModbusClient:
             return raw[0]
         return raw
     
+    def read_float_block(self, address: int, num_floats: int, zero_based: bool = False) -> Optional[List[float]]:
+        """
+        Liest num_floats aufeinanderfolgende float32-Werte (je 2 Holding-Register,
+        High-Word zuerst) mit einem Request und dekodiert sie in einem struct-Aufruf
+        """
+        if not self.connected or num_floats <= 0:
+            return None
+
+        raw = self._read_raw({
+            "address": address,
+            "function": 3,
+            "count": num_floats * 2,
+            "zero_based": zero_based,
+        })
+        if raw is None or len(raw) < num_floats * 2:
+            return None
+
+        buf = struct.pack(f">{num_floats * 2}H", *(word & 0xFFFF for word in raw[:num_floats * 2]))
+        return list(struct.unpack_from(f">{num_floats}f", buf))
+
     def write_register(self, register_name: str, value: Union[int, float]) -> bool:
         """Write a single register by name"""
         if not self.connected:
@@ -340,50 +560,121 @@ class ModbusClient:
         norm_address = self._normalize_address(address, 3, zero_based)
 
         if definition:
-            scale = float(definition.get("scale", 1.0))
-            offset = float(definition.get("offset", 0.0))
-            if scale != 0:
-                value_to_write = int(round((float(value) - offset) / scale))
-            else:
-                value_to_write = int(round(float(value)))
+            value_to_write = self._to_register_value(
+                value,
+                float(definition.get("scale", 1.0)),
+                float(definition.get("offset", 0.0))
+            )
         else:
             value_to_write = int(round(float(value)))
         
-        try:
-            with self._lock:
-                result = self.client.write_register(
-                    address=norm_address,
-                    value=value_to_write,
-                    slave=self.config.slave_id
-                )
-                
-                if result.isError():
-                    self._last_error = f"Write error: {result}"
-                    logger.error(f"Modbus write error at address {norm_address}: {result}")
-                    return False
-                
-                logger.debug("Modbus write successful: address=%s, value=%s", norm_address, value_to_write)
-                return True
-                
-        except Exception as e:
-            self._last_error = str(e)
-            logger.error(f"Modbus write exception at address {norm_address}: {e}")
-            return False
+        return self._write_words(norm_address, [value_to_write])
+
+    def write_registers(self, values: Dict[str, Union[int, float]]) -> Dict[str, bool]:
+        """
+        Schreibt mehrere Register per Name und bündelt zusammenhängende Adressen.
+
+        Benachbarte 1-Wort-Holding-Register werden mit einem FC16-Request
+        (write_multiple_registers) geschrieben; alle anderen einzeln über
+        write_register. Schlägt ein Block fehl, wird er einzeln wiederholt,
+        damit das fehlerhafte Register eindeutig im Ergebnis steht.
+
+        Returns:
+            Dict Registername -> Erfolg
+        """
+        if not self.connected:
+            return {name: False for name in values}
+
+        results: Dict[str, bool] = {}
+        batch: List[Tuple[int, int, str]] = []
+
+        for name, value in values.items():
+            target = self._write_target(name)
+            if target is None:
+                results[name] = self.write_register(name, value)
+                continue
+            address, scale, offset = target
+            batch.append((address, self._to_register_value(value, scale, offset), name))
+
+        batch.sort()
+        start = 0
+        while start < len(batch):
+            end = start + 1
+            while end < len(batch) and batch[end][0] == batch[end - 1][0] + 1:
+                end += 1
+            group = batch[start:end]
+
+            ok = self._write_words(group[0][0], [word for _, word, _ in group])
+            if ok or len(group) == 1:
+                for _, _, name in group:
+                    results[name] = ok
+            else:
+                for address, word, name in group:
+                    results[name] = self._write_words(address, [word])
+            start = end
+
+        return results
     
     def read_bess_status(self) -> Dict[str, Any]:
         """Read complete BESS status from Modbus registers"""
         if not self.connected:
             return {}
         
-        status: Dict[str, Any] = {}
+        values: Dict[str, Union[int, float]] = {}
         raw_snapshot: Dict[str, Any] = {}
 
-        for reg_name in self.config.registers.keys():
-            value = self.read_register(reg_name)
-            if value is not None:
-                status[reg_name] = value
-                if reg_name in self._last_read_raw:
-                    raw_snapshot[reg_name] = self._last_read_raw[reg_name]
+        # Ein Request je zusammenhängendem Registerblock statt je Register
+        for _, _, _, request, members in self._block_plan():
+            raw = self._read_raw(request)
+            if raw is None and len(members) > 1:
+                # Block fehlgeschlagen: einzeln lesen, damit nur das fehlerhafte Register fehlt
+                for reg_name, *_ in members:
+                    value = self.read_register(reg_name)
+                    if value is not None:
+                        values[reg_name] = value
+                        raw_snapshot[reg_name] = self._last_read_raw[reg_name]
+                continue
+            self._decode_block(members, raw, values, raw_snapshot)
+
+        return self._assemble_status(values, raw_snapshot)
+
+    def _block_plan(self) -> Tuple[ReadBlock, ...]:
+        if self._read_blocks is None:
+            self._read_blocks = self._build_read_blocks()
+            self._register_order = tuple(self.config.registers.keys())
+        return self._read_blocks
+
+    def _decode_block(
+        self,
+        members: Tuple[Tuple[str, Dict[str, Any], int, int, Callable], ...],
+        raw: Optional[List[int]],
+        values: Dict[str, Union[int, float]],
+        raw_snapshot: Dict[str, Any]
+    ):
+        """Zerlegt die Wörter eines Blocks mit den vorbereiteten Decodern in die einzelnen Register"""
+        if raw is None:
+            return
+        last_read_raw = self._last_read_raw
+        for reg_name, definition, offset, width, decode in members:
+            words = raw[offset:offset + width]
+            value = decode(words)
+            if value is None:
+                continue
+            values[reg_name] = value
+            raw_snapshot[reg_name] = last_read_raw[reg_name] = {
+                "raw": words,
+                "definition": definition,
+            }
+
+    def _assemble_status(self, values: Dict[str, Union[int, float]], raw_snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Baut das Status-Dict (Konfigurationsreihenfolge, abgeleitete Kenngrößen)"""
+        # Reihenfolge wie in der Registerkonfiguration
+        status: Dict[str, Any] = {
+            reg_name: values[reg_name] for reg_name in self._register_order if reg_name in values
+        }
+        raw_snapshot = {
+            reg_name: raw_snapshot[reg_name] for reg_name in status if reg_name in raw_snapshot
+        }
 
         # Abgeleitete Kenngrößen
         voltage = status.get("voltage_v")
@@ -494,8 +785,6 @@ class ModbusClient:
         if not self.connected:
             return False
         
-        success = True
-        
         # Update configuration registers
         config_registers = [
             'max_charge_power_kw',
@@ -504,12 +793,13 @@ class ModbusClient:
             'soc_max_percent'
         ]
         
-        for reg_name in config_registers:
-            if reg_name in config_data:
-                if not self.write_register(reg_name, config_data[reg_name]):
-                    success = False
-        
-        return success
+        # Zusammenhängende Register werden mit einem FC16-Request geschrieben
+        results = self.write_registers({
+            reg_name: config_data[reg_name]
+            for reg_name in config_registers
+            if reg_name in config_data
+        })
+        return all(results.values())
     
     def test_connection(self) -> bool:
         """Test Modbus connection by reading a register"""
@@ -544,6 +834,8 @@ class ModbusClient:
         # Update config
         self.config = new_config
         self._last_read_raw = {}
+        self._write_targets = {}
+        self._read_blocks = None
         
         # Reinitialize if enabled
         if self.config.enabled:
@@ -590,10 +882,251 @@ class ModbusClient:
             "signed": kwargs.get("signed", False),
         }
         self.config.registers[name] = definition
+        self._write_targets.pop(name, None)
+        self._read_blocks = None
         logger.info("Added register mapping: %s -> %s", name, definition)
     
     def remove_register_mapping(self, name: str):
         """Remove a register mapping"""
         if name in self.config.registers:
             del self.config.registers[name]
+            self._write_targets.pop(name, None)
+            self._read_blocks = None
             logger.info("Removed register mapping: %s", name)
+
+
+class AsyncModbusClient(ModbusClient):
+    """
+    Modbus Client auf Basis der pymodbus-Async-Clients
+
+    Die Lese-Requests von read_bess_status_async() und read_many() werden per
+    asyncio.gather gleichzeitig abgesetzt: über TCP überlappen sie (pymodbus
+    ordnet Antworten per Transaction-ID zu), bei RTU serialisiert ein
+    asyncio.Lock die Leitung. Schreibzugriffe laufen immer nacheinander.
+
+    Die synchronen Methoden von ModbusClient bleiben nutzbar (z.B. für den
+    Poll-Thread des Controllers) und führen die Coroutinen auf einer eigenen
+    Event-Loop aus. Ein Client wird entweder synchron oder aus genau einer
+    fremden Event-Loop heraus verwendet, nicht gemischt.
+    """
+
+    def __init__(self, config: ModbusConfig):
+        self._loop = asyncio.new_event_loop()
+        self._io_lock = asyncio.Lock()
+        super().__init__(config)
+
+    def _init_client(self):
+        """Initialize async Modbus client"""
+        try:
+            from pymodbus.client import AsyncModbusTcpClient, AsyncModbusSerialClient
+
+            if self.config.connection_type == ModbusConnectionType.TCP.value:
+                self.client = AsyncModbusTcpClient(
+                    host=self.config.host,
+                    port=self.config.port,
+                    timeout=self.config.timeout
+                )
+                logger.info(f"Async Modbus TCP client initialized: {self.config.host}:{self.config.port}")
+
+            elif self.config.connection_type == ModbusConnectionType.RTU.value:
+                self.client = AsyncModbusSerialClient(
+                    port=self.config.serial_port,
+                    baudrate=self.config.baudrate,
+                    parity=self.config.parity,
+                    timeout=self.config.timeout
+                )
+                logger.info(f"Async Modbus RTU client initialized: {self.config.serial_port}")
+
+            else:
+                raise ValueError(f"Unsupported connection type: {self.config.connection_type}")
+
+        except ImportError:
+            logger.error("pymodbus not installed. Modbus functionality disabled.")
+            self.config.enabled = False
+        except Exception as e:
+            logger.error(f"Failed to initialize async Modbus client: {e}")
+            self.config.enabled = False
+
+    def _read_lock(self):
+        """Über TCP laufen Lese-Requests parallel, über RTU nacheinander"""
+        if self.config.connection_type == ModbusConnectionType.TCP.value:
+            return contextlib.nullcontext()
+        return self._io_lock
+
+    def _run(self, coro):
+        """Führt eine Coroutine synchron auf der eigenen Event-Loop aus"""
+        with self._lock:
+            if self._loop.is_closed():
+                # Nach disconnect() (z.B. Reconnect/update_config) neue Loop anlegen;
+                # das Lock ist an die alte Loop gebunden
+                self._loop = asyncio.new_event_loop()
+                self._io_lock = asyncio.Lock()
+            return self._loop.run_until_complete(coro)
+
+    def _close_loop(self):
+        """Schließt die eigene Event-Loop (wird bei Bedarf neu angelegt)"""
+        with self._lock:
+            if not self._loop.is_closed():
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+                self._loop.close()
+
+    # ------------------------------------------------------------------
+    # async API
+    # ------------------------------------------------------------------
+
+    async def connect_async(self) -> bool:
+        """Connect to Modbus device"""
+        if not self.config.enabled or not self.client:
+            return False
+
+        try:
+            if await self.client.connect():
+                self.connected = True
+                self._last_error = None
+                logger.info("Modbus connected successfully (async)")
+                return True
+
+            self.connected = False
+            self._last_error = "Connection failed"
+            logger.error("Modbus connection failed")
+            return False
+
+        except Exception as e:
+            self.connected = False
+            self._last_error = str(e)
+            logger.error(f"Modbus connection error: {e}")
+            return False
+
+    async def disconnect_async(self):
+        """Disconnect from Modbus device"""
+        if self.client and self.connected:
+            try:
+                self.client.close()
+                self.connected = False
+                logger.info("Modbus disconnected")
+            except Exception as e:
+                logger.error(f"Error disconnecting Modbus: {e}")
+
+    async def _read_raw_async(self, definition: Dict[str, Any]) -> Optional[List[int]]:
+        if not self.connected:
+            return None
+
+        request = self._read_request(definition)
+        if request is None:
+            return None
+        function_code, count, normalized_address = request
+        address = definition.get("address")
+
+        if function_code not in READ_FUNCTIONS:
+            logger.error("Unsupported Modbus function code %s", function_code)
+            return None
+
+        try:
+            async with self._read_lock():
+                result = await getattr(self.client, READ_FUNCTIONS[function_code][0])(
+                    address=normalized_address,
+                    count=count,
+                    slave=self.config.slave_id
+                )
+            return self._read_result(function_code, count, address, result)
+
+        except Exception as exc:
+            logger.error("Modbus read exception at %s: %s", address, exc)
+            self._last_error = str(exc)
+            return None
+
+    async def _write_words_async(self, norm_address: int, values: List[int]) -> bool:
+        try:
+            async with self._io_lock:
+                if len(values) == 1:
+                    result = await self.client.write_register(
+                        address=norm_address,
+                        value=values[0],
+                        slave=self.config.slave_id
+                    )
+                else:
+                    result = await self.client.write_registers(
+                        address=norm_address,
+                        values=values,
+                        slave=self.config.slave_id
+                    )
+            return self._write_result(norm_address, values, result)
+
+        except Exception as e:
+            self._last_error = str(e)
+            logger.error(f"Modbus write exception at address {norm_address}: {e}")
+            return False
+
+    async def read_register_async(self, register_name: str) -> Optional[Union[int, float]]:
+        """Read a single register by name"""
+        if not self.connected:
+            return None
+
+        definition = self._clone_definition(register_name)
+        if not definition:
+            return None
+
+        raw = await self._read_raw_async(definition)
+        if raw is None:
+            return None
+
+        value = self._decode_value(definition, raw)
+        self._last_read_raw[register_name] = {
+            "raw": raw,
+            "definition": definition,
+        }
+        return value
+
+    async def read_many(self, names: List[str]) -> Dict[str, Union[int, float]]:
+        """Liest mehrere Register per Name gleichzeitig (fehlende/fehlerhafte fehlen im Ergebnis)"""
+        results = await asyncio.gather(*(self.read_register_async(name) for name in names))
+        return {name: value for name, value in zip(names, results) if value is not None}
+
+    async def read_bess_status_async(self) -> Dict[str, Any]:
+        """Read complete BESS status, alle Registerblöcke gleichzeitig angefragt"""
+        if not self.connected:
+            return {}
+
+        blocks = self._block_plan()
+        raws = await asyncio.gather(
+            *(self._read_raw_async(request) for _, _, _, request, _ in blocks)
+        )
+
+        values: Dict[str, Union[int, float]] = {}
+        raw_snapshot: Dict[str, Any] = {}
+        for (_, _, _, _, members), raw in zip(blocks, raws):
+            if raw is None and len(members) > 1:
+                # Block fehlgeschlagen: einzeln lesen, damit nur das fehlerhafte Register fehlt
+                single = await self.read_many([member[0] for member in members])
+                values.update(single)
+                for reg_name in single:
+                    raw_snapshot[reg_name] = self._last_read_raw[reg_name]
+                continue
+            self._decode_block(members, raw, values, raw_snapshot)
+
+        return self._assemble_status(values, raw_snapshot)
+
+    # ------------------------------------------------------------------
+    # synchrone Schnittstelle (bestehende Aufrufer)
+    # ------------------------------------------------------------------
+
+    def connect(self) -> bool:
+        """Connect to Modbus device"""
+        return self._run(self.connect_async())
+
+    def disconnect(self):
+        """Disconnect from Modbus device"""
+        try:
+            self._run(self.disconnect_async())
+        finally:
+            self._close_loop()
+
+    def _read_raw(self, definition: Dict[str, Any]) -> Optional[List[int]]:
+        return self._run(self._read_raw_async(definition))
+
+    def _write_words(self, norm_address: int, values: List[int]) -> bool:
+        return self._run(self._write_words_async(norm_address, values))
+
+    def read_bess_status(self) -> Dict[str, Any]:
+        """Read complete BESS status from Modbus registers"""
+        return self._run(self.read_bess_status_async())
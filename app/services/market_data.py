@@ -60,11 +60,10 @@ class MarketDataService:
         
         # Normalisiere auf -1 bis +1
         if len(y) > 1:
-            slope = np.polyfit(x, y, 1)[0]
+            slope = float(np.polyfit(x, y, 1)[0])
             # Normalisiere: max slope = 1.0, min slope = -1.0
             # Annahme: max Preisänderung = 50 EUR/MWh pro Stunde
-            normalized_slope = np.clip(slope / 50.0, -1.0, 1.0)
-            return float(normalized_slope)
+            return min(max(slope / 50.0, -1.0), 1.0)
         
         return 0.0
     
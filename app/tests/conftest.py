@@ -0,0 +1,8 @@
+"""
+Pytest-Konfiguration: app/ als Importwurzel (wie beim Start der Anwendung)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
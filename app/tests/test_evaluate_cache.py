@@ -0,0 +1,77 @@
+"""
+Tests für BaseStrategy.evaluate_cached (Fingerprint-Cache der Strategie-Scores)
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ems.strategies import (
+    ArbitrageStrategy,
+    PeakShavingStrategy,
+    SelfConsumptionStrategy,
+    LoadBalancingStrategy,
+    ForecastBundle,
+)
+
+STRATEGY_CLASSES = (ArbitrageStrategy, PeakShavingStrategy, SelfConsumptionStrategy, LoadBalancingStrategy)
+
+
+def _series(rng, start, scale, hours=24):
+    return [(start + timedelta(hours=h), float(rng.uniform(0.0, scale))) for h in range(hours)]
+
+
+def _forecasts(seed=7, count=6):
+    """Prognosen mit Wiederholungen (gleiche Werte, neue Zeitstempel) wie im MPC-Takt"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 6, 1)
+    forecasts = []
+    for i in range(count):
+        forecasts.append({
+            'prices': _series(rng, start, 150.0),
+            'pv': _series(rng, start, 20.0),
+            'load': _series(rng, start, 15.0),
+        })
+    # Gleiche Werte eine Stunde später: muss aus dem Cache kommen
+    shifted = {
+        key: [(ts + timedelta(hours=1), value) for ts, value in series]
+        for key, series in forecasts[0].items()
+    }
+    return forecasts + [shifted, forecasts[-1]]
+
+
+@pytest.mark.parametrize('strategy_cls', STRATEGY_CLASSES)
+def test_cached_matches_uncached(strategy_cls):
+    cached = strategy_cls({})
+    reference = strategy_cls({})
+    state = {'soc': 50.0}
+    
+    for forecast in _forecasts():
+        for data in (forecast, ForecastBundle(forecast)):
+            assert cached.evaluate_cached(state, data) == reference.evaluate(state, data)
+
+
+@pytest.mark.parametrize('strategy_cls', STRATEGY_CLASSES)
+def test_repeated_forecast_hits_cache(strategy_cls, monkeypatch):
+    strategy = strategy_cls({})
+    forecast = _forecasts(count=1)[0]
+    first = strategy.evaluate_cached({}, forecast)
+    
+    calls = []
+    monkeypatch.setattr(strategy, 'evaluate', lambda *args: calls.append(args) or -1.0)
+    assert strategy.evaluate_cached({}, ForecastBundle(forecast)) == first
+    assert calls == []
+    
+    # Nach einer Konfigurationsänderung wird neu bewertet
+    strategy.invalidate_cache()
+    assert strategy.evaluate_cached({}, forecast) == -1.0
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize('strategy_cls', STRATEGY_CLASSES)
+def test_empty_forecast_matches_uncached(strategy_cls):
+    strategy = strategy_cls({})
+    forecast = _forecasts(count=1)[0]
+    assert strategy.evaluate_cached({}, {}) == strategy.evaluate({}, {})
+    assert strategy.evaluate_cached({}, forecast) == strategy.evaluate({}, forecast)
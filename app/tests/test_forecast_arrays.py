@@ -0,0 +1,60 @@
+"""
+Tests für die Netto-Last (net_load / resampled_net_load) und die PV-Option des Load Balancing
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from ems.strategies import ForecastBundle, LoadBalancingStrategy
+from ems.strategies.forecast_arrays import net_load, resampled_net_load
+
+START = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _hourly_load(hours=24):
+    return [(START + timedelta(hours=h), 10.0 + (h % 5)) for h in range(hours)]
+
+
+def _quarter_hour_pv(hours=24):
+    return [(START + timedelta(minutes=15 * q), float(q % 8)) for q in range(hours * 4)]
+
+
+def test_net_load_ignores_pv_with_other_length():
+    forecast = {'load': _hourly_load(), 'pv': _quarter_hour_pv()}
+    expected = np.array([value for _, value in forecast['load']], dtype=np.float32)
+    np.testing.assert_array_equal(net_load(forecast), expected)
+    np.testing.assert_array_equal(net_load(ForecastBundle(forecast)), expected)
+
+
+def test_resampled_net_load_interpolates_pv_onto_load():
+    forecast = {'load': _hourly_load(), 'pv': _quarter_hour_pv()}
+    load = np.array([value for _, value in forecast['load']])
+    # Volle Stunden liegen auf PV-Stützstellen: PV-Wert der Viertelstunde 4*h
+    pv_at_hours = np.array([float((4 * h) % 8) for h in range(24)])
+    np.testing.assert_allclose(resampled_net_load(forecast), load - pv_at_hours)
+    np.testing.assert_allclose(resampled_net_load(ForecastBundle(forecast)), load - pv_at_hours)
+
+
+def test_resampled_net_load_zero_pv_outside_horizon():
+    forecast = {'load': _hourly_load(), 'pv': _quarter_hour_pv(hours=6)}
+    result = resampled_net_load(forecast)
+    load = np.array([value for _, value in forecast['load']])
+    np.testing.assert_allclose(result[6:], load[6:])
+
+
+def test_same_grid_matches_net_load():
+    pv = [(ts, value / 2) for ts, value in _hourly_load()]
+    forecast = {'load': _hourly_load(), 'pv': pv}
+    np.testing.assert_array_equal(resampled_net_load(forecast), net_load(forecast))
+
+
+def test_load_balancing_resamples_only_when_enabled():
+    forecast = {'load': _hourly_load(), 'pv': _quarter_hour_pv()}
+    default = LoadBalancingStrategy({}).optimize({'soc': 50.0}, ForecastBundle(forecast))
+    baseline = LoadBalancingStrategy({}).optimize({'soc': 50.0}, {'load': _hourly_load()})
+    resampled = LoadBalancingStrategy({'load_balancing': {'pv_resample': True}}).optimize(
+        {'soc': 50.0}, ForecastBundle(forecast))
+    
+    assert default.schedule == baseline.schedule
+    assert resampled.schedule != default.schedule
@@ -0,0 +1,146 @@
+"""
+Tests für das Bündeln von Modbus-Requests (Lese-Blöcke, FC16-Schreiben) gegen einen Fake-Client
+"""
+
+from services.communication.modbus_client import MAX_READ_BLOCK, ModbusClient, ModbusConfig
+
+
+class FakeResponse:
+    def __init__(self, registers=None, bits=None, error=False):
+        self.registers = registers
+        self.bits = bits
+        self._error = error
+
+    def isError(self):
+        return self._error
+
+
+class FakeModbus:
+    """Zeichnet Requests auf; Holding = Adresse * 7, Input = Adresse * 7 + 1"""
+
+    def __init__(self, fail_multi_write=False):
+        self.calls = []
+        self.fail_multi_write = fail_multi_write
+
+    def read_holding_registers(self, address, count, slave):
+        self.calls.append(('read_holding', address, count))
+        return FakeResponse([(a * 7) % 65536 for a in range(address, address + count)])
+
+    def read_input_registers(self, address, count, slave):
+        self.calls.append(('read_input', address, count))
+        return FakeResponse([(a * 7 + 1) % 65536 for a in range(address, address + count)])
+
+    def read_discrete_inputs(self, address, count, slave):
+        self.calls.append(('read_discrete', address, count))
+        return FakeResponse(bits=[True] * 8)
+
+    def write_registers(self, address, values, slave):
+        self.calls.append(('write_registers', address, list(values)))
+        return FakeResponse(error=self.fail_multi_write)
+
+    def write_register(self, address, value, slave):
+        self.calls.append(('write_register', address, value))
+        return FakeResponse()
+
+
+REGISTERS = {
+    'soc': {'address': 40001, 'scale': 0.1},
+    'voltage_v': {'address': 40002},
+    'current_a': {'address': 40003, 'signed': True},
+    'energy': {'address': 40004, 'count': 2, 'data_type': 'uint32'},
+    'status_code': 40010,
+    'temp': {'address': 30001, 'function': 4},
+    'alarm': {'address': 10001, 'function': 2},
+    'temp2': {'address': 30002, 'function': 4},
+    'max_charge_power_kw': {'address': 40020},
+    'max_discharge_power_kw': {'address': 40021},
+    'soc_min_percent': {'address': 40022, 'scale': 0.5},
+    'soc_max_percent': {'address': 40024},
+}
+
+
+def _client(registers=REGISTERS, **fake_kwargs):
+    client = ModbusClient(ModbusConfig(registers=dict(registers)))
+    client.client = FakeModbus(**fake_kwargs)
+    client.connected = True
+    return client
+
+
+def test_read_blocks_group_contiguous_registers():
+    blocks = _client()._build_read_blocks()
+    layout = [
+        (fc, start, count, tuple(member[0] for member in members))
+        for fc, start, count, _, members in blocks
+    ]
+    assert layout == [
+        (2, 0, 1, ('alarm',)),
+        (3, 0, 5, ('soc', 'voltage_v', 'current_a', 'energy')),
+        (3, 9, 1, ('status_code',)),
+        (3, 19, 3, ('max_charge_power_kw', 'max_discharge_power_kw', 'soc_min_percent')),
+        (3, 23, 1, ('soc_max_percent',)),
+        (4, 0, 2, ('temp', 'temp2')),
+    ]
+
+
+def test_read_blocks_respect_max_block_size():
+    registers = {f'r{i}': {'address': 40101 + i} for i in range(MAX_READ_BLOCK + 5)}
+    blocks = _client(registers)._build_read_blocks()
+    assert [(start, count) for _, start, count, _, _ in blocks] == [(100, MAX_READ_BLOCK), (100 + MAX_READ_BLOCK, 5)]
+
+
+def test_block_read_matches_single_register_reads():
+    block_client = _client()
+    status = block_client.read_bess_status()
+    
+    single_client = _client()
+    expected = {}
+    for name in REGISTERS:
+        value = single_client.read_register(name)
+        if value is not None:
+            expected[name] = value
+    
+    assert {name: status[name] for name in expected} == expected
+    assert len(block_client.client.calls) == 6
+    assert len(single_client.client.calls) == len(REGISTERS)
+
+
+def test_write_registers_groups_adjacent_holding_registers():
+    client = _client()
+    results = client.write_registers({
+        'soc_max_percent': 95,
+        'max_discharge_power_kw': 40,
+        'max_charge_power_kw': 50,
+        'soc_min_percent': 10,
+        'temp': 1,
+    })
+    
+    assert results == {
+        'temp': False,
+        'max_charge_power_kw': True,
+        'max_discharge_power_kw': True,
+        'soc_min_percent': True,
+        'soc_max_percent': True,
+    }
+    assert client.client.calls == [
+        ('write_registers', 19, [50, 40, 20]),
+        ('write_register', 23, 95),
+    ]
+
+
+def test_write_registers_retries_failed_block_individually():
+    client = _client(fail_multi_write=True)
+    results = client.write_registers({'max_charge_power_kw': 50, 'max_discharge_power_kw': 40})
+    
+    assert results == {'max_charge_power_kw': True, 'max_discharge_power_kw': True}
+    assert client.client.calls == [
+        ('write_registers', 19, [50, 40]),
+        ('write_register', 19, 50),
+        ('write_register', 20, 40),
+    ]
+
+
+def test_write_registers_requires_connection():
+    client = _client()
+    client.connected = False
+    assert client.write_registers({'max_charge_power_kw': 1}) == {'max_charge_power_kw': False}
+    assert client.client.calls == []
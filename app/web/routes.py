@@ -13,7 +13,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 
 from config import list_profiles, get_profile
-from services.communication import ModbusConfig, ModbusClient
+from services.communication import ModbusConfig, ModbusClient, AsyncModbusClient
 
 logger = logging.getLogger(__name__)
 
@@ -979,6 +979,8 @@ def api_modbus_test():
     """Test Modbus connection"""
     try:
         config_data = request.get_json()
+        # use_async kommt nicht aus dem Formular: gespeicherte Einstellung (wie im Controller)
+        stored_modbus = get_site_config(load_config(), config_data.get('site_id')).get('modbus', {})
 
         modbus_config = ModbusConfig(
             enabled=True,
@@ -995,16 +997,19 @@ def api_modbus_test():
             serial_port=config_data.get('serial_port', '/dev/ttyUSB0'),
             baudrate=config_data.get('baudrate', 115200),
             parity=config_data.get('parity', 'N'),
+            use_async=config_data.get('use_async', stored_modbus.get('use_async', False)),
         )
 
-        client = ModbusClient(modbus_config)
-        if not client.config.enabled:
-            return jsonify({'success': False, 'error': 'pymodbus not installed'}), 500
+        # Gleiche Client-Klasse wie der Controller, damit der Test den späteren Betrieb abbildet
+        client_cls = AsyncModbusClient if modbus_config.use_async else ModbusClient
+        client = client_cls(modbus_config)
+        try:
+            if not client.config.enabled:
+                return jsonify({'success': False, 'error': 'pymodbus not installed'}), 500
 
-        if not client.connect():
-            return jsonify({'success': False, 'error': 'Modbus connection failed'})
+            if not client.connect():
+                return jsonify({'success': False, 'error': 'Modbus connection failed'})
 
-        try:
             if client.test_connection():
                 return jsonify({'success': True, 'message': 'Modbus connection successful'})
             return jsonify({'success': False, 'error': 'No response from test register'})